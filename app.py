@@ -1,10 +1,23 @@
 import streamlit as st
+import contextlib
 import json
 import io
+import logging
 import os
-import re
-import pandas as pd
-import google.generativeai as genai
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from draft_store import DEFAULT_MAX_BYTES, DraftStore, autosave, is_draft_id, new_draft_id, snapshot_value
+from excel_export import cached_plan_workbook, iter_plans, plan_from_state, write_bulk_workbook
+from llm_backends import create_backend
+from llm_cache import ResponseCache, make_key
+from llm_scheduler import LLMScheduler, SchedulerError
+from metrics import REGISTRY, SlowRerunProfiler, configure_event_log, start_http_exporter, timed
+from plan_sections import PLAN_SECTIONS
+from prefetch import PrefetchExecutor, SessionPrefetcher, prefetch_enabled
+from prompt_builder import (VARIED_PROMPTS, Prompt, assessment_prompt, critique_prompt, feedback_prompt, public_product_prompt, question_analysis_prompt,
+                            question_prompt, reflection_prompt, sustained_inquiry_prompt)
+from standards_index import GRADE_GROUPS, compact_records, merge_selection, open_index, parse_5_6_standards_text, subject_standards
 
 # --- 1. 초기 설정 및 API 키 구성 ---
 st.set_page_config(
@@ -14,7 +27,7 @@ st.set_page_config(
     initial_sidebar_state="auto",
 )
 
-# Gemini API 키 설정
+# Gemini API 키 설정 (SDK는 AI 기능을 처음 사용할 때 불러와 프로세스당 한 번만 설정합니다)
 try:
     # Streamlit Cloud 배포용 Secrets
     GEMINI_API_KEY = st.secrets["GEMINI_API_KEY"]
@@ -22,34 +35,29 @@ except (FileNotFoundError, KeyError):
     # 로컬 테스트용 (아래 큰따옴표 안에 직접 키를 입력하세요)
     GEMINI_API_KEY = "" 
 
-if GEMINI_API_KEY:
-    try:
-        genai.configure(api_key=GEMINI_API_KEY)
-    except Exception as e:
-        st.error(f"API 키 설정 중 오류가 발생했습니다: {e}")
-else:
+if not GEMINI_API_KEY and os.environ.get('GSPBL_LLM_BACKEND', 'gemini').lower() == 'gemini':
     st.warning("Gemini API 키가 설정되지 않았습니다. AI 기능을 사용하려면 앱 설정(Secrets)에 키를 추가하거나 코드에 직접 입력해주세요.")
 
+# 성능 지표 (한 프로세스의 모든 세션이 함께 집계합니다)
+PAGE_RENDER_SECONDS = REGISTRY.histogram("gspbl_page_render_seconds", "페이지 렌더링 시간(초)", ("page",))
+RERUN_SECONDS = REGISTRY.histogram("gspbl_rerun_seconds", "재실행(rerun) 한 번 전체 시간(초)")
+DATA_LOAD_SECONDS = REGISTRY.histogram("gspbl_data_load_seconds", "성취기준 데이터 로드 시간(초)", ("function",))
+AI_REQUEST_SECONDS = REGISTRY.histogram("gspbl_ai_request_seconds", "AI 응답 전체 시간(초)", ("helper", "mode"))
+AI_FIRST_TOKEN_SECONDS = REGISTRY.histogram("gspbl_ai_first_token_seconds", "AI 응답 첫 토큰까지 걸린 시간(초)", ("helper",))
+AI_REQUESTS = REGISTRY.counter("gspbl_ai_requests", "AI 요청 수 (결과별)", ("helper", "outcome"))
+AI_ERRORS = REGISTRY.counter("gspbl_ai_errors", "AI 요청 오류 수 (예외 종류별)", ("helper", "kind"))
+AI_CACHE = REGISTRY.counter("gspbl_ai_cache", "AI 응답 캐시 조회 수", ("result",))
+AI_PREFETCH = REGISTRY.counter("gspbl_ai_prefetch", "AI 제안 미리 요청 수 (결과별)", ("helper", "outcome"))
+
 
 # --- 2. 데이터 로드 및 처리 함수 ---
-def parse_5_6_standards_text(text_content):
-    """5-6학년군 텍스트 형식의 성취기준을 JSON 형식으로 파싱합니다."""
-    parsed_data = []
-    subject_map = { '국': '국어', '사': '사회', '도': '도덕', '수': '수학', '과': '과학', '실': '실과', '체': '체육', '음': '음악', '미': '미술', '영': '영어' }
-    pattern = re.compile(r'\[(6([가-힣]{1,2})\d{2}-\d{2})\]\s(.+)')
-    lines = text_content.split('\n')
-    for line in lines:
-        match = pattern.match(line.strip())
-        if match:
-            full_code, subject_abbr, standard_text = match.groups()
-            subject_full = subject_map.get(subject_abbr)
-            if subject_full:
-                parsed_data.append({ "학년군": "5~6", "교과": subject_full, "성취기준_코드": f"[{full_code}]", "성취기준": standard_text.strip() })
-    return parsed_data
-
-@st.cache_data
+@st.cache_resource
+@timed(DATA_LOAD_SECONDS, function="load_json_data")
 def load_json_data(filename):
-    """'data' 폴더에서 JSON 파일을 로드합니다."""
+    """'data' 폴더의 성취기준 JSON 파일을 불변 레코드(Standard) 튜플로 로드합니다.
+
+    레코드는 바꿀 수 없으므로 st.cache_data처럼 호출마다 복사하지 않고, 모든 세션이 같은 튜플을 함께 씁니다.
+    """
     filepath = os.path.join('data', filename)
     if not os.path.exists(filepath):
         st.error(f"'{filepath}' 파일을 찾을 수 없습니다. 'data' 폴더 안에 있는지 확인해주세요.")
@@ -59,9 +67,9 @@ def load_json_data(filename):
             data = json.load(f)
             # 5-6학년군 텍스트 파일 특별 처리
             if isinstance(data, dict) and 'content' in data:
-                return parse_5_6_standards_text(data['content'])
+                return compact_records(parse_5_6_standards_text(data['content']))
             elif isinstance(data, list):
-                return data
+                return compact_records(data)
             else:
                 st.error(f"'{filepath}' 파일의 형식이 올바르지 않습니다.")
                 return None
@@ -69,46 +77,384 @@ def load_json_data(filename):
         st.error(f"'{filepath}' 파일 로딩 또는 파싱 중 오류: {e}")
         return None
 
+@st.cache_resource
+def get_standards_index():
+    """미리 빌드된 성취기준 인덱스를 프로세스당 한 번 mmap으로 엽니다. 없거나 오래되었으면 다시 빌드합니다."""
+    try:
+        return open_index()
+    except (OSError, ValueError):
+        # 인덱스를 만들 수 없는 환경(읽기 전용 폴더 등)에서는 원본 JSON을 직접 읽습니다.
+        return None
+
+@timed(DATA_LOAD_SECONDS, function="load_standards")
+def load_standards(grade_group):
+    """학년군의 성취기준 레코드 튜플을 인덱스에서 읽어옵니다. 모든 세션이 같은 튜플을 참조합니다."""
+    index = get_standards_index()
+    if index is None:
+        return load_json_data(f"{grade_group}_성취기준.json")
+    return index.records(grade_group)
+
+@st.cache_resource
+def get_source_subject_standards(grade_group):
+    """인덱스가 없을 때 원본 JSON으로 교과별 표시 문자열을 프로세스당 한 번만 만듭니다."""
+    return subject_standards(load_json_data(f"{grade_group}_성취기준.json") or ())
+
+@timed(DATA_LOAD_SECONDS, function="load_subject_standards")
+def load_subject_standards(grade_group):
+    """학년군의 교과별 (성취기준 표시 문자열 목록, 집합)을 반환합니다. 프로세스당 한 번만 만들어 모든 세션이 함께 씁니다."""
+    index = get_standards_index()
+    if index is None:
+        return get_source_subject_standards(grade_group)
+    return index.subject_standards(grade_group)
+
+@st.cache_resource
+def get_recommender(data_digest):
+    """성취기준 데이터 해시마다 추천용 TF-IDF 행렬을 한 번만 만들어 모든 세션이 함께 씁니다."""
+    # numpy를 쓰는 모듈이므로 시작 화면이 아니라 STEP 2에서 처음 필요할 때 불러옵니다.
+    from recommender import StandardsRecommender, build_recommender
+
+    index = get_standards_index()
+    if index is None:
+        return StandardsRecommender({g: load_json_data(f"{g}_성취기준.json") or () for g in GRADE_GROUPS})
+    return build_recommender(index)
+
+def load_recommender():
+    """현재 성취기준 데이터에 맞는 추천기를 반환합니다."""
+    index = get_standards_index()
+    return get_recommender(index.digest.hex() if index is not None else "")
+
+@st.cache_resource
+def get_search_index(data_digest):
+    """성취기준 데이터 해시마다 전체 학년군 검색 색인을 한 번만 만들어 모든 세션이 함께 씁니다."""
+    from standards_search import StandardsSearchIndex, build_search_index
+
+    index = get_standards_index()
+    if index is None:
+        return StandardsSearchIndex({g: load_json_data(f"{g}_성취기준.json") or () for g in GRADE_GROUPS})
+    return build_search_index(index)
+
+def load_search_index():
+    """현재 성취기준 데이터에 맞는 검색 색인을 반환합니다."""
+    index = get_standards_index()
+    return get_search_index(index.digest.hex() if index is not None else "")
+
 # --- 3. AI 및 엑셀 생성 함수 ---
-def call_gemini(prompt):
-    """Gemini AI 모델을 호출하여 응답을 반환합니다."""
-    if not GEMINI_API_KEY:
+@st.cache_resource
+def get_llm_backend():
+    """AI 백엔드를 프로세스당 한 번만 만듭니다. GSPBL_LLM_BACKEND=fake 이면 오프라인 가짜 모델을 사용합니다.
+
+    모든 세션의 요청은 공유 스케줄러(속도 제한, 재시도, 같은 요청 합치기, 회로 차단)를 거칩니다.
+    """
+    return LLMScheduler.from_env(create_backend(api_key=GEMINI_API_KEY))
+
+@st.cache_resource
+def get_response_cache():
+    """모든 세션과 워커 프로세스가 함께 쓰는 AI 응답 캐시를 엽니다."""
+    return ResponseCache()
+
+def _stream_text(chunks, timing):
+    """스트리밍 응답 조각을 그대로 넘기면서 첫 토큰 도착 시각을 기록합니다."""
+    for text in chunks:
+        timing.setdefault('first_token', time.perf_counter())
+        yield text
+
+def _generate(backend, prompt, stream):
+    """AI 응답을 생성합니다. 스트리밍이 실패하면 한 번에 받는 방식으로 다시 요청합니다.
+
+    반환값은 (응답 텍스트, 첫 토큰까지 걸린 시간, 스트리밍 여부)입니다.
+    """
+    started = time.perf_counter()
+    if stream:
+        placeholder = st.empty()
+        timing = {}
+        try:
+            text = placeholder.write_stream(_stream_text(backend.stream(prompt), timing))
+            if isinstance(text, str) and text:
+                return text, timing['first_token'] - started, True
+        except SchedulerError:
+            raise
+        except Exception:
+            pass
+        finally:
+            # 최종 응답은 각 화면의 입력창에 표시되므로 스트리밍 미리보기는 지웁니다.
+            placeholder.empty()
+    with st.spinner("🚀 Gemini AI가 선생님의 아이디어를 확장하고 있어요..."):
+        return backend.generate(prompt), time.perf_counter() - started, False
+
+def _ai_disabled_message(backend):
+    """API 키가 없어 AI를 사용할 수 없으면 안내 문구를, 사용할 수 있으면 None을 반환합니다."""
+    if backend.requires_api_key and not GEMINI_API_KEY:
         return "⚠️ AI 기능 비활성화: Gemini API 키가 설정되지 않았습니다."
+    return None
+
+def _prompt_text(prompt):
+    """(지표에 쓸 프롬프트 이름, 프롬프트 문자열)을 반환합니다. prompt_builder.Prompt이면 줄이기 전후 크기를 세션에 기록합니다."""
+    if isinstance(prompt, Prompt):
+        st.session_state.last_prompt_stats = {"name": prompt.name, "before": prompt.tokens_before, "after": prompt.tokens_after, "budget": prompt.budget}
+        return prompt.name, prompt.text
+    return "direct", prompt
+
+def _record_ai_error(helper, error):
+    AI_ERRORS.inc(helper=helper, kind=type(error).__name__)
+    AI_REQUESTS.inc(helper=helper, outcome="error")
+
+@st.cache_resource
+def get_prefetch_executor():
+    """모든 세션이 함께 쓰는 프리페치 실행기를 프로세스당 한 번만 만듭니다."""
+    return PrefetchExecutor.from_env()
+
+# 미리 요청할 STEP 3 제안: 이름 -> (프롬프트 생성 함수, 프롬프트에 들어가는 입력 항목)
+STEP3_PREFETCH = {
+    "process_assessment": (assessment_prompt, ("project_title", "sustained_inquiry")),
+    "critique_revision": (critique_prompt, ("project_title", "public_product")),
+    "reflection": (reflection_prompt, ("project_title",)),
+}
+
+def prefetch_fingerprints(state):
+    """STEP 3 제안마다 프롬프트에 들어가는 입력 값을 반환합니다. 값이 바뀌면 미리 요청한 제안은 버립니다."""
+    return {name: tuple(state.get(field, '') for field in fields) for name, (_, fields) in STEP3_PREFETCH.items()}
+
+def discard_stale_prefetches():
+    """탐구 질문이나 지속적 탐구 등 입력이 바뀐 STEP 3 제안은 미리 요청한 것을 취소하거나 버립니다."""
+    prefetcher = st.session_state.get('prefetcher')
+    if prefetcher is None:
+        return
+    for name in prefetcher.discard_stale(prefetch_fingerprints(st.session_state)):
+        AI_PREFETCH.inc(helper=name, outcome="discarded")
+
+def prefetch_step3():
+    """STEP 3 이전 단계에서 다음 단계로 넘어갈 때 평가·비평·성찰 제안을 백그라운드에서 미리 요청합니다. (GSPBL_PREFETCH=1)
+
+    이미 채운 항목, 응답 캐시에 있는 요청, 세션 한도를 넘는 요청은 보내지 않습니다.
+    """
+    if not prefetch_enabled() or st.session_state.page > 3 or not st.session_state.project_title:
+        return
+    backend = get_llm_backend()
+    if _ai_disabled_message(backend):
+        return
+    if 'prefetcher' not in st.session_state:
+        # 요청 횟수는 실행기에 브라우저 세션 id별로 세므로 '처음으로'로 세션 상태를 비워도 한도가 이어집니다.
+        ctx = get_script_run_ctx()
+        st.session_state.prefetcher = SessionPrefetcher.from_env(get_prefetch_executor(), ctx.session_id if ctx else None)
+    discard_stale_prefetches()
+    fingerprints = prefetch_fingerprints(st.session_state)
+    regenerate = st.session_state.get('regenerate_ai', False)
+    cache = get_response_cache()
+    prompts = {}
+    for key, (build, _) in STEP3_PREFETCH.items():
+        # 이미 채운 항목은 요청하지 않고, 과정중심 평가는 지속적 탐구 계획이 있을 때만 요청합니다.
+        if st.session_state.get(key) or (key == "process_assessment" and not st.session_state.sustained_inquiry):
+            continue
+        prompt = build(st.session_state)
+        cache_key = make_key(prompt.text, backend.model_name, backend.generation_config)
+        if regenerate or not cache.contains(cache_key):
+            prompts[cache_key] = (prompt.name, prompt.text, fingerprints[key])
+    started = st.session_state.prefetcher.submit(backend.generate, prompts)
+    for name in started:
+        AI_PREFETCH.inc(helper=name, outcome="submitted")
+
+def _take_prefetched(helper, cache_key):
+    """미리 요청한 응답이 있으면 (필요하면 도착할 때까지 기다려) 반환합니다. 없거나 실패했으면 None을 반환해 평소처럼 요청하게 합니다."""
+    prefetcher = st.session_state.get('prefetcher')
+    future = prefetcher.take(cache_key) if prefetcher is not None else None
+    if future is None:
+        return None
+    started = time.perf_counter()
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        with st.spinner("🚀 Gemini AI가 선생님의 아이디어를 확장하고 있어요..."):
-            response = model.generate_content(prompt)
-            return response.text
+        with contextlib.nullcontext() if future.done() else st.spinner("⚡ 미리 요청해 둔 AI 제안을 받고 있어요..."):
+            text = future.result()
+    except Exception:
+        AI_PREFETCH.inc(helper=helper, outcome="failed")
+        return None
+    waited = time.perf_counter() - started
+    _record_prefetch_used(helper, waited)
+    st.session_state.last_ai_timing = {"mode": "미리 요청", "first_token": waited, "total": waited}
+    return text
+
+def _record_prefetch_used(helper, waited):
+    AI_PREFETCH.inc(helper=helper, outcome="used")
+    AI_REQUEST_SECONDS.observe(waited, helper=helper, mode="prefetch")
+    AI_REQUESTS.inc(helper=helper, outcome="prefetch")
+
+def call_gemini(prompt, regenerate=None, stream=True):
+    """Gemini AI 모델을 호출하여 응답을 반환합니다. 같은 요청의 응답이 캐시에 있으면 재사용합니다.
+
+    prompt는 문자열 또는 prompt_builder로 만든 Prompt입니다. 매번 다른 답을 요청하는 프롬프트(VARIED_PROMPTS)는 캐시하지 않습니다.
+    stream=True이면 응답이 생성되는 대로 화면에 보여주고, 스트리밍이 실패하면 기존 방식으로 응답을 받습니다.
+    """
+    helper, prompt = _prompt_text(prompt)
+    backend = get_llm_backend()
+    disabled = _ai_disabled_message(backend)
+    if disabled:
+        AI_REQUESTS.inc(helper=helper, outcome="disabled")
+        return disabled
+    if regenerate is None:
+        regenerate = st.session_state.get('regenerate_ai', False)
+    cache = get_response_cache()
+    cache_key = make_key(prompt, backend.model_name, backend.generation_config)
+    prefetched = _take_prefetched(helper, cache_key)
+    if prefetched is not None:
+        cache.set(cache_key, prefetched, backend.model_name)
+        return prefetched
+    cacheable = helper not in VARIED_PROMPTS
+    if regenerate or not cacheable:
+        AI_CACHE.inc(result="bypass")
+    else:
+        cached = cache.get(cache_key)
+        AI_CACHE.inc(result="miss" if cached is None else "hit")
+        if cached is not None:
+            AI_REQUESTS.inc(helper=helper, outcome="cache")
+            st.session_state.last_ai_timing = {"mode": "캐시", "first_token": 0.0, "total": 0.0}
+            return cached
+    try:
+        started = time.perf_counter()
+        text, first_token, streamed = _generate(backend, prompt, stream)
+        total = time.perf_counter() - started
+        AI_REQUEST_SECONDS.observe(total, helper=helper, mode="stream" if streamed else "blocking")
+        AI_FIRST_TOKEN_SECONDS.observe(first_token, helper=helper)
+        AI_REQUESTS.inc(helper=helper, outcome="ok")
+        st.session_state.last_ai_timing = {"mode": "스트리밍" if streamed else "일괄", "first_token": first_token, "total": total}
+        if cacheable:
+            cache.set(cache_key, text, backend.model_name)
+        return text
+    except SchedulerError as e:
+        _record_ai_error(helper, e)
+        return f"⚠️ {e}"
     except Exception as e:
+        _record_ai_error(helper, e)
         return f"AI 응답 생성에 실패했습니다. API 키가 유효한지 확인해주세요. 오류: {e}"
 
-def create_excel_download():
-    """세션 상태 데이터를 바탕으로 엑셀 파일을 생성합니다."""
-    data = st.session_state
-    plan_data = {
-        "🎯 탐구 질문": data.get('project_title', ''),
-        "📢 최종 결과물 공개": data.get('public_product', ''),
-        "📚 교과 성취기준": "\n".join(f"• {s}" for s in data.get('selected_standards', [])),
-        "💡 핵심역량": "\n".join(f"• {c}" for c in data.get('selected_core_competencies', [])),
-        "🌱 사회정서 역량": "\n".join(f"• {c}" for c in data.get('selected_sel_competencies', [])),
-        "🧭 지속적 탐구": data.get('sustained_inquiry', ''),
-        "📈 과정중심 평가": data.get('process_assessment', ''),
-        "🗣️ 학생의 의사 & 선택권": "\n".join(f"• {c}" for c in data.get('student_voice_choice', [])),
-        "🔄 비평과 개선": data.get('critique_revision', ''),
-        "🤔 성찰": data.get('reflection', '')
-    }
-    df = pd.DataFrame(list(plan_data.items()), columns=['항목', '내용'])
+def call_gemini_many(prompts, on_result, regenerate=None, max_workers=3):
+    """서로 독립적인 여러 프롬프트를 동시에 생성합니다.
+
+    prompts는 {이름: 프롬프트(문자열 또는 Prompt)} 형태이며, 결과가 도착하는 순서대로 on_result(이름, 응답, 오류)를 호출합니다.
+    캐시에 있는 응답은 바로 전달하고, 나머지는 스레드 풀에 먼저 모두 요청한 뒤 미리 요청해 둔 응답과 함께 먼저 끝나는 것부터 전달합니다.
+    미리 요청한 응답이 실패하면 그 프롬프트만 스레드 풀에서 다시 요청합니다.
+    """
+    unpacked = {name: _prompt_text(prompt) for name, prompt in prompts.items()}
+    helpers = {name: helper for name, (helper, _) in unpacked.items()}
+    prompts = {name: text for name, (_, text) in unpacked.items()}
+    backend = get_llm_backend()
+    disabled = _ai_disabled_message(backend)
+    if disabled:
+        for name in prompts:
+            AI_REQUESTS.inc(helper=helpers[name], outcome="disabled")
+            on_result(name, None, disabled)
+        return
+    if regenerate is None:
+        regenerate = st.session_state.get('regenerate_ai', False)
+    cache = get_response_cache()
+    keys = {name: make_key(prompt, backend.model_name, backend.generation_config) for name, prompt in prompts.items()}
+    prefetcher = st.session_state.get('prefetcher')
+    prefetched, pending = {}, {}
+    for name, prompt in prompts.items():
+        future = prefetcher.take(keys[name]) if prefetcher is not None else None
+        if future is not None:
+            prefetched[future] = name
+            continue
+        bypass = regenerate or helpers[name] in VARIED_PROMPTS
+        cached = None if bypass else cache.get(keys[name])
+        AI_CACHE.inc(result="bypass" if bypass else "miss" if cached is None else "hit")
+        if cached is not None:
+            AI_REQUESTS.inc(helper=helpers[name], outcome="cache")
+            on_result(name, cached, None)
+        else:
+            pending[name] = prompt
+    if not prefetched and not pending:
+        return
+    started, first_result = time.perf_counter(), None
+    # 작업 스레드에서는 Streamlit API를 호출하지 않고, 결과 표시는 이 (메인) 스레드에서만 합니다.
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gspbl-ai') as pool:
+        requested = {pool.submit(backend.generate, prompt): name for name, prompt in pending.items()}
+        waiting = set(requested) | set(prefetched)
+        while waiting:
+            done, waiting = wait(waiting, return_when=FIRST_COMPLETED)
+            for future in done:
+                elapsed = time.perf_counter() - started
+                if first_result is None:
+                    first_result = elapsed
+                if future in prefetched:
+                    name = prefetched[future]
+                    try:
+                        text = future.result()
+                    except Exception:
+                        # 미리 요청한 응답이 실패하면 평소처럼 다시 요청합니다.
+                        AI_PREFETCH.inc(helper=helpers[name], outcome="failed")
+                        retry = pool.submit(backend.generate, prompts[name])
+                        requested[retry] = name
+                        waiting.add(retry)
+                        continue
+                    _record_prefetch_used(helpers[name], elapsed)
+                    cache.set(keys[name], text, backend.model_name)
+                    on_result(name, text, None)
+                else:
+                    name = requested[future]
+                    try:
+                        text = future.result()
+                    except Exception as error:
+                        _record_ai_error(helpers[name], error)
+                        on_result(name, None, str(error) if isinstance(error, SchedulerError) else f"AI 응답 생성에 실패했습니다. 오류: {error}")
+                        continue
+                    # 동시 요청은 스레드 풀 대기 시간을 포함해, 교사가 실제로 기다린 시간을 기록합니다.
+                    AI_REQUEST_SECONDS.observe(elapsed, helper=helpers[name], mode="concurrent")
+                    AI_REQUESTS.inc(helper=helpers[name], outcome="ok")
+                    if helpers[name] not in VARIED_PROMPTS:
+                        cache.set(keys[name], text, backend.model_name)
+                    on_result(name, text, None)
+    st.session_state.last_ai_timing = {"mode": f"동시 {len(prefetched) + len(pending)}건", "first_token": first_result,
+                                       "total": time.perf_counter() - started}
+
+def render_ai_settings():
+    """사이드바에 AI 응답 캐시 설정과 통계를 표시합니다."""
+    with st.sidebar:
+        st.toggle("🔄 AI 제안 새로 생성하기", key="regenerate_ai", help="켜면 이전에 같은 요청으로 받은 응답을 재사용하지 않고 AI에게 새로 요청합니다.")
+        cache = get_response_cache()
+        if cache.enabled:
+            stats = cache.stats()
+            st.caption(f"AI 응답 캐시: 적중 {stats['hits']}회 · 미적중 {stats['misses']}회 · 저장 {stats['entries']}개")
+        else:
+            st.caption("AI 응답 캐시: 저장 위치에 쓸 수 없어 사용하지 않습니다.")
+        timing = st.session_state.get('last_ai_timing')
+        if timing:
+            st.caption(f"최근 AI 응답({timing['mode']}): 첫 토큰 {timing['first_token']:.2f}초 · 전체 {timing['total']:.2f}초")
+        prompt_stats = st.session_state.get('last_prompt_stats')
+        if prompt_stats:
+            st.caption(f"최근 프롬프트: 약 {prompt_stats['before']:,} → {prompt_stats['after']:,} 토큰 (예산 {prompt_stats['budget']:,})")
+        prefetcher = st.session_state.get('prefetcher')
+        if prefetcher is not None:
+            st.caption(f"AI 제안 미리 요청: 진행 중 {prefetcher.pending()}건 · 남은 횟수 {prefetcher.remaining}/{prefetcher.limit}회")
+
+def render_metrics_panel():
+    """GSPBL_METRICS_PANEL=1이면 사이드바에 이 서버 프로세스의 성능 지표 요약과 내려받기 버튼을 표시합니다."""
+    if os.environ.get('GSPBL_METRICS_PANEL') != '1':
+        return
+    with st.sidebar.expander("📊 성능 지표 (서버 전체)"):
+        rows = [
+            {"지표": name, "라벨": ", ".join(f"{k}={v}" for k, v in series["labels"].items()), "횟수": series["count"],
+             "p50(초)": series.get("p50"), "p95(초)": series.get("p95"), "p99(초)": series.get("p99")}
+            for name, metric in REGISTRY.snapshot().items() if metric["type"] == "histogram"
+            for series in metric["series"]
+        ]
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+        st.download_button("Prometheus 형식으로 받기", REGISTRY.to_prometheus(), file_name="gspbl_metrics.prom", mime="text/plain", use_container_width=True)
+        st.download_button("JSON으로 받기", REGISTRY.to_json(), file_name="gspbl_metrics.json", mime="application/json", use_container_width=True)
+
+def create_excel_download(plan=None):
+    """세션 상태 데이터를 바탕으로 엑셀 파일을 생성합니다. 내용이 같으면 이전에 만든 파일을 재사용합니다."""
+    return cached_plan_workbook(plan if plan is not None else plan_from_state(st.session_state))
+
+def create_pdf_download(plan=None):
+    """세션 상태 데이터를 바탕으로 Pretendard 글꼴을 넣은 PDF 파일을 생성합니다."""
+    # fontTools는 PDF를 처음 저장할 때 불러옵니다.
+    from pdf_export import build_plan_pdf
+
+    return build_plan_pdf(plan if plan is not None else plan_from_state(st.session_state))
+
+def create_bulk_excel_download(uploaded_files):
+    """업로드한 설계안(JSON/JSONL) 파일들을 설계안마다 시트 하나씩 담은 엑셀 파일로 만듭니다."""
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='GSPBL_수업설계안')
-        worksheet = writer.sheets['GSPBL_수업설계안']
-        worksheet.column_dimensions['A'].width = 25
-        worksheet.column_dimensions['B'].width = 80
-        for row in worksheet.iter_rows(min_row=2, min_col=2, max_col=2):
-            for cell in row:
-                cell.alignment = cell.alignment.copy(wrap_text=True, vertical='top')
-    processed_data = output.getvalue()
-    return processed_data
+    count = write_bulk_workbook(iter_plans((f.name, f) for f in uploaded_files), output)
+    return output.getvalue(), count
 
 # --- 4. 세션 상태 초기화 ---
 def initialize_session_state():
@@ -127,6 +473,77 @@ def initialize_session_state():
         if key not in st.session_state:
             st.session_state[key] = value
 
+@st.cache_resource
+def get_draft_store():
+    """모든 세션이 함께 쓰는 설계안 자동 저장소를 엽니다."""
+    return DraftStore()
+
+def resume_draft():
+    """주소의 ?draft=ID에 해당하는 설계안을 불러옵니다. 새로고침하거나 워커가 재시작되어도 작성 중인 내용이 유지됩니다."""
+    draft_id = st.query_params.get("draft")
+    if not draft_id or draft_id == st.session_state.get("draft_id"):
+        return
+    fields = get_draft_store().load(draft_id)
+    if fields is None:
+        del st.query_params["draft"]
+        st.warning(f"저장된 설계안 '{draft_id}'을(를) 찾을 수 없습니다.")
+        return
+    for key, value in fields.items():
+        st.session_state[key] = value
+    st.session_state.draft_id = draft_id
+    st.session_state.draft_snapshot = {key: snapshot_value(value) for key, value in fields.items()}
+
+def autosave_draft():
+    """마지막 저장 이후 바뀐 항목만 저장합니다. 내용을 처음 입력할 때 설계안 ID를 만들어 주소에 넣습니다."""
+    if not get_draft_store().enabled:
+        return
+    if "draft_id" not in st.session_state:
+        if not any(st.session_state.get(key) for _, key in PLAN_SECTIONS):
+            return
+        st.session_state.draft_id = new_draft_id()
+        st.session_state.draft_snapshot = {}
+    if st.query_params.get("draft") != st.session_state.draft_id:
+        st.query_params["draft"] = st.session_state.draft_id
+    saved, pending = autosave(get_draft_store(), st.session_state.draft_id, st.session_state, st.session_state.draft_snapshot, DEFAULT_MAX_BYTES)
+    st.session_state.draft_status = "failed" if saved is None else ("pending" if pending else "saved")
+
+def render_draft_status():
+    """사이드바에 자동 저장 상태와 공유용 설계안 ID를 표시합니다."""
+    if not get_draft_store().enabled:
+        st.sidebar.caption("💾 저장 위치에 쓸 수 없어 자동 저장을 사용하지 않습니다.")
+        return
+    if "draft_id" not in st.session_state:
+        return
+    with st.sidebar:
+        status = st.session_state.get("draft_status")
+        if status == "failed":
+            st.warning("💾 자동 저장에 실패했습니다. 잠시 후 다시 시도합니다.")
+        else:
+            st.caption("💾 자동 저장됨" if status == "saved" else "💾 저장 중...")
+        st.code(st.session_state.draft_id, language=None)
+        st.caption("이 주소를 즐겨찾기하거나 설계안 ID를 기록해 두면, 나중에 시작 화면에서 이어서 작성할 수 있습니다.")
+
+def render_resume_drafts():
+    """시작 화면에서 설계안 ID(또는 최근 설계안 목록)로 작성 중이던 설계안을 불러옵니다."""
+    with st.expander("📂 저장된 설계안 이어서 하기"):
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            draft_id = st.text_input("설계안 ID", key="resume_draft_id", placeholder="사이드바에 표시된 설계안 ID를 입력하세요.", label_visibility="collapsed").strip()
+        with col2:
+            if st.button("불러오기", use_container_width=True):
+                if is_draft_id(draft_id):
+                    st.query_params["draft"] = draft_id
+                    st.rerun()
+                else:
+                    st.warning("설계안 ID 형식이 올바르지 않습니다.")
+        # 여러 학교가 함께 쓰는 배포에서는 다른 선생님의 설계안이 보이지 않도록, 목록은 설정한 경우에만 보여줍니다.
+        if os.environ.get('GSPBL_DRAFTS_LIST') == '1':
+            for draft in get_draft_store().list_drafts(limit=10):
+                updated = time.strftime('%Y-%m-%d %H:%M', time.localtime(draft['updated_at']))
+                if st.button(f"{draft['title'] or '(제목 없음)'} · {draft['grade_group']} · {updated}", key=f"resume_{draft['id']}", use_container_width=True):
+                    st.query_params["draft"] = draft['id']
+                    st.rerun()
+
 # --- 5. 페이지 렌더링 함수 ---
 
 def render_start_page():
@@ -147,7 +564,7 @@ def render_start_page():
         1.  **STEP 1 (목적지 설정):** 프로젝트의 핵심 질문과 최종 결과물에 대한 아이디어를 얻고 구체화합니다.
         2.  **STEP 2 (학습 나침반 준비):** 프로젝트와 연계할 교과 성취기준과 역량을 선택합니다. **다른 과목을 선택해도 이전에 고른 성취기준은 사라지지 않고 누적됩니다.**
         3.  **STEP 3 (탐구 여정 디자인):** 학생들의 구체적인 활동, 평가, 피드백 계획을 세웁니다.
-        4.  **STEP 4 (최종 설계도 확인):** 전체 설계안을 검토하고, AI에게 종합 피드백을 받은 후 엑셀 파일로 저장합니다.
+        4.  **STEP 4 (최종 설계도 확인):** 전체 설계안을 검토하고, AI에게 종합 피드백을 받은 후 엑셀 또는 PDF 파일로 저장합니다.
 
         ---
 
@@ -166,6 +583,8 @@ def render_start_page():
         st.session_state.page = 1
         st.rerun()
 
+    render_resume_drafts()
+
 def render_step1():
     """STEP 1 페이지를 렌더링합니다."""
     st.header("🗺️ STEP 1. 최종 목적지 설정하기")
@@ -176,8 +595,7 @@ def render_step1():
         ai_keyword = st.text_input("질문 아이디어를 얻고 싶은 분야(키워드)를 입력하세요.", placeholder="예: 기후 위기, 우리 동네 문제, 재활용")
         if st.button("입력한 분야로 질문 제안받기", use_container_width=True):
             if ai_keyword:
-                prompt = f"초등학생 대상 GSPBL 프로젝트를 위한 '탐구 질문'을 생성해줘. 핵심 키워드는 '{ai_keyword}'야. 학생들이 흥미를 느끼고 깊이 탐구하고 싶게 만드는, 정답이 없는 질문 5개를 제안해줘. 번호 없이 한 줄씩만."
-                st.session_state.project_title = call_gemini(prompt)
+                st.session_state.project_title = call_gemini(question_prompt(ai_keyword))
                 st.session_state.question_analysis = "" 
                 st.rerun()
             else:
@@ -187,8 +605,7 @@ def render_step1():
     
     if st.button("현재 질문 유형 분석하기", use_container_width=True):
         if st.session_state.project_title:
-            prompt = f"다음은 초등학생 대상 프로젝트 수업의 탐구 질문이야. 이 질문이 어떤 유형(예: 문제 해결형, 원인 탐구형, 창작 표현형, 찬반 논쟁형 등)에 해당하는지 분석하고, 왜 그렇게 생각하는지 간략하게 설명해줘.\n\n질문: \"{st.session_state.project_title}\""
-            st.session_state.question_analysis = call_gemini(prompt)
+            st.session_state.question_analysis = call_gemini(question_analysis_prompt(st.session_state))
         else:
             st.warning("먼저 탐구 질문을 입력해주세요.")
     
@@ -200,12 +617,53 @@ def render_step1():
     
     if st.button("🤖 AI로 최종 산출물 제안받기", key="product_ai", use_container_width=True):
         if st.session_state.project_title:
-            prompt = (f"'{st.session_state.grade_group}' 학생들을 위한 GSPBL 프로젝트의 '최종 결과물 공개' 아이디어를 5가지 제안해줘. 이 프로젝트의 탐구 질문은 '{st.session_state.project_title}'이야. 학생들이 프로젝트 결과를 교실 밖 실제 세상과 공유할 수 있는, **'{st.session_state.grade_group}' 수준에 맞는 창의적이고 다양한 방법**을 제안해줘. 번호 없이 한 줄씩만, 매번 다른 아이디어를 보여줘.")
-            st.session_state.public_product = call_gemini(prompt)
+            st.session_state.public_product = call_gemini(public_product_prompt(st.session_state))
             st.rerun()
         else:
             st.warning("탐구 질문을 먼저 입력해주세요.")
 
+def render_recommended_standards(grade_group, subjects):
+    """탐구 질문과 최종 결과물 문장으로 학년군 전체 교과에서 관련 성취기준을 추천합니다."""
+    query = f"{st.session_state.project_title}\n{st.session_state.public_product}".strip()
+    with st.expander("🔎 탐구 질문으로 추천하는 성취기준", expanded=bool(query)):
+        if not query:
+            st.caption("STEP 1에서 탐구 질문을 입력하면 관련 성취기준을 추천해 드립니다.")
+            return
+        recommendations = load_recommender().recommend(query, grade_group, top_k=10, subjects=subjects)
+        if not recommendations:
+            st.caption("탐구 질문과 관련된 성취기준을 찾지 못했습니다.")
+            return
+        details = {label: (subject, score) for label, subject, score in recommendations}
+        st.caption("모든 교과에서 탐구 질문·최종 결과물과 비슷한 성취기준을 찾았습니다. 선택한 성취기준은 아래 목록에 누적됩니다.")
+        standards_multiselect("추천 성취기준 선택", list(details), frozenset(details), key="recommended_standards_pick", format_func=lambda s: f"[{details[s][0]}] {s} (유사도 {details[s][1]:.2f})")
+
+def render_standards_search():
+    """모든 학년군의 성취기준을 본문 단어나 코드('[4과03', '6사')로 검색합니다."""
+    with st.expander("🔍 전체 학년군 성취기준 검색"):
+        query = st.text_input("검색어", key="standards_search_query", placeholder="예: 기후 변화, [4과03, 6사 지도", label_visibility="collapsed")
+        if not query.strip():
+            st.caption("성취기준 문장의 단어나 코드 앞부분으로 모든 학년군에서 찾을 수 있습니다.")
+            return
+        results = load_search_index().search(query, top_k=20)
+        if not results:
+            st.caption(f"'{query}'에 맞는 성취기준을 찾지 못했습니다.")
+            return
+        details = {label: (grade_group, subject) for label, grade_group, subject, _ in results}
+        standards_multiselect("검색 결과 선택", list(details), frozenset(details), key="search_standards_pick", format_func=lambda s: f"[{details[s][0]} {details[s][1]}] {s}")
+
+def standards_multiselect(label, options, option_set, key, format_func=str):
+    """성취기준 multiselect를 그립니다.
+
+    선택 결과는 on_change 콜백에서 selected_standards에 바로 합쳐지므로, 같은 성취기준이 들어 있는
+    다른 목록(교과별 목록, 추천 목록)과 화면이 어긋나지 않습니다.
+    """
+    st.session_state[key] = [s for s in st.session_state.selected_standards if s in option_set]
+
+    def on_change():
+        st.session_state.selected_standards = merge_selection(st.session_state.selected_standards, option_set, st.session_state[key])
+
+    st.multiselect(label, options=options, key=key, on_change=on_change, format_func=format_func, label_visibility="collapsed")
+
 def render_step2():
     """STEP 2 페이지를 렌더링합니다."""
     st.header("🧭 STEP 2. 학습 나침반 준비하기")
@@ -223,18 +681,18 @@ def render_step2():
 
     grade_group = st.radio("학년군 선택", list(VALID_SUBJECTS.keys()), index=list(VALID_SUBJECTS.keys()).index(st.session_state.grade_group), horizontal=True, key="grade_group", on_change=on_grade_change)
     
-    standards_data = load_json_data(f"{grade_group}_성취기준.json")
-    if standards_data:
+    render_recommended_standards(grade_group, VALID_SUBJECTS[grade_group])
+    render_standards_search()
+
+    standards_by_subject = load_subject_standards(grade_group)
+    if standards_by_subject:
         subjects = VALID_SUBJECTS[grade_group]
         selected_subject = st.selectbox("과목을 선택하세요.", subjects, key='selected_subject')
         if selected_subject:
-            current_subject_standards = [f"{item['성취기준_코드']} {item['성취기준']}" for item in standards_data if item.get('교과') == selected_subject and item.get('성취기준_코드') and item.get('성취기준')]
+            current_subject_standards, current_subject_set = standards_by_subject.get(selected_subject, ((), frozenset()))
             if current_subject_standards:
                 st.write(f"**'{selected_subject}' 과목의 성취기준 목록입니다. 프로젝트에 연계할 기준을 모두 선택하세요.**")
-                default_selection = [s for s in st.session_state.selected_standards if s in current_subject_standards]
-                selected_in_current_subject = st.multiselect("성취기준 선택", options=current_subject_standards, default=default_selection, label_visibility="collapsed")
-                standards_from_other_subjects = [s for s in st.session_state.selected_standards if s not in current_subject_standards]
-                st.session_state.selected_standards = sorted(list(set(standards_from_other_subjects + selected_in_current_subject)))
+                standards_multiselect("성취기준 선택", current_subject_standards, current_subject_set, key="subject_standards_pick")
             else:
                 st.warning(f"'{selected_subject}' 과목에 대한 성취기준을 불러올 수 없습니다.")
 
@@ -278,6 +736,50 @@ def render_step2():
             if st.checkbox(comp, value=comp in st.session_state.selected_sel_competencies, key=f"sel_{comp}", help=desc)
         ]
 
+STEP3_SUGGESTIONS = {"process_assessment": "📈 과정중심 평가", "critique_revision": "🔄 비평과 개선", "reflection": "🤔 성찰"}
+
+# STEP 3 제안 항목의 입력란: 이름 -> (라벨, 예시 문구, 높이)
+STEP3_TEXT_AREAS = {
+    "process_assessment": ("과정중심 평가 계획", "예: 자기평가 체크리스트, 동료평가 루브릭, 교사 관찰일지, 포트폴리오 등", 150),
+    "critique_revision": ("피드백 계획", "예: 갤러리 워크, '두 개의 별과 하나의 소망' 피드백, 전문가 초청 피드백 등", 200),
+    "reflection": ("성찰 계획", "예: KWL 차트, 학습 일지 작성, 출구 티켓, 최종 성찰 발표회 등", 200),
+}
+
+def step3_all_prompts():
+    """'한 번에 받기'로 요청할 STEP 3 제안 프롬프트를 {항목 이름: 프롬프트}로 반환합니다."""
+    if not st.session_state.project_title:
+        st.warning("STEP 1의 탐구 질문을 먼저 입력해주세요.")
+        return {}
+    prompts = {"critique_revision": critique_prompt(st.session_state), "reflection": reflection_prompt(st.session_state)}
+    if st.session_state.sustained_inquiry:
+        prompts = {"process_assessment": assessment_prompt(st.session_state), **prompts}
+    else:
+        st.warning("지속적 탐구 계획이 없어 과정중심 평가 제안은 건너뜁니다.")
+    return prompts
+
+def step3_text_area(key, slots):
+    """STEP 3 제안 항목의 입력란을 그립니다. 제안을 기다리는 항목(slots)은 도착하면 채울 빈 자리만 만듭니다."""
+    if key in slots:
+        slots[key] = st.empty()
+        slots[key].info(f"⏳ {STEP3_SUGGESTIONS[key]} 제안을 생성하고 있어요...")
+        return
+    label, placeholder, height = STEP3_TEXT_AREAS[key]
+    st.session_state[key] = st.text_area(label, value=st.session_state[key], placeholder=placeholder, height=height, label_visibility="collapsed")
+
+def generate_step3_all(prompts, slots):
+    """평가·비평·성찰 제안을 동시에 요청하고, 도착하는 대로 해당 항목의 자리에 입력란을 채워 넣습니다."""
+    def on_result(key, text, error):
+        label, placeholder, height = STEP3_TEXT_AREAS[key]
+        with slots[key].container():
+            if error:
+                st.warning(f"{STEP3_SUGGESTIONS[key]}: {error}")
+            else:
+                st.session_state[key] = text
+                st.success(f"✅ {STEP3_SUGGESTIONS[key]} 제안이 도착했어요.")
+            st.session_state[key] = st.text_area(label, value=st.session_state[key], placeholder=placeholder, height=height, label_visibility="collapsed")
+
+    call_gemini_many(prompts, on_result)
+
 def render_step3():
     """STEP 3 페이지를 렌더링합니다."""
     st.header("🚗 STEP 3. 탐구 여정 디자인하기")
@@ -296,47 +798,25 @@ def render_step3():
         
         if st.button("선택한 활동으로 AI 과정 구체화하기"):
             if selected_tags and st.session_state.project_title:
-                context_title = st.session_state.project_title
-                context_product = st.session_state.public_product
-                context_standards = "\n".join(f"- {s}" for s in st.session_state.selected_standards)
-                context_core_comp = ", ".join(st.session_state.selected_core_competencies)
-                context_sel_comp = ", ".join(st.session_state.selected_sel_competencies)
-                context_tags = ", ".join(selected_tags)
-
-                prompt = (
-                    "당신은 초등 교육과정 설계 전문가입니다. GSPBL 모델에 기반하여 '지속적 탐구' 과정을 구체적으로 설계해주세요.\n\n"
-                    "--- 프로젝트 기본 정보 ---\n"
-                    f"**탐구 질문:** {context_title}\n"
-                    f"**최종 결과물:** {context_product}\n"
-                    f"**연계 성취기준:**\n{context_standards}\n"
-                    f"**함양할 핵심역량:** {context_core_comp}\n"
-                    f"**함양할 사회정서역량:** {context_sel_comp}\n"
-                    f"**포함할 주요 활동:** {context_tags}\n\n"
-                    "--- 요구 사항 ---\n"
-                    "1. **매우 중요:** 당신이 설계하는 모든 탐구 과정은 최종적으로 위에 명시된 **'최종 결과물'을 완성하고 공개하는 방향으로 논리적으로 이어져야 합니다.**\n"
-                    "2. 제시된 **성취기준과 학생 활동 목록의 복잡성**을 보고, 이 프로젝트가 초등학생 발달 단계 중 어느 수준(예: 저학년/중학년/고학년)에 적합한지 **스스로 판단**하여 그 수준에 맞는 구체적인 과정안을 작성해주세요.\n"
-                    "3. **답변에 학년(예: 3-4학년)을 직접적으로 언급하지 마세요.** 대신, '학생들은 ~을 할 수 있습니다' 와 같이 활동 중심으로 서술해주세요.\n"
-                    "4. 각 단계별로 예상되는 차시와 함께, 학생들이 사용할 만한 구체적인 디지털 도구를 추천해주세요.\n"
-                    "5. 전체적인 흐름이 논리적으로 연결되도록 설계해주세요."
-                )
-                
-                st.session_state.sustained_inquiry = call_gemini(prompt)
+                st.session_state.sustained_inquiry = call_gemini(sustained_inquiry_prompt(st.session_state, selected_tags))
             else:
                 st.warning("STEP 1의 탐구 질문과 주요 활동을 먼저 입력/선택해주세요.")
 
     st.session_state.sustained_inquiry = st.text_area("탐구 과정을 구체적으로 작성하거나 AI 제안을 수정하세요.", value=st.session_state.sustained_inquiry, height=300, label_visibility="collapsed")
 
+    # 한 번에 받기를 누르면 각 항목의 입력란 자리를 먼저 만들고, 페이지를 다 그린 뒤 제안이 도착하는 대로 채웁니다.
+    slots = {}
+    if st.button("⚡ 평가·비평·성찰 제안 한 번에 받기", key="step3_all_ai", use_container_width=True, help="아래 세 항목의 AI 제안을 동시에 요청합니다."):
+        prompts = step3_all_prompts()
+        slots = dict.fromkeys(prompts)
+
     st.subheader("과정중심 평가 (Process-based Assessment)")
     if st.button("🤖 AI로 평가 방법 제안받기", key="assessment_ai"):
         if st.session_state.project_title and st.session_state.sustained_inquiry:
-            prompt = (f"초등학생 대상 GSPBL 프로젝트를 위한 '과정중심 평가' 방법을 5가지 제안해줘.\n"
-                      f"프로젝트 주제: '{st.session_state.project_title}'\n"
-                      f"주요 탐구 과정:\n{st.session_state.sustained_inquiry}\n\n"
-                      f"위 내용에 가장 적합한 평가 방법을 구체적인 예시와 함께 제안해줘. 번호 없이 한 줄씩만.")
-            st.session_state.process_assessment = call_gemini(prompt)
+            st.session_state.process_assessment = call_gemini(assessment_prompt(st.session_state))
         else:
             st.warning("탐구 질문과 지속적 탐구 계획을 먼저 입력해주세요.")
-    st.session_state.process_assessment = st.text_area("과정중심 평가 계획", value=st.session_state.process_assessment, placeholder="예: 자기평가 체크리스트, 동료평가 루브릭, 교사 관찰일지, 포트폴리오 등", height=150, label_visibility="collapsed")
+    step3_text_area("process_assessment", slots)
     
     st.subheader("학생의 의사 & 선택권 (Student Voice and Choice)")
     voice_options = ["모둠 구성 방식", "자료 수집 방법", "산출물 형태 (영상, 포스터 등)", "역할 분담", "발표 방식"]
@@ -347,33 +827,28 @@ def render_step3():
         st.subheader("비평과 개선 (Critique & Revision)")
         if st.button("🤖 AI로 비평/개선 방법 제안받기", key="critique_ai", use_container_width=True):
              if st.session_state.project_title:
-                prompt = f"초등학생 대상 GSPBL 프로젝트를 위한 '비평과 개선(Critique & Revision)' 활동 아이디어를 5가지 제안해줘. 이 프로젝트의 주제는 '{st.session_state.project_title}'이고, 최종 결과물은 '{st.session_state.public_product}'이야. 학생들이 서로 의미 있는 피드백을 주고받고, 자신의 결과물을 발전시킬 수 있는 구체적이고 창의적인 방법을 제안해줘. 번호 없이 한 줄씩만."
-                st.session_state.critique_revision = call_gemini(prompt)
+                st.session_state.critique_revision = call_gemini(critique_prompt(st.session_state))
              else:
                 st.warning("STEP 1의 탐구 질문을 먼저 입력해주세요.")
-        st.session_state.critique_revision = st.text_area("피드백 계획", value=st.session_state.critique_revision, placeholder="예: 갤러리 워크, '두 개의 별과 하나의 소망' 피드백, 전문가 초청 피드백 등", height=200, label_visibility="collapsed")
+        step3_text_area("critique_revision", slots)
     with col2:
         st.subheader("성찰 (Reflection)")
         if st.button("🤖 AI로 성찰 방법 제안받기", key="reflection_ai", use_container_width=True):
             if st.session_state.project_title:
-                prompt = f"초등학생 대상 GSPBL 프로젝트를 위한 '성찰(Reflection)' 활동 아이디어를 5가지 제안해줘. 이 프로젝트의 주제는 '{st.session_state.project_title}'이야. 학생들이 프로젝트 과정 전반에 걸쳐 자신의 학습, 성장, 느낀 점을 의미 있게 돌아볼 수 있는 구체적이고 창의적인 방법을 제안해줘. 번호 없이 한 줄씩만."
-                st.session_state.reflection = call_gemini(prompt)
+                st.session_state.reflection = call_gemini(reflection_prompt(st.session_state))
             else:
                 st.warning("STEP 1의 탐구 질문을 먼저 입력해주세요.")
-        st.session_state.reflection = st.text_area("성찰 계획", value=st.session_state.reflection, placeholder="예: KWL 차트, 학습 일지 작성, 출구 티켓, 최종 성찰 발표회 등", height=200, label_visibility="collapsed")
+        step3_text_area("reflection", slots)
+
+    if slots:
+        generate_step3_all(prompts, slots)
 
 def render_step4():
     """STEP 4 페이지를 렌더링합니다."""
     st.header("✨ STEP 4. 최종 설계도 확인 및 내보내기")
-    st.info("💡 **Tip:** 완성된 설계도를 최종 검토하는 단계입니다. AI 피드백을 통해 부족한 부분을 보완하고, 엑셀 파일로 저장하여 수업에 활용하세요.")
+    st.info("💡 **Tip:** 완성된 설계도를 최종 검토하는 단계입니다. AI 피드백을 통해 부족한 부분을 보완하고, 엑셀 또는 PDF 파일로 저장하여 수업에 활용하세요.")
     
-    final_data = {
-        "🎯 탐구 질문": "project_title", "📢 최종 결과물 공개": "public_product",
-        "📚 교과 성취기준": "selected_standards", "💡 핵심역량": "selected_core_competencies",
-        "🌱 사회정서 역량": "selected_sel_competencies", "🧭 지속적 탐구": "sustained_inquiry",
-        "📈 과정중심 평가": "process_assessment", "🗣️ 학생의 의사 & 선택권": "student_voice_choice",
-        "🔄 비평과 개선": "critique_revision", "🤔 성찰": "reflection"
-    }
+    final_data = dict(PLAN_SECTIONS)
     
     for title, key in final_data.items():
         with st.container(border=True):
@@ -395,14 +870,7 @@ def render_step4():
     st.markdown("---")
     with st.expander("🤖 AI에게 수업 설계안 종합 피드백 받기"):
         if st.button("피드백 요청하기", use_container_width=True):
-            full_plan = ""
-            for title, key in final_data.items():
-                content = st.session_state.get(key, "")
-                content_str = "\n".join(f"• {c}" for c in content) if isinstance(content, list) else content
-                full_plan += f"### {title}\n{content_str}\n\n"
-            
-            prompt = (f"당신은 GSPBL(Gold Standard Project Based Learning) 전문가입니다.\n다음은 한 초등학교 선생님이 작성한 프로젝트 수업 설계안입니다.\nGSPBL의 7가지 필수 요소와 과정중심 평가, 핵심역량, 사회정서 역량 함양 계획이 잘 반영되었는지 분석해주세요.\n각 요소별로 강점과 함께, 더 발전시키면 좋을 보완점을 구체적인 예시를 들어 친절하게 컨설팅해주세요.\n\n--- 설계안 내용 ---\n{full_plan}")
-            st.session_state.ai_feedback = call_gemini(prompt)
+            st.session_state.ai_feedback = call_gemini(feedback_prompt(st.session_state))
             
         if st.session_state.ai_feedback:
             st.markdown(st.session_state.ai_feedback)
@@ -410,26 +878,120 @@ def render_step4():
     st.subheader("📋 수업 설계안 저장")
     st.markdown("---")
     
-    excel_data = create_excel_download()
+    # 엑셀 파일은 다운로드 버튼을 누를 때만 만들고, 같은 내용이면 캐시된 파일을 사용합니다.
+    plan = plan_from_state(st.session_state)
     
     st.download_button(
         label="📥 수업 설계안 엑셀(Excel) 파일로 저장하기",
-        data=excel_data,
+        data=lambda: create_excel_download(plan),
         file_name=f"GSPBL_수업설계안.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         use_container_width=True,
         type="primary"
     )
+    st.download_button(
+        label="📄 수업 설계안 PDF 파일로 저장하기",
+        data=lambda: create_pdf_download(plan),
+        file_name=f"GSPBL_수업설계안.pdf",
+        mime="application/pdf",
+        use_container_width=True
+    )
+
+    with st.expander("📚 여러 설계안을 하나의 엑셀 파일로 묶기"):
+        st.caption("설계안을 JSON 파일로 저장해 모아두면, 여러 설계안을 설계안마다 시트 하나씩 담은 엑셀 파일로 한 번에 내보낼 수 있습니다.")
+        st.download_button(
+            label="💾 현재 설계안을 JSON 파일로 저장하기",
+            data=lambda: json.dumps(plan, ensure_ascii=False, indent=2),
+            file_name="GSPBL_수업설계안.json",
+            mime="application/json",
+            use_container_width=True
+        )
+        uploaded_files = st.file_uploader("설계안 파일 선택 (JSON 또는 JSONL)", type=["json", "jsonl"], accept_multiple_files=True)
+        if uploaded_files and st.button("통합 엑셀 파일 만들기", use_container_width=True):
+            try:
+                bulk_data, count = create_bulk_excel_download(uploaded_files)
+            except (ValueError, UnicodeDecodeError) as e:
+                st.error(f"설계안 파일을 읽는 중 오류가 발생했습니다: {e}")
+            else:
+                st.download_button(
+                    label=f"📥 설계안 {count}개 통합 엑셀 파일 받기",
+                    data=bulk_data,
+                    file_name="GSPBL_설계안_모음.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    use_container_width=True
+                )
 
 # --- 6. 메인 앱 로직 ---
+# 앱 모듈의 로거 (프롬프트 크기, 캐시·저장소 경고, 지표 기록 등)
+APP_LOGGERS = (__name__, "prompt_builder", "llm_cache", "draft_store", "gspbl.metrics")
+
+@st.cache_resource
+def configure_logging():
+    """앱 모듈의 로그를 GSPBL_LOG_LEVEL(기본값 INFO) 수준부터 표준 오류로 출력합니다. Streamlit과 다른 라이브러리의 로그 설정은 바꾸지 않습니다."""
+    level = os.environ.get('GSPBL_LOG_LEVEL', 'INFO').upper()
+    handler = logging.StreamHandler()
+    handler.set_name("gspbl")
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    for name in APP_LOGGERS:
+        logger = logging.getLogger(name)
+        logger.setLevel(level)
+        # 캐시를 비운 뒤 다시 호출되어도 같은 메시지를 두 번 출력하지 않습니다.
+        if not any(h.get_name() == "gspbl" for h in logger.handlers):
+            logger.addHandler(handler)
+        logger.propagate = False
+    return level
+
+@st.cache_resource
+def start_metrics_exporters():
+    """환경 변수에 따라 지표 기록 파일(GSPBL_METRICS_LOG)과 Prometheus 엔드포인트(GSPBL_METRICS_PORT)를 프로세스당 한 번 켭니다."""
+    log_path = os.environ.get('GSPBL_METRICS_LOG')
+    if log_path:
+        configure_event_log(log_path)
+    port = os.environ.get('GSPBL_METRICS_PORT')
+    if port:
+        try:
+            return start_http_exporter(int(port))
+        except OSError as e:
+            # 같은 포트를 이미 다른 워커 프로세스가 쓰고 있어도 앱은 계속 동작해야 합니다.
+            logging.getLogger(__name__).warning("지표 엔드포인트를 열 수 없습니다 (포트 %s): %s", port, e)
+    return None
+
+@st.cache_resource
+def get_rerun_profiler():
+    """GSPBL_PROFILE_SLOW_MS가 설정되어 있으면 느린 재실행을 저장하는 프로파일러를 만듭니다."""
+    return SlowRerunProfiler.from_env()
+
+def page_label(page):
+    return "start" if page == 0 else f"step{page}"
+
+@contextlib.contextmanager
+def instrument_rerun():
+    """재실행 한 번 전체 시간을 기록하고, 프로파일러가 켜져 있으면 느린 재실행의 cProfile 결과를 저장합니다."""
+    configure_logging()
+    start_metrics_exporters()
+    profiler = get_rerun_profiler()
+    label = page_label(st.session_state.get("page", 0))
+    with RERUN_SECONDS.time(), (profiler.profile(label) if profiler else contextlib.nullcontext()):
+        yield
+
 def main():
     """메인 애플리케이션 로직을 실행합니다."""
     initialize_session_state()
+    resume_draft()
     
     page_functions = {0: render_start_page, 1: render_step1, 2: render_step2, 3: render_step3, 4: render_step4}
     
     # 현재 페이지에 맞는 함수 호출
-    page_functions[st.session_state.page]()
+    page = st.session_state.page
+    with PAGE_RENDER_SECONDS.time(page=page_label(page)):
+        page_functions[page]()
+    discard_stale_prefetches()
+
+    if st.session_state.page > 0:
+        autosave_draft()
+        render_draft_status()
+        render_ai_settings()
+        render_metrics_panel()
     
     # 네비게이션 버튼
     if st.session_state.page > 0:
@@ -438,9 +1000,10 @@ def main():
         nav_cols = st.columns([1.5, 2.5, 1.8, 1.2, 1.2, 1.2]) 
         with nav_cols[0]:
             if st.button("🏠 처음으로", use_container_width=True):
-                # 세션 상태 초기화 후 재실행
+                # 세션 상태 초기화 후 재실행 (작성하던 설계안은 저장소에 남아 ID로 다시 불러올 수 있습니다)
                 for key in list(st.session_state.keys()):
                     del st.session_state[key]
+                st.query_params.clear()
                 st.rerun()
         with nav_cols[1]:
             # 제작자 정보
@@ -454,16 +1017,19 @@ def main():
             if st.session_state.page < 4:
                 if st.button("➡️ 다음 단계", use_container_width=True):
                     st.session_state.page += 1
+                    prefetch_step3()
                     st.rerun()
         with nav_cols[5]:
             if st.session_state.page == 4:
                 if st.button("🎉 새 설계", use_container_width=True, type="primary"):
                     for key in list(st.session_state.keys()):
                         del st.session_state[key]
+                    st.query_params.clear()
                     st.rerun()
     else:
         # 시작 페이지 하단 고정 푸터
         st.markdown("""<style>.footer {position: fixed; left: 0; bottom: 0; width: 100%; background-color: transparent; color: #808080; text-align: center; padding: 10px; font-size: 16px;}</style><div class="footer"><p>서울가동초 백인규</p></div>""", unsafe_allow_html=True)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with instrument_rerun():
+        main()
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""새 프로세스에서 앱을 처음 실행할 때의 import 시간과 첫 화면(시작 페이지) 렌더링 시간을 측정합니다.
+
+실행마다 새 파이썬 프로세스를 -X importtime으로 띄워 AppTest로 시작 페이지를 한 번 그리고,
+무거운 의존성(pandas, google.generativeai, numpy, openpyxl, fontTools)의 import 시간과 시작 페이지에서 실제로 불러왔는지를 기록합니다.
+
+--baseline에 git 리비전을 주면 그 리비전의 파일을 임시 폴더에 풀어 같은 조건으로 번갈아 측정하고,
+기준(이전)과 현재 값, 그리고 비율(현재/기준)을 나란히 표시합니다. 시간은 컴퓨터마다 다르므로 비율로 비교하세요.
+
+사용법:
+    python benchmarks/bench_cold_start.py --runs 5
+    python benchmarks/bench_cold_start.py --runs 5 --baseline 361bf12^
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+import unicodedata
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("google.generativeai", "pandas", "numpy", "openpyxl", "fontTools")
+
+CHILD = r"""
+import json, os, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_ready = time.perf_counter()
+at = AppTest.from_file(os.path.join(sys.argv[1], 'app.py'), default_timeout=60)
+at.run()
+first_render = time.perf_counter()
+at.run()
+rerun = time.perf_counter()
+print(json.dumps({
+    "streamlit_import_s": streamlit_ready - started,
+    "first_render_s": first_render - streamlit_ready,
+    "rerun_s": rerun - first_render,
+    "loaded": [name for name in sys.argv[2:] if name in sys.modules],
+    "error": bool(at.exception),
+}))
+"""
+
+
+def parse_importtime(stderr, names):
+    """-X importtime 출력에서 모듈별 누적 import 시간(초)을 찾습니다. 처음 import한 위치의 값만 씁니다."""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        if name in names and name not in cumulative:
+            cumulative[name] = int(parts[1]) / 1e6
+    return cumulative
+
+
+def run_once(root=ROOT):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    env.pop('GEMINI_API_KEY', None)
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD, root, *HEAVY_MODULES],
+                          cwd=root, env=env, capture_output=True, text=True, timeout=300)
+    wall = time.perf_counter() - started
+    result_line = next((line for line in reversed(proc.stdout.splitlines()) if line.startswith('{')), None)
+    if proc.returncode != 0 or result_line is None:
+        raise RuntimeError(f"측정 프로세스가 실패했습니다:\n{proc.stderr[-2000:]}")
+    result = json.loads(result_line)
+    result["process_s"] = wall
+    result["imports"] = parse_importtime(proc.stderr, HEAVY_MODULES)
+    return result
+
+
+def extract_revision(revision, target):
+    """git 리비전의 파일을 target 폴더에 풉니다."""
+    archive = subprocess.run(['git', 'archive', '--format=tar', revision], cwd=ROOT, capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(target)
+
+
+def summarize(runs):
+    """측정 결과의 중앙값(ms)을 {항목: 값}으로 모읍니다. 불러오지 않은 모듈은 None입니다."""
+    def median_ms(values):
+        return statistics.median(values) * 1000 if values else None
+
+    summary = {
+        "프로세스 전체": median_ms([r['process_s'] for r in runs]),
+        "streamlit import": median_ms([r['streamlit_import_s'] for r in runs]),
+        "첫 화면 렌더링": median_ms([r['first_render_s'] for r in runs]),
+        "두 번째 재실행": median_ms([r['rerun_s'] for r in runs]),
+    }
+    for name in HEAVY_MODULES:
+        loaded = any(name in r["loaded"] for r in runs)
+        summary[name] = median_ms([r["imports"][name] for r in runs if name in r["imports"]]) if loaded else None
+    return summary
+
+
+def format_ms(value):
+    return f"{value:8.1f} ms" if value is not None else "        -   "
+
+
+def pad(text, width):
+    """한글처럼 두 칸을 차지하는 글자를 고려해 text를 width칸에 맞춥니다."""
+    used = sum(2 if unicodedata.east_asian_width(c) in 'WF' else 1 for c in text)
+    return text + ' ' * max(width - used, 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help="새 프로세스로 측정하는 횟수")
+    parser.add_argument('--baseline', default=None, help="함께 측정해 비교할 git 리비전 (예: 361bf12^)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='gspbl-baseline-') as baseline_root:
+        if args.baseline:
+            extract_revision(args.baseline, baseline_root)
+        current, baseline = [], []
+        # 기준과 현재를 번갈아 측정해 측정 중 컴퓨터 상태 변화가 한쪽에만 반영되지 않게 합니다.
+        for _ in range(args.runs):
+            if args.baseline:
+                baseline.append(run_once(baseline_root))
+            current.append(run_once())
+    if any(run["error"] for run in current + baseline):
+        print("⚠️ 시작 페이지 렌더링 중 예외가 발생했습니다.")
+
+    summary = summarize(current)
+    rows = list(summary)
+    print(f"새 프로세스 {args.runs}회 (중앙값, 첫 화면 렌더링은 app.py import 포함, 모듈 '-'는 시작 페이지에서 불러오지 않음)")
+    if not args.baseline:
+        for name in rows:
+            print(f"  {pad(name, 20)} : {format_ms(summary[name])}")
+        return
+    before = summarize(baseline)
+    print(f"  {pad('', 20)}   기준: {args.baseline}")
+    print(f"  {pad('', 20)}   {pad('기준', 11)}   {pad('현재', 11)}   현재/기준")
+    for name in rows:
+        ratio = f"{summary[name] / before[name]:6.2f}" if summary[name] is not None and before[name] else "     -"
+        print(f"  {pad(name, 20)} : {format_ms(before[name])}   {format_ms(summary[name])}   {ratio}")
+
+
+if __name__ == "__main__":
+    main()
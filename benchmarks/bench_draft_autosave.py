@@ -0,0 +1,73 @@
+"""설계안 자동 저장(draft_store)의 재실행(rerun)당 비용을 측정하는 벤치마크입니다.
+
+AI가 채운 긴 항목이 들어 있는 설계안으로, 매 재실행마다 전체 상태를 JSON으로 직렬화해 저장하는 방식과
+바뀐 항목만 저장하는 방식을 비교합니다.
+
+사용법:
+    python benchmarks/bench_draft_autosave.py --reruns 200
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from draft_store import DRAFT_KEYS, DraftStore, autosave, new_draft_id  # noqa: E402
+
+
+def make_state():
+    """STEP 3까지 AI 제안으로 채운 설계안과 비슷한 크기의 상태를 만듭니다."""
+    long_text = "학생들은 모둠별로 자료를 조사하고 결과를 정리하여 발표합니다. " * 60
+    return {
+        "project_title": "우리 동네 소음을 줄이려면 어떻게 해야 할까?", "public_product": "학부모 초청 캠페인 발표회",
+        "selected_standards": [f"[4과{i:02d}-01] 여러 가지 물질을 통하여 소리가 전달되는 것을 관찰한다." for i in range(20)],
+        "selected_core_competencies": ["공동체 역량", "협력적 소통 역량"], "selected_sel_competencies": ["관계 기술 역량"],
+        "sustained_inquiry": long_text, "process_assessment": long_text, "student_voice_choice": [],
+        "critique_revision": long_text, "reflection": long_text, "grade_group": "3-4학년군",
+        "ai_feedback": long_text * 2, "question_analysis": long_text[:300], "page": 3,
+    }
+
+
+def save_full(store, draft_id, state):
+    """비교용: 전체 상태를 매번 직렬화해 모든 항목을 다시 씁니다."""
+    return store.save(draft_id, {key: state[key] for key in DRAFT_KEYS}, max_bytes=float('inf'))
+
+
+def measure(fn, reruns):
+    start = time.perf_counter()
+    for i in range(reruns):
+        fn(i)
+    return (time.perf_counter() - start) / reruns
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reruns', type=int, default=200, help="측정할 재실행 횟수")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = DraftStore(os.path.join(tmp, 'drafts.sqlite3'))
+        state = make_state()
+        size = len(json.dumps(state, ensure_ascii=False).encode('utf-8'))
+        full_id, incremental_id = new_draft_id(), new_draft_id()
+        snapshot = {}
+        autosave(store, incremental_id, state, snapshot)
+
+        def edit(i):
+            state['reflection'] = f"성찰 일지 {i}"
+
+        full = measure(lambda i: (edit(i), save_full(store, full_id, state)), args.reruns)
+        noop = measure(lambda i: autosave(store, incremental_id, state, snapshot), args.reruns)
+        one_field = measure(lambda i: (edit(i), autosave(store, incremental_id, state, snapshot)), args.reruns)
+
+    print(f"설계안 상태 {size / 1024:.1f} KiB, 재실행 {args.reruns}회 평균")
+    print(f"  전체 상태 직렬화 + 저장        : {full * 1e3:8.3f} ms")
+    print(f"  바뀐 항목만 저장 (1개 변경)    : {one_field * 1e3:8.3f} ms")
+    print(f"  바뀐 항목만 저장 (변경 없음)   : {noop * 1e3:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
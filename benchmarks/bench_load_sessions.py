@@ -0,0 +1,318 @@
+"""여러 교사가 동시에 STEP 1~4를 진행하는 상황을 Streamlit AppTest로 재현하는 부하 테스트입니다.
+
+Gemini 대신 지연 시간과 실패율을 조절할 수 있는 가짜 모델(GSPBL_LLM_BACKEND=fake)을 쓰므로 네트워크 없이 실행됩니다.
+AppTest는 한 프로세스에서 여러 세션을 동시에 실행하도록 만들어지지 않았으므로, 세션마다 프로세스 하나가 공개 AppTest API로 앱을 진행합니다.
+각 프로세스는 스크립트 컴파일, 모듈 import, 색인·추천기 생성을 예열 세션으로 미리 끝낸 뒤, 모든 세션이 동시에 측정을 시작합니다.
+AI 응답 캐시(SQLite)는 모든 세션이 함께 쓰고, AI 스케줄러는 프로세스마다 따로 둡니다.
+
+측정 항목:
+- 재실행(rerun) 지연 백분위수(p50/p95/p99)와 단계별 p95, 처리량(재실행/초)
+- 세션 프로세스의 최대 RSS와 예열 후 세션 하나를 진행하며 늘어난 RSS
+- create_excel_download(새로 만들 때/캐시), load_json_data(처음 읽을 때/캐시)의 호출당 비용
+
+--save-baseline으로 결과를 benchmarks/baselines/bench_load_sessions.json에 저장하고,
+이후 실행에서는 같은 조건의 기준값보다 --tolerance 비율 이상 나빠진 항목을 표시하고 종료 코드 1을 반환합니다.
+시간 기준값은 측정한 컴퓨터에 따라 다르므로 기준값 파일은 저장소에 올리지 않고(.gitignore) 같은 컴퓨터에서만 비교합니다.
+
+사용법:
+    python benchmarks/bench_load_sessions.py --sessions 8 --latency 0.2 --failure-rate 0.1
+    python benchmarks/bench_load_sessions.py --sessions 8 --save-baseline
+"""
+import argparse
+import atexit
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+APP_PATH = os.path.join(ROOT, 'app.py')
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baselines', 'bench_load_sessions.json')
+# 기준값과 비교하는 항목과 방향 (True: 클수록 좋음)
+COMPARED = {
+    "rerun_p95_ms": False, "throughput_reruns_per_s": True, "rss_per_session_mb": False,
+    "excel_cold_ms": False, "json_load_warm_ms": False,
+}
+KEYWORDS = ["기후 위기", "우리 동네 문제", "재활용", "급식실 소음", "학교 숲", "전통 시장", "물 절약", "안전한 등굣길"]
+INQUIRY_TAGS = ["질문 만들기", "실태 조사 (설문, 관찰)", "해결 방안 탐색"]
+
+
+def _button(at, label=None, key=None):
+    if key is not None:
+        return at.button(key=key)
+    return next(b for b in at.button if b.label == label)
+
+
+def teacher_steps(number):
+    """교사 한 명이 시작 화면부터 STEP 4 피드백까지 진행하는 (단계 이름, 동작) 목록입니다."""
+    keyword = f"{KEYWORDS[number % len(KEYWORDS)]} {number}"
+
+    def ask_question(at):
+        at.text_input[0].set_value(keyword)
+        _button(at, "입력한 분야로 질문 제안받기").click()
+
+    def pick_standard(at):
+        picker = at.multiselect(key="subject_standards_pick")
+        picker.select(picker.options[number % len(picker.options)])
+
+    def plan_inquiry(at):
+        tags = next(m for m in at.multiselect if m.label.startswith("주요 활동"))
+        for tag in INQUIRY_TAGS:
+            tags.select(tag)
+        _button(at, "선택한 활동으로 AI 과정 구체화하기").click()
+
+    return [
+        ("start", lambda at: None),
+        ("step1_open", lambda at: _button(at, "➕ 새 프로젝트 설계 시작하기").click()),
+        ("step1_question_ai", ask_question),
+        ("step1_product_ai", lambda at: _button(at, key="product_ai").click()),
+        ("step2_open", lambda at: _button(at, "➡️ 다음 단계").click()),
+        ("step2_pick", pick_standard),
+        ("step3_open", lambda at: _button(at, "➡️ 다음 단계").click()),
+        ("step3_inquiry_ai", plan_inquiry),
+        ("step3_all_ai", lambda at: _button(at, key="step3_all_ai").click()),
+        ("step4_open", lambda at: _button(at, "➡️ 다음 단계").click()),
+        ("step4_feedback_ai", lambda at: _button(at, "피드백 요청하기").click()),
+    ]
+
+
+def run_teacher(number, timeout, samples, errors):
+    """세션 하나를 끝까지 진행하며 재실행마다 (단계, 초)를 samples에 추가합니다. 진행한 AppTest를 반환합니다."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    for step, action in teacher_steps(number):
+        try:
+            action(at)
+            started = time.perf_counter()
+            at.run()
+            samples.append((step, time.perf_counter() - started))
+        except Exception:
+            errors.append(f"세션 {number} {step}: {traceback.format_exc().strip().splitlines()[-1]}")
+            return at
+        if at.exception:
+            errors.append(f"세션 {number} {step}: {at.exception[0].message}")
+            return at
+    return at
+
+
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10  # macOS는 바이트, Linux는 KiB
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else float('nan')
+
+
+def worker(number, timeout):
+    """세션 프로세스: 예열 세션을 진행한 뒤 'ready'를 출력하고, 표준 입력으로 시작 신호를 받으면 측정 세션을 진행합니다.
+
+    결과는 마지막 줄에 JSON으로 출력합니다.
+    """
+    os.chdir(ROOT)
+    warmup_errors = []
+    # 예열 세션은 측정 세션과 다른 키워드를 써서 측정 세션이 예열 응답을 캐시에서 받지 않게 합니다.
+    run_teacher(number + 1000, timeout, [], warmup_errors)
+    print("ready", flush=True)
+    sys.stdin.readline()
+    rss_before = current_rss_mb()
+    samples, errors = [], []
+    at = run_teacher(number, timeout, samples, errors)
+    print(json.dumps({
+        "samples": samples, "errors": warmup_errors + errors, "rss_delta_mb": current_rss_mb() - rss_before, "peak_rss_mb": peak_rss_mb(),
+    }, ensure_ascii=False), flush=True)
+    del at
+
+
+def run_sessions(sessions, timeout):
+    """세션 프로세스를 띄워 모두 예열을 마치면 동시에 시작시키고, 모든 결과와 측정에 걸린 시간을 반환합니다."""
+    procs = [subprocess.Popen([sys.executable, os.path.abspath(__file__), '--worker', str(i), '--timeout', str(timeout)],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, encoding='utf-8') for i in range(sessions)]
+    try:
+        for proc in procs:
+            # Streamlit 경고 등 다른 출력은 건너뛰고 예열 완료 신호를 기다립니다.
+            for line in proc.stdout:
+                if line.strip() == "ready":
+                    break
+            else:
+                raise RuntimeError(f"세션 프로세스가 예열 중에 종료되었습니다 (종료 코드 {proc.wait()}).")
+        started = time.perf_counter()
+        for proc in procs:
+            proc.stdin.write("go\n")
+            proc.stdin.flush()
+        outputs = [proc.communicate()[0] for proc in procs]
+        elapsed = time.perf_counter() - started
+    finally:
+        for proc in procs:
+            if proc.poll() is None:
+                proc.kill()
+    results = []
+    for number, output in enumerate(outputs):
+        line = next((line for line in reversed(output.splitlines()) if line.startswith('{')), None)
+        if line is None:
+            results.append({"samples": [], "errors": [f"세션 {number}: 결과를 출력하지 못했습니다."], "rss_delta_mb": 0.0, "peak_rss_mb": 0.0})
+        else:
+            results.append(json.loads(line))
+    return results, elapsed
+
+
+def median_ms(fn, repeat):
+    timings = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        fn(i)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def measure_helpers(repeat):
+    """앱 모듈을 bare 모드로 불러와 엑셀 생성과 JSON 로드 비용을 따로 측정합니다."""
+    import app
+    from excel_export import plan_from_state
+    from standards_index import GRADE_GROUPS
+
+    long_text = "학생들은 모둠별로 자료를 조사하고 결과를 정리하여 발표합니다. " * 40
+    state = {
+        "project_title": "우리 동네 소음을 줄이려면 어떻게 해야 할까?", "public_product": "학부모 초청 캠페인 발표회",
+        "selected_standards": [f"[4과{i:02d}-01] 여러 가지 물질을 통하여 소리가 전달되는 것을 관찰한다." for i in range(10)],
+        "selected_core_competencies": ["공동체 역량"], "selected_sel_competencies": ["관계 기술 역량"],
+        "sustained_inquiry": long_text, "student_voice_choice": ["역할 분담"], "process_assessment": long_text,
+        "critique_revision": long_text, "reflection": long_text,
+    }
+    plan = plan_from_state(state)
+    files = [f"{group}_성취기준.json" for group in GRADE_GROUPS]
+
+    def load_cold(i):
+        app.load_json_data.clear()
+        for name in files:
+            app.load_json_data(name)
+
+    # 내용이 매번 다른 설계안은 새로 만들고, 같은 설계안은 캐시된 파일을 씁니다.
+    results = {
+        "excel_cold_ms": median_ms(lambda i: app.create_excel_download({**plan, "project_title": f"{plan['project_title']} {i}"}), repeat),
+        "excel_cached_ms": median_ms(lambda i: app.create_excel_download(plan), repeat),
+        "json_load_cold_ms": median_ms(load_cold, repeat),
+    }
+    results["json_load_warm_ms"] = median_ms(lambda i: [app.load_json_data(name) for name in files], repeat)
+    return results
+
+
+def summarize(workers, elapsed):
+    samples = [sample for result in workers for sample in result["samples"]]
+    errors = [error for result in workers for error in result["errors"]]
+    sessions = len(workers)
+    latencies = [seconds for _, seconds in samples]
+    by_step = {}
+    for step, seconds in samples:
+        by_step.setdefault(step, []).append(seconds)
+    return {
+        "sessions": sessions, "reruns": len(samples), "errors": len(errors), "elapsed_s": round(elapsed, 3),
+        "rerun_p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+        "rerun_p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "rerun_p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "throughput_reruns_per_s": round(len(samples) / elapsed, 2),
+        "peak_rss_mb": round(max(result["peak_rss_mb"] for result in workers), 1),
+        "rss_per_session_mb": round(statistics.median(result["rss_delta_mb"] for result in workers), 2),
+        "step_p95_ms": {step: round(percentile(values, 0.95) * 1000, 1) for step, values in by_step.items()},
+    }
+
+
+def compare(results, baseline, tolerance):
+    """기준값보다 tolerance 비율 이상 나빠진 항목 목록을 반환합니다."""
+    regressions = []
+    for name, higher_is_better in COMPARED.items():
+        if name not in baseline or not baseline[name]:
+            continue
+        change = (results[name] - baseline[name]) / baseline[name]
+        worse = -change if higher_is_better else change
+        if worse > tolerance:
+            regressions.append(f"{name}: {baseline[name]} → {results[name]} ({change:+.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=8, help="동시에 진행하는 교사(세션) 수")
+    parser.add_argument('--latency', type=float, default=0.2, help="가짜 모델 응답 하나에 걸리는 시간(초)")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="가짜 모델 요청이 실패할 확률(0~1)")
+    parser.add_argument('--ai-rate', type=float, default=50.0, help="AI 스케줄러의 초당 요청 수 상한 (GSPBL_AI_RATE)")
+    parser.add_argument('--timeout', type=float, default=120.0, help="재실행 하나의 최대 시간(초)")
+    parser.add_argument('--repeat', type=int, default=20, help="엑셀·JSON 비용 측정 반복 횟수")
+    parser.add_argument('--save-baseline', action='store_true', help="이번 결과를 기준값으로 저장")
+    parser.add_argument('--tolerance', type=float, default=0.3, help="기준값 대비 허용하는 악화 비율")
+    parser.add_argument('--worker', type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.worker is not None:
+        worker(args.worker, args.timeout)
+        return
+
+    workdir = tempfile.mkdtemp(prefix='gspbl-load-')
+    atexit.register(shutil.rmtree, workdir, True)
+    os.environ.update({
+        'GSPBL_LLM_BACKEND': 'fake', 'GSPBL_FAKE_LATENCY': str(args.latency), 'GSPBL_FAKE_FAILURE_RATE': str(args.failure_rate),
+        'GSPBL_AI_RATE': str(args.ai_rate), 'GSPBL_AI_BURST': str(max(1, int(args.ai_rate))),
+        'GSPBL_CACHE_PATH': os.path.join(workdir, 'llm_cache.sqlite3'), 'GSPBL_DRAFTS_PATH': os.path.join(workdir, 'drafts.sqlite3'),
+    })
+    os.chdir(ROOT)
+
+    workers, elapsed = run_sessions(args.sessions, args.timeout)
+    errors = [error for result in workers for error in result["errors"]]
+    results = summarize(workers, elapsed)
+    results.update({name: round(value, 3) for name, value in measure_helpers(args.repeat).items()})
+
+    print(f"세션 {results['sessions']}개 · 재실행 {results['reruns']}회 · 실패 {results['errors']}건 · {results['elapsed_s']:.1f}초")
+    print(f"재실행 지연: p50 {results['rerun_p50_ms']}ms · p95 {results['rerun_p95_ms']}ms · p99 {results['rerun_p99_ms']}ms")
+    print(f"처리량: {results['throughput_reruns_per_s']} 재실행/초")
+    print(f"메모리: 세션 프로세스 최대 RSS {results['peak_rss_mb']}MB · 세션 하나를 진행하며 늘어난 RSS(중앙값) {results['rss_per_session_mb']}MB")
+    print("단계별 p95(ms): " + ", ".join(f"{step} {ms}" for step, ms in results['step_p95_ms'].items()))
+    print(f"create_excel_download: 새로 만들 때 {results['excel_cold_ms']:.2f}ms · 캐시 {results['excel_cached_ms']:.3f}ms")
+    print(f"load_json_data(학년군 3개): 처음 {results['json_load_cold_ms']:.2f}ms · 캐시 {results['json_load_warm_ms']:.2f}ms")
+    for error in errors[:5]:
+        print(f"  ⚠️ {error}")
+
+    scenario = f"sessions={args.sessions},latency={args.latency},failure_rate={args.failure_rate},ai_rate={args.ai_rate}"
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding='utf-8') as f:
+            baselines = json.load(f)
+    if args.save_baseline:
+        baselines[scenario] = results
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"기준값을 저장했습니다: {scenario}")
+    elif scenario in baselines:
+        regressions = compare(results, baselines[scenario], args.tolerance)
+        if regressions:
+            print("기준값보다 나빠진 항목:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("기준값 대비 악화된 항목이 없습니다.")
+    else:
+        print("같은 조건의 기준값이 없습니다. --save-baseline으로 저장할 수 있습니다.")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""설계안 PDF 생성 시간과 파일 크기를 측정하는 벤치마크입니다.
+
+실제 성취기준 문장으로 합성한 설계안을 여러 개 만들어, 글꼴 로드(프로세스당 1회), 문서별 생성 시간
+(부분 글꼴을 새로 만드는 경우 / 캐시를 쓰는 경우)과 결과 파일 크기를 전체 글꼴을 넣었을 때와 비교합니다.
+
+사용법:
+    python benchmarks/bench_pdf_export.py --documents 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_export  # noqa: E402
+from standards_index import GRADE_GROUPS, open_index  # noqa: E402
+
+
+def make_plans(n, seed=0):
+    """성취기준 문장을 섞어 내용이 서로 다른 설계안을 만듭니다."""
+    rng = random.Random(seed)
+    index = open_index()
+    texts = [item['성취기준'] for group in GRADE_GROUPS for item in index.records(group)]
+    codes = [f"{item['성취기준_코드']} {item['성취기준']}" for group in GRADE_GROUPS for item in index.records(group)]
+    plans = []
+    for _ in range(n):
+        plans.append({
+            "project_title": rng.choice(texts),
+            "public_product": " ".join(rng.sample(texts, 2)),
+            "selected_standards": rng.sample(codes, rng.randint(3, 12)),
+            "selected_core_competencies": ["자기관리 역량", "협력적 소통 역량"],
+            "selected_sel_competencies": ["관계 기술 역량"],
+            "sustained_inquiry": "\n".join(f"{i}차시: {rng.choice(texts)}" for i in range(1, rng.randint(6, 20))),
+            "process_assessment": "\n".join(rng.sample(texts, 5)),
+            "student_voice_choice": ["모둠 구성 방식", "발표 방식"],
+            "critique_revision": "\n".join(rng.sample(texts, 5)),
+            "reflection": "\n".join(rng.sample(texts, 5)),
+        })
+    return plans
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--documents', type=int, default=20, help="생성할 설계안 수")
+    args = parser.parse_args(argv)
+    plans = make_plans(args.documents)
+
+    started = time.perf_counter()
+    info = pdf_export.load_font()
+    font_load = time.perf_counter() - started
+
+    cold, warm, sizes = [], [], []
+    for plan in plans:
+        started = time.perf_counter()
+        data = pdf_export.build_plan_pdf(plan)
+        cold.append(time.perf_counter() - started)
+        sizes.append(len(data))
+        started = time.perf_counter()
+        pdf_export.build_plan_pdf(plan)
+        warm.append(time.perf_counter() - started)
+
+    full_font = len(zlib.compress(info.data, 6))
+    print(f"설계안 {len(plans)}개")
+    print(f"  글꼴 로드 (프로세스당 1회)       : {font_load * 1e3:8.1f} ms")
+    print(f"  문서 생성 - 부분 글꼴 새로 생성  : 중앙값 {statistics.median(cold) * 1e3:6.1f} ms, 최대 {max(cold) * 1e3:6.1f} ms")
+    print(f"  문서 생성 - 부분 글꼴 캐시 사용  : 중앙값 {statistics.median(warm) * 1e3:6.1f} ms, 최대 {max(warm) * 1e3:6.1f} ms")
+    print(f"  PDF 크기                         : 중앙값 {statistics.median(sizes) / 1024:6.1f} KB, 최대 {max(sizes) / 1024:6.1f} KB")
+    print(f"  (참고) 전체 글꼴을 압축해 넣을 때 : 글꼴만 {full_font / 1024:6.1f} KB")
+    print(f"  부분 글꼴 캐시: {pdf_export.font_subset.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
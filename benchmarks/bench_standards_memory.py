@@ -0,0 +1,82 @@
+"""성취기준 레코드 표현 방식에 따른 메모리 사용량과 로드 비용을 비교합니다.
+
+- 이전: 원본 JSON dict 목록을 st.cache_data로 캐시 (호출마다 pickle 복사본을 돌려주므로 세션마다 복사본을 가짐)
+- 현재: 불변 Standard 튜플을 st.cache_resource로 캐시 (모든 세션이 같은 튜플을 참조, 설명은 인덱스에서 필요할 때 읽음)
+
+세션이 STEP 2에서 세 학년군 데이터를 한 번씩 불러온 뒤 유지하는 상황을 tracemalloc으로 측정합니다.
+
+사용법:
+    python benchmarks/bench_standards_memory.py --sessions 50
+"""
+import argparse
+import gc
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from standards_index import GRADE_GROUPS, compact_records, open_index, read_source_records, subject_standards  # noqa: E402
+
+
+def allocated(build):
+    """build()가 만든 객체가 유지하는 메모리(바이트)와 결과를 반환합니다."""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] - before, result
+
+
+def per_call_ms(fn, repeat=50):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=50, help="동시에 STEP 2를 보고 있는 세션 수")
+    args = parser.parse_args(argv)
+
+    index = open_index()
+    sources = {group: read_source_records(group) for group in GRADE_GROUPS}
+    pickled = {group: pickle.dumps(records, protocol=pickle.HIGHEST_PROTOCOL) for group, records in sources.items()}
+
+    tracemalloc.start()
+    shared_dicts, _ = allocated(lambda: {group: pickle.loads(data) for group, data in pickled.items()})
+    # 이전에는 세션마다 cache_data 복사본을 받고, 그 복사본으로 교과별 표시 문자열을 만들었습니다.
+    old_sessions, kept = allocated(lambda: [
+        {group: (copy, subject_standards(copy)) for group, copy in ((g, pickle.loads(d)) for g, d in pickled.items())}
+        for _ in range(args.sessions)
+    ])
+    del kept
+    # 원본 dict의 문자열을 재사용하지 않도록 새로 읽은 복사본으로 만듭니다.
+    compact_json, _ = allocated(lambda: {group: compact_records(pickle.loads(data)) for group, data in pickled.items()})
+    compact_index, shared = allocated(lambda: {group: index.records(group) for group in GRADE_GROUPS})
+    subjects, _ = allocated(lambda: {group: index.subject_standards(group) for group in GRADE_GROUPS})
+    new_sessions, kept = allocated(lambda: [{group: (shared[group], index.subject_standards(group)) for group in GRADE_GROUPS} for _ in range(args.sessions)])
+    del kept
+    tracemalloc.stop()
+
+    n_records = sum(len(records) for records in sources.values())
+    kib = 1024
+    print(f"성취기준 {n_records}개, 세션 {args.sessions}개")
+    print("프로세스 공유 데이터:")
+    print(f"  dict 목록 (원본 JSON)          : {shared_dicts / kib:8.1f} KiB")
+    print(f"  Standard 튜플 (원본 JSON)      : {compact_json / kib:8.1f} KiB")
+    print(f"  Standard 튜플 (인덱스, 설명 지연): {compact_index / kib:8.1f} KiB")
+    print(f"  교과별 표시 문자열 (공유)       : {subjects / kib:8.1f} KiB")
+    print("세션이 추가로 유지하는 메모리:")
+    print(f"  이전 (cache_data 복사본)       : {old_sessions / args.sessions / kib:8.1f} KiB/세션, 합계 {old_sessions / kib / kib:.2f} MiB")
+    print(f"  현재 (공유 튜플 참조)           : {new_sessions / args.sessions / kib:8.1f} KiB/세션, 합계 {new_sessions / kib / kib:.2f} MiB")
+    print("로드 한 번 비용 (세 학년군):")
+    print(f"  이전 (pickle 복사)             : {per_call_ms(lambda: [pickle.loads(d) for d in pickled.values()]):.3f} ms")
+    print(f"  현재 (참조 반환)               : {per_call_ms(lambda: [index.records(g) for g in GRADE_GROUPS]):.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
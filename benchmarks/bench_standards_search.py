@@ -0,0 +1,83 @@
+"""전체 학년군 성취기준 검색(standards_search)의 질의 지연 시간을 측정하는 벤치마크입니다.
+
+실제 성취기준 자료를 --scale배(기본 10배)로 복제하여 코드와 문장을 조금씩 바꾼 데이터로
+역색인 검색과 단순 전체 스캔(부분 문자열 검색)을 비교합니다.
+
+사용법:
+    python benchmarks/bench_standards_search.py --scale 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from standards_index import open_index  # noqa: E402
+from standards_search import StandardsSearchIndex, normalize_code  # noqa: E402
+
+QUERIES = ["기후 변화", "물", "환경 보호 실천", "[4과03", "6사", "2슬02-03", "6사 기후", "자료를 수집하여 그래프로 나타낸다", "수학", "없는검색어"]
+
+
+def scaled_records(index, scale):
+    """학년군별 레코드를 scale배로 늘립니다. 복제본은 코드의 영역 번호와 문장 끝을 바꿔 서로 다르게 만듭니다."""
+    by_group = {}
+    for grade_group in index.grade_groups:
+        records = index.records(grade_group)
+        by_group[grade_group] = [
+            dict(item.as_dict(), 성취기준_코드=item['성취기준_코드'].replace('-', f"{copy:02d}-", 1) if copy else item['성취기준_코드'],
+                 성취기준=f"{item['성취기준']} (사례 {copy})" if copy else item['성취기준'])
+            for copy in range(scale) for item in records
+        ]
+    return by_group
+
+
+def linear_search(records, query, top_k):
+    """색인 없이 모든 성취기준을 훑는 비교용 검색입니다."""
+    terms = query.split()
+    hits = []
+    for label in records:
+        code = normalize_code(label.split(' ', 1)[0])
+        if all(term in label or code.startswith(normalize_code(term)) for term in terms):
+            hits.append(label)
+    return hits[:top_k]
+
+
+def measure(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=10, help="실제 자료를 몇 배로 늘릴지")
+    parser.add_argument('--repeat', type=int, default=200, help="질의마다 측정 반복 횟수")
+    args = parser.parse_args(argv)
+
+    records_by_group = scaled_records(open_index(), args.scale)
+    start = time.perf_counter()
+    search_index = StandardsSearchIndex(records_by_group)
+    build = time.perf_counter() - start
+    labels = search_index.labels
+
+    print(f"성취기준 {len(search_index):,}개 (실제 자료 {args.scale}배), 색인 빌드 {build * 1e3:.1f} ms (프로세스당 한 번)")
+    print(f"  {'질의':<24}{'결과':>5}{'색인 p50':>11}{'색인 p95':>11}{'색인 max':>11}{'전체 스캔':>11}")
+    all_samples = []
+    for query in QUERIES:
+        samples = measure(lambda: search_index.search(query, top_k=20), args.repeat)
+        all_samples.extend(samples)
+        scan = min(measure(lambda: linear_search(labels, query, 20), max(args.repeat // 20, 3)))
+        cuts = statistics.quantiles(samples, n=100)
+        print(f"  {query:<24}{len(search_index.search(query, top_k=20)):>5}"
+              f"{cuts[49] * 1e3:>9.3f}ms{cuts[94] * 1e3:>9.3f}ms{max(samples) * 1e3:>9.3f}ms{scan * 1e3:>9.3f}ms")
+    cuts = statistics.quantiles(all_samples, n=100)
+    print(f"  전체 질의: p50 {cuts[49] * 1e3:.3f} ms, p95 {cuts[94] * 1e3:.3f} ms, p99 {cuts[98] * 1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
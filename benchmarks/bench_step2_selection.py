@@ -0,0 +1,73 @@
+"""STEP 2 성취기준 선택 처리의 재실행(rerun)당 비용을 측정하는 마이크로 벤치마크입니다.
+
+합성 데이터(기본 10,000개 성취기준)로 기존 방식(전체 스캔 + 리스트 포함 검사 + sorted(set))과
+(학년군, 교과) 인덱스 + 집합 기반 병합 방식을 비교합니다.
+
+사용법:
+    python benchmarks/bench_step2_selection.py --standards 10000 --selected 60
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from standards_index import merge_selection, subject_standards  # noqa: E402
+
+SUBJECTS = ["국어", "사회", "도덕", "수학", "과학", "실과", "체육", "음악", "미술", "영어"]
+
+
+def make_records(n):
+    """합성 성취기준 레코드를 만듭니다."""
+    return [
+        {"학년군": "5~6", "교과": SUBJECTS[i % len(SUBJECTS)], "성취기준_코드": f"[6합{i // 100:02d}-{i % 100:02d}]",
+         "성취기준": f"합성 성취기준 {i}번: 생활 속 문제를 탐구하고 해결 방안을 제시한다."}
+        for i in range(n)
+    ]
+
+
+def rerun_before(records, selected, subject, picked):
+    """기존 render_step2의 재실행 1회 처리입니다."""
+    current = [f"{item['성취기준_코드']} {item['성취기준']}" for item in records if item.get('교과') == subject and item.get('성취기준_코드') and item.get('성취기준')]
+    default = [s for s in selected if s in current]
+    others = [s for s in selected if s not in current]
+    return default, sorted(list(set(others + picked)))
+
+
+def rerun_after(by_subject, selected, subject, picked):
+    """인덱스와 집합 기반 병합을 사용하는 재실행 1회 처리입니다."""
+    current, current_set = by_subject[subject]
+    default = [s for s in selected if s in current_set]
+    return default, merge_selection(selected, current_set, picked)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--standards', type=int, default=10000, help="합성 성취기준 수")
+    parser.add_argument('--selected', type=int, default=60, help="여러 과목에 걸쳐 이미 선택된 성취기준 수")
+    parser.add_argument('--repeat', type=int, default=200, help="측정 반복 횟수")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    records = make_records(args.standards)
+    by_subject = subject_standards(records)
+    subject = SUBJECTS[0]
+    selected = sorted(rng.sample([f"{r['성취기준_코드']} {r['성취기준']}" for r in records], args.selected))
+    picked = [s for s in selected if s in by_subject[subject][1]] + [by_subject[subject][0][0]]
+
+    assert rerun_before(records, selected, subject, picked) == rerun_after(by_subject, selected, subject, picked)
+
+    before = min(timeit.repeat(lambda: rerun_before(records, selected, subject, picked), number=1, repeat=args.repeat))
+    after = min(timeit.repeat(lambda: rerun_after(by_subject, selected, subject, picked), number=1, repeat=args.repeat))
+    build = min(timeit.repeat(lambda: subject_standards(records), number=1, repeat=5))
+
+    print(f"성취기준 {args.standards:,}개, 선택 {args.selected}개, 과목 '{subject}' 기준")
+    print(f"  기존 방식 (rerun당)           : {before * 1e3:8.3f} ms")
+    print(f"  인덱스 + 집합 병합 (rerun당)  : {after * 1e3:8.3f} ms  ({before / after:,.0f}배)")
+    print(f"  교과별 인덱스 1회 빌드        : {build * 1e3:8.3f} ms (프로세스당 한 번)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""STEP 3 평가·비평·성찰 제안을 순차/동시에 생성할 때의 소요 시간을 가짜 모델로 비교합니다.
+
+네트워크 없이 실행되며, --failure-rate로 일부 요청이 실패해도 나머지 결과는 받는지 확인할 수 있습니다.
+
+사용법:
+    python benchmarks/bench_step3_concurrency.py --latency 1.0 --failure-rate 0.3
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_backends import FakeBackend, generate_concurrently  # noqa: E402
+
+PROMPTS = {
+    "process_assessment": "초등학생 대상 GSPBL 프로젝트를 위한 '과정중심 평가' 방법을 5가지 제안해줘.",
+    "critique_revision": "초등학생 대상 GSPBL 프로젝트를 위한 '비평과 개선(Critique & Revision)' 활동 아이디어를 5가지 제안해줘.",
+    "reflection": "초등학생 대상 GSPBL 프로젝트를 위한 '성찰(Reflection)' 활동 아이디어를 5가지 제안해줘.",
+}
+
+
+def run_sequential(backend):
+    results = {}
+    for name, prompt in PROMPTS.items():
+        try:
+            results[name] = backend.generate(prompt)
+        except Exception as e:
+            results[name] = e
+    return results
+
+
+def run_concurrent(backend, max_workers):
+    return {name: (text if error is None else error) for name, text, error in generate_concurrently(backend, PROMPTS, max_workers)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=1.0, help="요청 하나에 걸리는 시간(초)")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="요청이 실패할 확률(0~1)")
+    parser.add_argument('--workers', type=int, default=3, help="동시 요청 수 상한")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for label, runner in (("순차", run_sequential), ("동시", lambda b: run_concurrent(b, args.workers))):
+        backend = FakeBackend(latency=args.latency, failure_rate=args.failure_rate, seed=args.seed)
+        started = time.perf_counter()
+        results = runner(backend)
+        elapsed = time.perf_counter() - started
+        failed = [name for name, value in results.items() if isinstance(value, Exception)]
+        print(f"{label}: {elapsed:.2f}초, 성공 {len(results) - len(failed)}건, 실패 {len(failed)}건 {failed if failed else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""작성 중인 설계안을 SQLite에 자동 저장하고, 공유 가능한 ID로 다시 불러옵니다.
+
+설계안 항목은 (설계안 ID, 항목) 한 행씩 저장합니다. 재실행(rerun)마다 마지막으로 저장한 값과 비교하여
+바뀐 항목만 JSON으로 직렬화해 한 트랜잭션에 씁니다. 한 번에 쓰는 양은 max_bytes로 제한하고,
+남은 항목은 다음 재실행에서 이어서 저장합니다.
+
+저장 위치는 GSPBL_DRAFTS_PATH 환경 변수로 바꿀 수 있습니다.
+"""
+import contextlib
+import json
+import logging
+import os
+import re
+import secrets
+import sqlite3
+import time
+
+from plan_sections import PLAN_KEYS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DRAFTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'drafts.sqlite3')
+DRAFT_KEYS = PLAN_KEYS + ("grade_group", "ai_feedback", "question_analysis", "page")
+DEFAULT_MAX_BYTES = 256 * 1024  # 재실행 한 번에 쓰는 최대 바이트 수
+TITLE_LENGTH = 60
+_DRAFT_ID = re.compile(r'^[A-Za-z0-9_-]{8,32}$')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS drafts (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL DEFAULT '',
+    grade_group TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS drafts_updated_at ON drafts (updated_at DESC);
+CREATE TABLE IF NOT EXISTS draft_fields (
+    draft_id TEXT NOT NULL REFERENCES drafts (id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (draft_id, key)
+) WITHOUT ROWID;
+"""
+
+
+def new_draft_id():
+    """URL에 넣어 공유할 수 있는 추측하기 어려운 설계안 ID를 만듭니다."""
+    return secrets.token_urlsafe(9)
+
+
+def is_draft_id(value):
+    return bool(value) and bool(_DRAFT_ID.match(value))
+
+
+def draft_title(project_title):
+    """목록에 보여줄 제목으로 탐구 질문의 첫 줄을 씁니다."""
+    first_line = next((line.strip() for line in (project_title or '').splitlines() if line.strip()), '')
+    return first_line[:TITLE_LENGTH]
+
+
+def snapshot_value(value):
+    """나중에 바뀌었는지 비교할 수 있도록 값을 복사합니다. (목록은 튜플로 고정)"""
+    return tuple(value) if isinstance(value, list) else value
+
+
+_MISSING = object()
+
+
+def changed_fields(state, snapshot, keys=DRAFT_KEYS):
+    """마지막으로 저장한 값(snapshot)과 다른 항목만 {항목: 값}으로 반환합니다. 직렬화하지 않고 값끼리 비교합니다."""
+    changed = {}
+    for key in keys:
+        if key not in state:
+            continue
+        value = state[key]
+        if snapshot_value(value) != snapshot.get(key, _MISSING):
+            changed[key] = value
+    return changed
+
+
+class DraftStore:
+    """설계안 초안 저장소입니다. 저장 오류는 앱 사용을 막지 않도록 예외 대신 반환값으로 알립니다.
+
+    읽기 전용 배포처럼 저장 파일을 만들 수 없으면 경고를 남기고 아무것도 저장하지 않는 저장소(enabled=False)로 동작합니다.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get('GSPBL_DRAFTS_PATH') or DEFAULT_DRAFTS_PATH
+        self.enabled = True
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.executescript(_SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("설계안 저장소를 열 수 없어 자동 저장 없이 실행합니다 (%s): %s", self.path, e)
+            self.enabled = False
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            # WAL 모드에서는 NORMAL로도 커밋이 손상되지 않으며, 커밋마다 fsync하지 않아 저장이 빠릅니다.
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save(self, draft_id, fields, max_bytes=DEFAULT_MAX_BYTES):
+        """바뀐 항목을 저장하고 실제로 저장한 항목 이름 목록을 반환합니다.
+
+        직렬화한 크기의 합이 max_bytes를 넘으면 나머지 항목은 저장하지 않고 남겨 둡니다.
+        (max_bytes보다 큰 항목 하나는 그 항목만 단독으로 저장합니다) 저장에 실패하면 None을 반환합니다.
+        """
+        if not self.enabled:
+            return None
+        rows, total = [], 0
+        for key, value in fields.items():
+            encoded = json.dumps(value, ensure_ascii=False)
+            size = len(encoded.encode('utf-8'))
+            if rows and total + size > max_bytes:
+                continue
+            rows.append((draft_id, key, encoded))
+            total += size
+            if total >= max_bytes:
+                break
+        if not rows:
+            return []
+        saved = [key for _, key, _ in rows]
+        meta = {
+            "id": draft_id, "now": time.time(),
+            "title": draft_title(fields['project_title']) if 'project_title' in saved else None,
+            "grade_group": fields['grade_group'] if 'grade_group' in saved else None,
+        }
+        try:
+            with self._connect() as conn:
+                # 목록 화면에 쓰는 제목·학년군은 해당 항목을 저장할 때만 바꿉니다.
+                conn.execute(
+                    "INSERT INTO drafts (id, title, grade_group, created_at, updated_at) "
+                    "VALUES (:id, COALESCE(:title, ''), COALESCE(:grade_group, ''), :now, :now) "
+                    "ON CONFLICT(id) DO UPDATE SET title = COALESCE(:title, title), "
+                    "grade_group = COALESCE(:grade_group, grade_group), updated_at = :now", meta,
+                )
+                conn.executemany(
+                    "INSERT INTO draft_fields (draft_id, key, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT(draft_id, key) DO UPDATE SET value = excluded.value", rows,
+                )
+        except sqlite3.Error:
+            return None
+        return saved
+
+    def load(self, draft_id):
+        """저장된 설계안 항목을 dict로 반환합니다. 없으면 None을 반환합니다."""
+        if not self.enabled or not is_draft_id(draft_id):
+            return None
+        try:
+            with self._connect() as conn:
+                if conn.execute("SELECT 1 FROM drafts WHERE id = ?", (draft_id,)).fetchone() is None:
+                    return None
+                rows = conn.execute("SELECT key, value FROM draft_fields WHERE draft_id = ?", (draft_id,)).fetchall()
+        except sqlite3.Error:
+            return None
+        return {key: json.loads(value) for key, value in rows}
+
+    def list_drafts(self, limit=20):
+        """최근에 수정한 순서로 설계안 목록 [{id, title, grade_group, updated_at}]을 반환합니다."""
+        if not self.enabled:
+            return []
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT id, title, grade_group, updated_at FROM drafts ORDER BY updated_at DESC LIMIT ?", (limit,)
+                ).fetchall()
+        except sqlite3.Error:
+            return []
+        return [{"id": i, "title": title, "grade_group": grade_group, "updated_at": updated_at} for i, title, grade_group, updated_at in rows]
+
+    def delete(self, draft_id):
+        if not self.enabled:
+            return
+        with self._connect() as conn:
+            conn.execute("DELETE FROM drafts WHERE id = ?", (draft_id,))
+
+
+def autosave(store, draft_id, state, snapshot, max_bytes=DEFAULT_MAX_BYTES, keys=DRAFT_KEYS):
+    """state에서 snapshot 이후 바뀐 항목만 저장하고, 저장한 항목은 snapshot을 갱신합니다.
+
+    (저장한 항목 목록, 다음에 저장할 남은 항목 수)를 반환합니다. 저장에 실패하면 저장한 항목 목록이 None입니다.
+    """
+    changed = changed_fields(state, snapshot, keys)
+    if not changed:
+        return [], 0
+    saved = store.save(draft_id, changed, max_bytes)
+    if saved is None:
+        return None, len(changed)
+    for key in saved:
+        snapshot[key] = snapshot_value(changed[key])
+    return saved, len(changed) - len(saved)
@@ -0,0 +1,194 @@
+"""수업 설계안을 엑셀 파일로 내보냅니다.
+
+한 설계안은 내용 해시로 캐시하여 같은 내용이면 다시 만들지 않고,
+여러 설계안은 openpyxl write-only 모드로 시트 하나씩 순서대로 써서 메모리 사용량을 일정하게 유지합니다.
+openpyxl은 앱 시작을 늦추지 않도록 처음 필요할 때 불러옵니다.
+
+사용법 (설계안 여러 개를 하나의 통합 문서로 묶기):
+    python excel_export.py plans.jsonl other_plan.json -o GSPBL_설계안_모음.xlsx
+"""
+import argparse
+import hashlib
+import io
+import json
+import re
+import sys
+import threading
+from collections import OrderedDict
+
+from plan_sections import PLAN_KEYS, PLAN_SECTIONS
+
+SHEET_NAME = 'GSPBL_수업설계안'
+HEADER = ('항목', '내용')
+COLUMN_WIDTHS = {'A': 25, 'B': 80}
+MAX_CELL_LENGTH = 32767  # 엑셀 셀 하나에 넣을 수 있는 최대 글자 수
+CACHE_SIZE = 64
+
+
+def plan_from_state(state):
+    """세션 상태(또는 dict)에서 설계안 항목만 골라 새 dict로 복사합니다."""
+    return {key: (list(state.get(key, [])) if isinstance(state.get(key), (list, tuple)) else state.get(key, '')) for key in PLAN_KEYS}
+
+
+def plan_rows(plan):
+    """설계안을 (항목, 내용) 행 목록으로 바꿉니다. 목록 항목은 글머리표로 이어 붙입니다."""
+    rows = []
+    for title, key in PLAN_SECTIONS:
+        value = plan.get(key, '')
+        if isinstance(value, (list, tuple)):
+            value = "\n".join(f"• {item}" for item in value)
+        rows.append((title, value or ''))
+    return rows
+
+
+def plan_hash(plan):
+    """설계안 항목 내용으로 sha256 해시를 계산합니다."""
+    payload = json.dumps(plan_rows(plan), ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def build_plan_workbook(plan):
+    """설계안 하나를 엑셀 파일(bytes)로 만듭니다."""
+    from openpyxl import Workbook
+    from openpyxl.styles import Alignment
+
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet.title = SHEET_NAME
+    worksheet.append(HEADER)
+    wrap = Alignment(wrap_text=True, vertical='top')
+    for row, (title, content) in enumerate(plan_rows(plan), start=2):
+        worksheet.cell(row=row, column=1, value=title)
+        worksheet.cell(row=row, column=2, value=content[:MAX_CELL_LENGTH]).alignment = wrap
+    for column, width in COLUMN_WIDTHS.items():
+        worksheet.column_dimensions[column].width = width
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def cached_plan_workbook(plan):
+    """내용 해시가 같은 설계안은 이전에 만든 엑셀 파일을 재사용합니다. (최근 CACHE_SIZE개 보관)"""
+    key = plan_hash(plan)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    data = build_plan_workbook(plan)
+    with _cache_lock:
+        _cache[key] = data
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return data
+
+
+def _sheet_title(plan, number, used):
+    """엑셀 규칙(31자 이하, 특수문자 제외, 중복 불가)에 맞는 시트 이름을 만듭니다."""
+    name = plan.get('plan_name') or (plan.get('project_title') or '').strip().split('\n')[0]
+    name = re.sub(r'[\[\]:*?/\\]', ' ', name).strip().strip("'") or '설계안'
+    title = f"{number:03d}_{name}"[:31]
+    suffix = 2
+    while title.lower() in used:
+        tag = f"~{suffix}"
+        title = f"{number:03d}_{name}"[:31 - len(tag)] + tag
+        suffix += 1
+    used.add(title.lower())
+    return title
+
+
+def write_bulk_workbook(plans, output):
+    """여러 설계안을 시트 하나씩 담은 통합 문서로 output(경로 또는 파일 객체)에 씁니다.
+
+    plans는 제너레이터여도 되며, write-only 모드라 설계안 수와 관계없이 메모리 사용량이 거의 일정합니다.
+    기록한 설계안 수를 반환합니다.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font
+
+    workbook = Workbook(write_only=True)
+    header_font = Font(bold=True)
+    wrap = Alignment(wrap_text=True, vertical='top')
+    used, count = set(), 0
+    for count, plan in enumerate(plans, start=1):
+        worksheet = workbook.create_sheet(_sheet_title(plan, count, used))
+        for column, width in COLUMN_WIDTHS.items():
+            worksheet.column_dimensions[column].width = width
+        header = []
+        for text in HEADER:
+            cell = WriteOnlyCell(worksheet, value=text)
+            cell.font = header_font
+            header.append(cell)
+        worksheet.append(header)
+        for title, content in plan_rows(plan):
+            cell = WriteOnlyCell(worksheet, value=content[:MAX_CELL_LENGTH])
+            cell.alignment = wrap
+            worksheet.append([title, cell])
+    if count == 0:
+        workbook.create_sheet(SHEET_NAME)
+    workbook.save(output)
+    return count
+
+
+def _checked_plan(plan, name):
+    """설계안이 JSON 객체인지 확인하고, 항목 값을 문자열(목록 항목은 문자열 목록)로 맞춥니다.
+
+    엑셀 셀에 넣을 수 없는 제어 문자는 지웁니다.
+    """
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    if not isinstance(plan, dict):
+        raise ValueError(f"{name}: 설계안은 JSON 객체여야 합니다 ({type(plan).__name__} 값을 받았습니다).")
+
+    def text(value):
+        return ILLEGAL_CHARACTERS_RE.sub('', str(value))
+
+    checked = {}
+    for key, value in plan.items():
+        if isinstance(value, (list, tuple)):
+            checked[key] = [text(item) for item in value]
+        else:
+            checked[key] = '' if value is None else text(value)
+    return checked
+
+
+def iter_plans(sources):
+    """JSON(설계안 하나 또는 목록)과 JSONL(한 줄에 설계안 하나) 파일에서 설계안을 하나씩 읽습니다.
+
+    sources는 파일 경로 또는 (이름, 바이너리 파일 객체) 쌍의 목록입니다.
+    설계안이 JSON 객체가 아니면 ValueError를 냅니다.
+    """
+    for source in sources:
+        name, fileobj = source if isinstance(source, tuple) else (source, None)
+        f = io.TextIOWrapper(fileobj, encoding='utf-8-sig') if fileobj is not None else open(name, 'r', encoding='utf-8-sig')
+        with f:
+            if name.lower().endswith('.jsonl'):
+                for line in f:
+                    if line.strip():
+                        yield _checked_plan(json.loads(line), name)
+            else:
+                data = json.load(f)
+                for plan in (data if isinstance(data, list) else [data]):
+                    yield _checked_plan(plan, name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="여러 수업 설계안(JSON/JSONL)을 하나의 엑셀 통합 문서로 내보냅니다.")
+    parser.add_argument('sources', nargs='+', help="설계안 JSON 또는 JSONL 파일")
+    parser.add_argument('-o', '--output', default='GSPBL_설계안_모음.xlsx', help="저장할 엑셀 파일 경로")
+    args = parser.parse_args(argv)
+    try:
+        count = write_bulk_workbook(iter_plans(args.sources), args.output)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"'{args.output}' 파일에 설계안 {count}개를 저장했습니다.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
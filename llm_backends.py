@@ -0,0 +1,147 @@
+"""AI 응답을 생성하는 백엔드(Gemini, 오프라인 테스트용 가짜 모델)와 동시 생성 도우미입니다.
+
+GSPBL_LLM_BACKEND=fake 로 실행하면 API 키 없이 가짜 모델로 앱 전체를 실행해볼 수 있습니다.
+    GSPBL_FAKE_LATENCY=1.5        # 응답 하나에 걸리는 시간(초)
+    GSPBL_FAKE_FAILURE_RATE=0.2   # 요청이 실패할 확률(0~1)
+"""
+import hashlib
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+DEFAULT_MODEL = 'gemini-1.5-flash'
+
+_configure_lock = threading.Lock()
+_configured_key = None
+
+
+def configure_gemini(api_key):
+    """google.generativeai를 처음 쓸 때 불러오고, 같은 API 키는 프로세스당 한 번만 설정한 뒤 모듈을 반환합니다.
+
+    SDK는 import만으로도 오래 걸리므로, AI 기능을 쓰지 않는 방문자는 불러오지 않습니다.
+    """
+    global _configured_key
+    import google.generativeai as genai
+
+    if api_key and api_key != _configured_key:
+        with _configure_lock:
+            if api_key != _configured_key:
+                genai.configure(api_key=api_key)
+                _configured_key = api_key
+    return genai
+
+
+class GeminiBackend:
+    """Google Gemini API로 응답을 생성합니다. SDK 설정과 모델 객체는 처음 사용할 때 한 번만 만듭니다."""
+
+    requires_api_key = True
+
+    def __init__(self, model_name=DEFAULT_MODEL, generation_config=None, api_key=None):
+        self.model_name = model_name
+        self.generation_config = generation_config or {}
+        self.api_key = api_key
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = configure_gemini(self.api_key).GenerativeModel(self.model_name)
+        return self._model
+
+    def generate(self, prompt):
+        """응답 전체를 한 번에 받아 반환합니다."""
+        response = self._get_model().generate_content(prompt, generation_config=self.generation_config or None)
+        return response.text
+
+    def stream(self, prompt):
+        """응답을 생성되는 대로 텍스트 조각 단위로 돌려줍니다."""
+        response = self._get_model().generate_content(prompt, generation_config=self.generation_config or None, stream=True)
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeBackendError(RuntimeError):
+    """가짜 모델이 일부러 발생시키는 오류입니다. 할당량 초과(429)처럼 재시도 가능한 오류로 취급됩니다."""
+
+    code = 429
+
+
+class FakeBackend:
+    """네트워크 없이 지연 시간과 실패율을 흉내 내는 가짜 모델입니다.
+
+    같은 프롬프트에는 항상 같은 응답을 돌려주므로 동시 처리와 부분 실패를 오프라인에서 재현할 수 있습니다.
+    """
+
+    requires_api_key = False
+
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=None, model_name='fake', chunk_size=12):
+        self.model_name = model_name
+        self.generation_config = {}
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.chunk_size = chunk_size
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _start_call(self):
+        with self._lock:
+            self.calls += 1
+            failed = self._rng.random() < self.failure_rate
+        if failed:
+            raise FakeBackendError("가짜 모델 오류: 요청이 실패했습니다. (429 Resource exhausted)")
+
+    def reply(self, prompt):
+        """프롬프트로부터 결정적인 가짜 응답을 만듭니다."""
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8]
+        topic = " ".join(prompt.split())[:40]
+        return "\n".join(f"[가짜 응답 {digest}] '{topic}…'에 대한 아이디어 {i}" for i in range(1, 6))
+
+    def generate(self, prompt):
+        self._start_call()
+        time.sleep(self.latency)
+        return self.reply(prompt)
+
+    def stream(self, prompt):
+        self._start_call()
+        text = self.reply(prompt)
+        pieces = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+        for piece in pieces:
+            time.sleep(self.latency / len(pieces))
+            yield piece
+
+
+def create_backend(name=None, model_name=DEFAULT_MODEL, generation_config=None, api_key=None):
+    """이름(또는 GSPBL_LLM_BACKEND 환경 변수)에 맞는 백엔드를 만듭니다. api_key는 Gemini를 처음 호출할 때 설정합니다."""
+    name = (name or os.environ.get('GSPBL_LLM_BACKEND') or 'gemini').lower()
+    if name == 'fake':
+        return FakeBackend(
+            latency=float(os.environ.get('GSPBL_FAKE_LATENCY', 0.5)),
+            failure_rate=float(os.environ.get('GSPBL_FAKE_FAILURE_RATE', 0.0)),
+        )
+    if name == 'gemini':
+        return GeminiBackend(model_name, generation_config, api_key)
+    raise ValueError(f"알 수 없는 AI 백엔드입니다: '{name}'")
+
+
+def generate_concurrently(backend, prompts, max_workers=3):
+    """여러 프롬프트를 제한된 스레드 풀에서 동시에 생성하고, 끝나는 순서대로 결과를 돌려줍니다.
+
+    prompts는 {이름: 프롬프트} 형태이며, (이름, 응답 텍스트, 예외)를 하나씩 yield 합니다.
+    실패한 요청은 응답 텍스트가 None이고 예외가 채워집니다.
+    """
+    if not prompts:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(prompts)), thread_name_prefix='gspbl-ai') as pool:
+        futures = {pool.submit(backend.generate, prompt): name for name, prompt in prompts.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                yield name, future.result(), None
+            except Exception as e:
+                yield name, None, e
@@ -0,0 +1,167 @@
+"""여러 세션과 워커 프로세스가 함께 쓰는 SQLite 기반 AI 응답 캐시입니다.
+
+같은 프롬프트(공백 정규화 후) + 모델 + 생성 파라미터 조합이면 저장된 응답을 재사용합니다.
+저장 기간(TTL)이 지난 응답은 버리고, 최대 개수를 넘으면 가장 오래 사용하지 않은 응답부터 지웁니다.
+"""
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'gemini_responses.sqlite3')
+DEFAULT_TTL = 7 * 24 * 60 * 60  # 7일
+DEFAULT_MAX_ENTRIES = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def normalize_prompt(prompt):
+    """유니코드 정규화 후 연속 공백을 하나로 줄여 캐시 키 계산에 사용할 프롬프트를 만듭니다."""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', prompt)).strip()
+
+
+def make_key(prompt, model, params=None):
+    """정규화된 프롬프트, 모델 이름, 생성 파라미터로 내용 기반 캐시 키를 만듭니다."""
+    payload = json.dumps(
+        {"prompt": normalize_prompt(prompt), "model": model, "params": params or {}},
+        ensure_ascii=False, sort_keys=True, separators=(',', ':'),
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """TTL과 LRU 정리를 지원하는 디스크 기반 응답 캐시입니다.
+
+    캐시 오류(디스크 가득 참, 잠금 시간 초과 등)는 AI 호출을 막지 않도록 조용히 무시합니다.
+    읽기 전용 배포처럼 캐시 파일을 만들 수 없으면 경고를 남기고 아무것도 저장하지 않는 캐시(enabled=False)로 동작합니다.
+    """
+
+    def __init__(self, path=None, ttl=None, max_entries=None):
+        self.path = path or os.environ.get('GSPBL_CACHE_PATH') or DEFAULT_CACHE_PATH
+        self.ttl = ttl if ttl is not None else float(os.environ.get('GSPBL_CACHE_TTL', DEFAULT_TTL))
+        self.max_entries = max_entries if max_entries is not None else int(os.environ.get('GSPBL_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+        self.enabled = True
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.executescript(_SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("AI 응답 캐시를 열 수 없어 캐시 없이 실행합니다 (%s): %s", self.path, e)
+            self.enabled = False
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # 스레드와 프로세스 사이에서 안전하도록 작업마다 새 연결을 열고 닫습니다.
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _bump(self, conn, name):
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,)
+        )
+
+    def get(self, key):
+        """저장된 응답을 반환합니다. 없거나 만료되었으면 None을 반환합니다."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT response FROM responses WHERE key = ? AND created_at >= ?", (key, now - self.ttl)
+                ).fetchone()
+                if row is None:
+                    self._bump(conn, 'misses')
+                    return None
+                conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                self._bump(conn, 'hits')
+                return row[0]
+        except sqlite3.Error:
+            return None
+
+    def contains(self, key):
+        """저장된 응답이 있는지만 확인합니다. 적중/미적중 통계는 바꾸지 않습니다."""
+        if not self.enabled:
+            return False
+        try:
+            with self._connect() as conn:
+                return conn.execute(
+                    "SELECT 1 FROM responses WHERE key = ? AND created_at >= ?", (key, time.time() - self.ttl)
+                ).fetchone() is not None
+        except sqlite3.Error:
+            return False
+
+    def set(self, key, response, model=""):
+        """응답을 저장하고, 만료되었거나 최대 개수를 넘는 오래된 응답을 정리합니다."""
+        if not self.enabled:
+            return
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, model, response, now, now),
+                )
+                conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+                evicted = conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)", (self.max_entries,)
+                ).rowcount
+                if evicted > 0:
+                    conn.execute(
+                        "INSERT INTO counters (name, value) VALUES ('evictions', ?) "
+                        "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (evicted,)
+                    )
+        except sqlite3.Error:
+            pass
+
+    def stats(self):
+        """적중(hits), 미적중(misses), 정리(evictions) 횟수와 저장된 응답 수를 반환합니다."""
+        result = {"hits": 0, "misses": 0, "evictions": 0, "entries": 0}
+        if not self.enabled:
+            return result
+        try:
+            with self._connect() as conn:
+                result.update(dict(conn.execute("SELECT name, value FROM counters")))
+                result["entries"] = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        except sqlite3.Error:
+            pass
+        return result
+
+    def clear(self):
+        """저장된 응답과 통계를 모두 지웁니다. 지우지 못하면 이전 응답을 다시 쓰지 않도록 경고를 남기고 캐시를 끕니다."""
+        if not self.enabled:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM responses")
+                conn.execute("DELETE FROM counters")
+        except sqlite3.Error as e:
+            logger.warning("AI 응답 캐시를 비울 수 없어 캐시 없이 실행합니다 (%s): %s", self.path, e)
+            self.enabled = False
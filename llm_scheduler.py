@@ -0,0 +1,381 @@
+"""한 프로세스의 모든 세션이 공유하는 AI 요청 스케줄러입니다.
+
+백엔드(llm_backends)를 감싸 같은 인터페이스(generate, stream)를 제공하면서 다음을 처리합니다.
+- 토큰 버킷 속도 제한과 동시 요청 수 상한
+- 재시도 가능한 오류(429, 5xx 등)에 대한 지수 백오프 + 지터 재시도
+- 여러 세션에서 동시에 들어온 같은 프롬프트를 하나의 요청으로 합치기(coalescing)
+- 연속 실패 시 일정 시간 요청을 바로 거절하는 회로 차단기(circuit breaker)
+- 요청마다 응답을 기다리는 최대 시간(deadline). 넘으면 기다리던 모든 세션에 바로 실패를 알립니다.
+
+설정은 환경 변수로 바꿀 수 있습니다.
+    GSPBL_AI_RATE=1.0           # 초당 요청 수
+    GSPBL_AI_BURST=5            # 순간적으로 허용하는 요청 수
+    GSPBL_AI_MAX_IN_FLIGHT=8    # 동시에 진행할 수 있는 요청 수
+    GSPBL_AI_MAX_RETRIES=3      # 재시도 횟수
+    GSPBL_AI_TIMEOUT=60         # 요청 하나(재시도 포함)의 최대 대기 시간(초)
+"""
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from llm_cache import make_key
+
+RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+RETRYABLE_NAMES = frozenset({
+    'ResourceExhausted', 'TooManyRequests', 'ServiceUnavailable', 'DeadlineExceeded',
+    'InternalServerError', 'GatewayTimeout', 'BadGateway', 'TimeoutError', 'ConnectionError',
+})
+
+
+class SchedulerError(RuntimeError):
+    """스케줄러가 요청을 보내지 않고 거절할 때 발생합니다."""
+
+
+class CircuitOpenError(SchedulerError):
+    """연속 실패로 회로 차단기가 열려 있어 요청을 바로 거절할 때 발생합니다."""
+
+
+class SchedulerBusyError(SchedulerError):
+    """대기 시간 안에 요청 슬롯을 얻지 못했을 때 발생합니다."""
+
+
+class SchedulerTimeoutError(CircuitOpenError):
+    """정해진 시간 안에 AI 응답이 오지 않아 기다리기를 멈췄을 때 발생합니다. 회로 차단기와 같은 빠른 실패로 처리합니다."""
+
+
+def _timeout_error(timeout):
+    return SchedulerTimeoutError(f"AI 응답이 {timeout:.0f}초 안에 오지 않아 요청을 중단했습니다. 잠시 후 다시 시도해주세요.")
+
+
+def _run_with_timeout(fn, prompt, timeout):
+    """fn(prompt)를 별도 스레드에서 실행하고 timeout초까지만 기다립니다.
+
+    멈춘 호출은 취소할 수 없으므로 데몬 스레드에 남겨 두고, 호출한 쪽은 SchedulerTimeoutError로 바로 돌아갑니다.
+    """
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(fn(prompt))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name='gspbl-ai-call', daemon=True).start()
+    try:
+        return future.result(timeout=max(timeout, 0))
+    except FutureTimeoutError:
+        raise _timeout_error(timeout) from None
+
+
+_END = object()
+
+
+def _iter_with_timeout(iterable, timeout):
+    """iterable을 별도 스레드에서 읽으며, 다음 조각이 timeout초 안에 오지 않으면 SchedulerTimeoutError를 발생시킵니다."""
+    pieces = queue.Queue()
+
+    def produce():
+        try:
+            for piece in iterable:
+                pieces.put((piece, None))
+        except BaseException as e:
+            pieces.put((_END, e))
+        else:
+            pieces.put((_END, None))
+
+    threading.Thread(target=produce, name='gspbl-ai-stream', daemon=True).start()
+    while True:
+        try:
+            piece, error = pieces.get(timeout=timeout)
+        except queue.Empty:
+            raise _timeout_error(timeout) from None
+        if error is not None:
+            raise error
+        if piece is _END:
+            return
+        yield piece
+
+
+def is_retryable(error):
+    """일시적인 오류(할당량 초과, 서버 오류, 시간 초과)인지 판단합니다."""
+    code = getattr(error, 'code', None)
+    if isinstance(code, int) and code in RETRYABLE_STATUS:
+        return True
+    return type(error).__name__ in RETRYABLE_NAMES
+
+
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 capacity개까지 쌓이는 토큰 버킷입니다."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout):
+        """토큰 하나를 얻을 때까지 기다립니다. timeout 안에 얻지 못하면 False를 반환합니다."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """연속 failure_threshold번 실패하면 reset_timeout초 동안 요청을 거절합니다.
+
+    시간이 지나면 한 번의 시험 요청(half-open)을 허용하고, 성공하면 다시 정상 상태로 돌아갑니다.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            return 'half-open' if time.monotonic() - self._opened_at >= self.reset_timeout else 'open'
+
+    def check(self):
+        """요청을 보내도 되는지 확인하고, 차단 중이면 CircuitOpenError를 발생시킵니다."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if remaining <= 0 and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return
+            raise CircuitOpenError(f"AI 요청이 잇달아 실패하여 잠시 중단했습니다. {max(remaining, 1):.0f}초 후 다시 시도해주세요.")
+
+    def abort_trial(self):
+        """시험 요청이 보내지지 못했을 때 다음 요청이 다시 시험할 수 있게 합니다."""
+        with self._lock:
+            self._trial_in_progress = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_progress or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_progress = False
+
+
+class LLMScheduler:
+    """백엔드 앞에서 속도 제한, 재시도, 요청 합치기, 회로 차단을 담당합니다."""
+
+    def __init__(self, backend, rate=1.0, burst=5, max_in_flight=8, max_retries=3,
+                 base_delay=1.0, max_delay=16.0, acquire_timeout=10.0,
+                 failure_threshold=5, reset_timeout=30.0, request_timeout=60.0):
+        self.backend = backend
+        self.max_retries = max_retries
+        self.request_timeout = request_timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.acquire_timeout = acquire_timeout
+        self._bucket = TokenBucket(rate, burst)
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "upstream_calls": 0, "coalesced": 0, "retries": 0, "failures": 0, "rejected": 0}
+
+    @classmethod
+    def from_env(cls, backend):
+        """GSPBL_AI_* 환경 변수로 설정한 스케줄러를 만듭니다."""
+        return cls(
+            backend,
+            rate=float(os.environ.get('GSPBL_AI_RATE', 1.0)),
+            burst=int(os.environ.get('GSPBL_AI_BURST', 5)),
+            max_in_flight=int(os.environ.get('GSPBL_AI_MAX_IN_FLIGHT', 8)),
+            max_retries=int(os.environ.get('GSPBL_AI_MAX_RETRIES', 3)),
+            request_timeout=float(os.environ.get('GSPBL_AI_TIMEOUT', 60.0)),
+        )
+
+    # 백엔드와 같은 속성을 노출하여 그대로 바꿔 끼울 수 있게 합니다.
+    @property
+    def model_name(self):
+        return self.backend.model_name
+
+    @property
+    def generation_config(self):
+        return self.backend.generation_config
+
+    @property
+    def requires_api_key(self):
+        return self.backend.requires_api_key
+
+    @property
+    def circuit_state(self):
+        return self._breaker.state
+
+    def stats(self):
+        """요청, 실제 호출, 합쳐진 요청, 재시도, 실패, 거절 횟수를 반환합니다."""
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._in_flight), circuit=self._breaker.state)
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+    def _admit(self):
+        """회로 차단기를 확인한 뒤 속도 제한 토큰과 동시 요청 슬롯을 얻습니다. 얻지 못하면 바로 거절합니다."""
+        try:
+            self._breaker.check()
+        except CircuitOpenError:
+            self._count('rejected')
+            raise
+        deadline = time.monotonic() + self.acquire_timeout
+        error = None
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            error = SchedulerBusyError("AI 요청이 몰려 있어 처리하지 못했습니다. 잠시 후 다시 시도해주세요.")
+        elif not self._bucket.acquire(max(deadline - time.monotonic(), 0)):
+            self._slots.release()
+            error = SchedulerBusyError("AI 요청 한도에 도달했습니다. 잠시 후 다시 시도해주세요.")
+        if error is not None:
+            self._breaker.abort_trial()
+            self._count('rejected')
+            raise error
+
+    def _record_error(self, error):
+        """일시적인 오류만 회로 차단기에 실패로 기록합니다.
+
+        안전 필터 차단, 잘못된 요청(400)처럼 요청 자체의 문제는 서비스 장애가 아니므로 다른 세션의 요청을 막지 않습니다.
+        응답이 오지 않아 시간이 초과된 요청은 서비스 장애로 봅니다.
+        """
+        if is_retryable(error) or isinstance(error, SchedulerTimeoutError):
+            self._breaker.record_failure()
+        else:
+            self._breaker.abort_trial()
+
+    def _backoff(self, attempt):
+        # 전체 지터(full jitter): 0 ~ min(max_delay, base_delay * 2^attempt) 사이에서 무작위로 기다립니다.
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _call_with_retries(self, fn, prompt):
+        # 재시도를 포함한 전체 시간이 request_timeout을 넘지 않게 합니다.
+        deadline = time.monotonic() + self.request_timeout
+        attempt = 0
+        while True:
+            self._admit()
+            try:
+                self._count('upstream_calls')
+                result = _run_with_timeout(fn, prompt, deadline - time.monotonic())
+            except Exception as e:
+                self._record_error(e)
+                delay = self._backoff(attempt)
+                if not is_retryable(e) or attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                    self._count('failures')
+                    raise
+            else:
+                self._breaker.record_success()
+                return result
+            finally:
+                self._slots.release()
+            # 기다리는 동안에는 슬롯을 다른 요청에 양보합니다.
+            self._count('retries')
+            time.sleep(delay)
+            attempt += 1
+
+    def _join(self, prompt):
+        """같은 프롬프트의 진행 중인 요청을 찾습니다. (키, Future, 직접 호출해야 하는지 여부)를 반환합니다."""
+        key = make_key(prompt, self.model_name, self.generation_config)
+        with self._lock:
+            self._stats['requests'] += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._stats['coalesced'] += 1
+                return key, future, False
+            future = self._in_flight[key] = Future()
+            return key, future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            self._in_flight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _wait(self, future):
+        """같은 프롬프트를 먼저 보낸 요청의 결과를 기다립니다. 그 요청이 끝날 수 있는 시간까지만 기다립니다."""
+        timeout = self.acquire_timeout + self.request_timeout
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._count('failures')
+            raise _timeout_error(timeout) from None
+
+    def generate(self, prompt):
+        """응답 전체를 반환합니다. 같은 프롬프트가 이미 진행 중이면 그 결과를 함께 기다립니다."""
+        key, future, leader = self._join(prompt)
+        if not leader:
+            return self._wait(future)
+        try:
+            result = self._call_with_retries(self.backend.generate, prompt)
+        except Exception as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def stream(self, prompt):
+        """응답을 조각 단위로 돌려줍니다. 같은 프롬프트가 이미 진행 중이면 그 결과를 한 번에 돌려줍니다.
+
+        스트리밍은 재시도하지 않으며, 실패하면 호출자가 generate로 다시 요청합니다.
+        다음 조각이 request_timeout초 안에 오지 않으면 SchedulerTimeoutError로 끝냅니다.
+        """
+        key, future, leader = self._join(prompt)
+        if not leader:
+            yield self._wait(future)
+            return
+        chunks = []
+        try:
+            self._admit()
+            try:
+                self._count('upstream_calls')
+                for piece in _iter_with_timeout(self.backend.stream(prompt), self.request_timeout):
+                    chunks.append(piece)
+                    yield piece
+            except Exception as e:
+                self._record_error(e)
+                self._count('failures')
+                raise
+            finally:
+                self._slots.release()
+            self._breaker.record_success()
+        except GeneratorExit:
+            # 호출자가 중간에 읽기를 멈춘 경우(예: 스트리밍 중 다른 버튼을 눌러 재실행), 기다리던 다른 요청에는 실패로 알리고
+            # 결과를 알 수 없는 시험 요청(half-open)은 끝난 것으로 처리해 다음 요청이 다시 시험할 수 있게 합니다.
+            self._breaker.abort_trial()
+            self._finish(key, future, error=SchedulerError("같은 요청의 스트리밍이 중단되었습니다. 다시 시도해주세요."))
+            raise
+        except Exception as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, "".join(chunks))
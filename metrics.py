@@ -0,0 +1,310 @@
+"""앱 내부 성능 지표(페이지 렌더링 시간, AI 호출 지연·오류, 캐시 적중)를 모으고 내보냅니다.
+
+한 프로세스의 모든 세션이 REGISTRY 하나를 함께 씁니다.
+- 카운터와 히스토그램은 라벨(page, helper 등)별로 따로 집계합니다.
+- 히스토그램은 누적 버킷(Prometheus 형식)과 최근 WINDOW개 값으로 계산한 백분위수를 함께 제공합니다.
+- to_prometheus()는 Prometheus 텍스트 형식, snapshot()은 JSON으로 바꿀 수 있는 dict를 반환합니다.
+
+환경 변수 (모두 선택):
+    GSPBL_METRICS_LOG=metrics.jsonl   # 측정값을 한 줄에 하나씩 JSON으로 기록
+    GSPBL_METRICS_PORT=9108           # http://localhost:9108/metrics 로 Prometheus 지표 제공
+    GSPBL_PROFILE_SLOW_MS=1500        # 이보다 오래 걸린 재실행(rerun)의 cProfile 결과를 저장
+    GSPBL_PROFILE_DIR=.cache/profiles # 프로파일 저장 폴더
+"""
+import bisect
+import contextlib
+import cProfile
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+WINDOW = 512  # 백분위수 계산에 쓰는 최근 측정값 수
+QUANTILES = (0.5, 0.95, 0.99)
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'profiles')
+PROFILE_KEEP = 20
+
+event_logger = logging.getLogger('gspbl.metrics')
+
+
+def _label_key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"라벨 {sorted(labels)}이(가) 정의된 라벨 {list(labelnames)}과(와) 다릅니다.")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, key, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, key)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name, documentation, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _log(self, key, value):
+        if event_logger.isEnabledFor(logging.INFO):
+            event_logger.info(json.dumps({"ts": round(time.time(), 3), "metric": self.name,
+                                          "labels": dict(zip(self.labelnames, key)), "value": value}, ensure_ascii=False))
+
+
+class Counter(_Metric):
+    """증가만 하는 카운터입니다."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+        self._log(key, amount)
+
+    def value(self, **labels):
+        with self._lock:
+            return self._series.get(_label_key(self.labelnames, labels), 0)
+
+    def _prometheus(self):
+        with self._lock:
+            items = sorted(self._series.items())
+        return [f"{self.name}_total{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+    def _snapshot(self):
+        with self._lock:
+            return [{"labels": dict(zip(self.labelnames, key)), "value": value} for key, value in sorted(self._series.items())]
+
+
+class _Series:
+    __slots__ = ('counts', 'total', 'count', 'recent')
+
+    def __init__(self, n_buckets):
+        self.counts = [0] * (n_buckets + 1)  # 마지막 칸은 +Inf
+        self.total = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=WINDOW)
+
+
+class Histogram(_Metric):
+    """누적 버킷과 최근 측정값 창(window)을 함께 유지하는 히스토그램입니다. 단위는 초입니다."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.buckets))
+            series.counts[bisect.bisect_left(self.buckets, value)] += 1
+            series.total += value
+            series.count += 1
+            series.recent.append(value)
+        self._log(key, value)
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        """with 블록이 걸린 시간을 기록합니다. 예외(Streamlit의 st.rerun 포함)로 끝나도 기록합니다."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    @staticmethod
+    def _quantiles(values):
+        if not values:
+            return {}
+        ordered = sorted(values)
+        return {f"p{int(q * 100)}": ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+    def _prometheus(self):
+        lines = []
+        with self._lock:
+            items = sorted((key, list(s.counts), s.total, s.count) for key, s in self._series.items())
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                le_label = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [le_label])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+    def _snapshot(self):
+        with self._lock:
+            items = sorted((key, s.total, s.count, list(s.recent)) for key, s in self._series.items())
+        return [{"labels": dict(zip(self.labelnames, key)), "count": count, "sum": round(total, 6),
+                 **{name: round(v, 6) for name, v in self._quantiles(recent).items()}} for key, total, count, recent in items]
+
+
+class Registry:
+    """이름으로 지표를 등록하고 찾는 저장소입니다. 같은 이름으로 다시 등록하면 기존 지표를 돌려줍니다."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"지표 '{name}'이(가) 다른 형식으로 이미 등록되어 있습니다.")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def to_prometheus(self):
+        """Prometheus 텍스트 노출 형식(0.0.4)으로 모든 지표를 반환합니다."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            exposed = f"{metric.name}_total" if metric.kind == 'counter' else metric.name
+            lines.append(f"# HELP {exposed} {metric.documentation}")
+            lines.append(f"# TYPE {exposed} {metric.kind}")
+            lines.extend(metric._prometheus())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """{지표 이름: {type, help, series}} 형태의 dict를 반환합니다. 히스토그램에는 최근 백분위수가 들어갑니다."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return {m.name: {"type": m.kind, "help": m.documentation, "series": m._snapshot()} for m in metrics}
+
+    def to_json(self):
+        return json.dumps({"ts": round(time.time(), 3), "metrics": self.snapshot()}, ensure_ascii=False)
+
+
+REGISTRY = Registry()
+
+
+def timed(histogram, **labels):
+    """함수 호출 시간을 histogram에 기록하는 데코레이터입니다."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def configure_event_log(path):
+    """측정값마다 JSON 한 줄을 path에 기록하도록 'gspbl.metrics' 로거를 설정합니다. (프로세스당 한 번)"""
+    if any(getattr(h, '_gspbl_metrics', False) for h in event_logger.handlers):
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    handler = logging.FileHandler(path, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    handler._gspbl_metrics = True
+    event_logger.addHandler(handler)
+    event_logger.setLevel(logging.INFO)
+    event_logger.propagate = False
+
+
+def start_http_exporter(port, registry=REGISTRY, host='0.0.0.0'):
+    """별도 스레드에서 /metrics(Prometheus)와 /metrics.json을 제공하는 HTTP 서버를 시작합니다."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] == '/metrics':
+                body, content_type = registry.to_prometheus(), 'text/plain; version=0.0.4; charset=utf-8'
+            elif self.path.split('?')[0] == '/metrics.json':
+                body, content_type = registry.to_json(), 'application/json; charset=utf-8'
+            else:
+                self.send_error(404)
+                return
+            data = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name='gspbl-metrics', daemon=True).start()
+    return server
+
+
+class SlowRerunProfiler:
+    """재실행을 cProfile로 측정하고, threshold초보다 오래 걸린 경우에만 .prof 파일로 저장합니다.
+
+    cProfile은 동시에 하나만 켤 수 있으므로, 다른 세션이 측정 중이면 이번 재실행은 측정하지 않습니다.
+    저장한 파일은 python -m pstats 또는 snakeviz로 열어볼 수 있습니다.
+    """
+
+    def __init__(self, threshold, directory=DEFAULT_PROFILE_DIR, keep=PROFILE_KEEP):
+        self.threshold = threshold
+        self.directory = directory
+        self.keep = keep
+        self._busy = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """GSPBL_PROFILE_SLOW_MS가 설정되어 있으면 프로파일러를, 아니면 None을 반환합니다."""
+        threshold_ms = os.environ.get('GSPBL_PROFILE_SLOW_MS')
+        if not threshold_ms:
+            return None
+        return cls(float(threshold_ms) / 1000, os.environ.get('GSPBL_PROFILE_DIR') or DEFAULT_PROFILE_DIR)
+
+    @contextlib.contextmanager
+    def profile(self, label):
+        if not self._busy.acquire(blocking=False):
+            yield None
+            return
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield profiler
+        finally:
+            # st.rerun() 등 예외로 끝난 재실행도 걸린 시간에 따라 저장합니다.
+            profiler.disable()
+            elapsed = time.perf_counter() - started
+            try:
+                if elapsed >= self.threshold:
+                    self._dump(profiler, label, elapsed)
+            finally:
+                self._busy.release()
+
+    def _dump(self, profiler, label, elapsed):
+        os.makedirs(self.directory, exist_ok=True)
+        safe_label = ''.join(ch if ch.isalnum() else '_' for ch in label)
+        path = os.path.join(self.directory, f"rerun-{time.strftime('%Y%m%d-%H%M%S')}-{safe_label}-{elapsed * 1000:.0f}ms.prof")
+        profiler.dump_stats(path)
+        # 오래된 파일부터 지워 최근 keep개만 남깁니다.
+        files = sorted((os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.prof')), key=os.path.getmtime)
+        for old in files[:-self.keep]:
+            with contextlib.suppress(OSError):
+                os.remove(old)
+        return path
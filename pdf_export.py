@@ -0,0 +1,296 @@
+"""수업 설계안을 Pretendard 글꼴의 PDF 파일로 만듭니다.
+
+글꼴 파일(2.7MB)은 프로세스당 한 번만 읽고, 문서마다 실제로 사용한 글자만 남긴 부분 글꼴(subset)을 넣습니다.
+글꼴에 없는 이모지(항목 제목의 🎯 등)는 글꼴에 있는 기호(■)로 바꿔 표시합니다.
+"""
+import functools
+import hashlib
+import io
+import os
+import re
+import time
+import unicodedata
+import zlib
+
+from fontTools import subset as ft_subset
+from fontTools.ttLib import TTFont
+
+from excel_export import plan_rows
+
+FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'Pretendard-Regular.ttf')
+FONT_NAME = 'Pretendard-Regular'
+
+# A4 세로 (단위: pt)
+PAGE_WIDTH, PAGE_HEIGHT = 595.28, 841.89
+MARGIN_X, MARGIN_TOP, MARGIN_BOTTOM = 56, 64, 56
+TITLE_SIZE, HEADING_SIZE, BODY_SIZE, FOOTER_SIZE = 18, 13, 10.5, 8.5
+BODY_LEADING = 16
+EMPTY_TEXT = "입력된 내용이 없습니다."
+# 글꼴에 없는 글자 중 비슷한 모양으로 바꿔 쓸 글자 (성취기준 자료의 가운뎃점 등)
+SUBSTITUTES = {'\u22c5': '\u00b7', '\u2219': '\u00b7'}
+# 글꼴에 없는 이모지·기호 대신 쓰는 글자
+SYMBOL_MARK = '\u25a0'
+
+
+# --- 1. 글꼴 읽기와 부분 글꼴 만들기 ---
+class _FontInfo:
+    """원본 글꼴에서 배치 계산에 필요한 정보만 뽑아 둔 것입니다."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        font = TTFont(io.BytesIO(self.data))
+        self.units_per_em = font['head'].unitsPerEm
+        head, os2 = font['head'], font['OS/2']
+        self.bbox = [round(v * 1000 / self.units_per_em) for v in (head.xMin, head.yMin, head.xMax, head.yMax)]
+        self.ascent = round(font['hhea'].ascent * 1000 / self.units_per_em)
+        self.descent = round(font['hhea'].descent * 1000 / self.units_per_em)
+        self.cap_height = round(getattr(os2, 'sCapHeight', font['hhea'].ascent) * 1000 / self.units_per_em)
+        metrics = font['hmtx'].metrics
+        # 글자별 폭 (1000 단위)
+        self.advances = {cp: metrics[name][0] * 1000 / self.units_per_em for cp, name in font.getBestCmap().items()}
+        self.missing_advance = metrics[font.getGlyphOrder()[0]][0] * 1000 / self.units_per_em
+        font.close()
+
+    def width(self, text, size):
+        """글자 크기가 size일 때 text의 폭(pt)을 계산합니다."""
+        advances, missing = self.advances, self.missing_advance
+        return sum(advances.get(ord(ch), missing) for ch in text) * size / 1000
+
+
+@functools.lru_cache(maxsize=1)
+def load_font(path=FONT_PATH):
+    """글꼴을 프로세스당 한 번만 읽습니다."""
+    return _FontInfo(path)
+
+
+class _Subset:
+    """부분 글꼴 데이터와 글자 → 글리프 번호, 글리프 번호 → 폭 정보입니다."""
+
+    def __init__(self, data, glyph_ids, widths, tag):
+        self.data = data
+        self.glyph_ids = glyph_ids
+        self.widths = widths
+        self.tag = tag
+
+
+def font_subset(codepoints, path=FONT_PATH):
+    """codepoints에 해당하는 글리프만 남긴 부분 글꼴을 만듭니다."""
+    info = load_font(path)
+    font = TTFont(io.BytesIO(info.data), lazy=True)
+    options = ft_subset.Options()
+    options.layout_features = []
+    options.hinting = False
+    options.name_IDs = [1, 2, 3, 4, 6]
+    options.drop_tables += ['DSIG', 'GDEF', 'GPOS', 'GSUB']
+    subsetter = ft_subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+
+    output = io.BytesIO()
+    font.save(output)
+    metrics = font['hmtx'].metrics
+    glyph_ids = {cp: font.getGlyphID(name) for cp, name in font.getBestCmap().items()}
+    widths = {font.getGlyphID(name): round(metrics[name][0] * 1000 / info.units_per_em) for name in font.getGlyphOrder()}
+    font.close()
+    # PDF 규칙에 따라 부분 글꼴 이름 앞에 대문자 6자리 태그를 붙입니다.
+    digest = hashlib.sha1(','.join(map(str, sorted(codepoints))).encode()).digest()
+    tag = ''.join(chr(ord('A') + b % 26) for b in digest[:6])
+    return _Subset(output.getvalue(), glyph_ids, widths, tag)
+
+
+def _printable(text, info):
+    """글꼴에 없는 글자를 글꼴에 있는 글자로 바꿉니다.
+
+    비슷한 글자가 있으면 그 글자로, 이모지·기호는 연달아 나오는 것을 묶어 SYMBOL_MARK 하나로 바꿉니다.
+    변형 선택자·ZWJ 같은 보이지 않는 글자는 지우고, 그 밖의 없는 글자는 빈 네모(.notdef)로 표시됩니다.
+    """
+    out = []
+    for ch in text:
+        if out and out[-1] == SYMBOL_MARK and unicodedata.category(ch) in ('Mn', 'Cf'):
+            # 바꾼 이모지에 붙어 있던 변형 선택자·ZWJ는 함께 지웁니다.
+            continue
+        if ord(ch) in info.advances or ch in '\n\t':
+            out.append(ch)
+            continue
+        ch = SUBSTITUTES.get(ch, ch)
+        category = unicodedata.category(ch)
+        if ord(ch) in info.advances or category not in ('So', 'Sk', 'Mn', 'Cf', 'Cs', 'Co'):
+            out.append(ch)
+        elif category in ('So', 'Sk') and (not out or out[-1] != SYMBOL_MARK):
+            out.append(SYMBOL_MARK)
+    return ''.join(out).replace('\t', '    ')
+
+
+# --- 2. 줄 나누기와 페이지 배치 ---
+def _wrap(text, info, size, max_width):
+    """text를 max_width에 맞게 어절 단위로 줄바꿈합니다. 한 어절이 너무 길면 글자 단위로 자릅니다."""
+    lines = []
+    for paragraph in text.replace('\r\n', '\n').split('\n'):
+        line, width = '', 0.0
+        for token in re.findall(r'\S+|\s+', paragraph):
+            token_width = info.width(token, size)
+            if width + token_width <= max_width:
+                line, width = line + token, width + token_width
+                continue
+            if line.strip():
+                lines.append(line.rstrip())
+            line, width = '', 0.0
+            if token.isspace():
+                continue
+            for ch in token:
+                ch_width = info.width(ch, size)
+                if width + ch_width > max_width and line:
+                    lines.append(line)
+                    line, width = '', 0.0
+                line, width = line + ch, width + ch_width
+        lines.append(line.rstrip())
+    return lines
+
+
+def _layout(title, rows, info):
+    """제목과 (항목, 내용) 행을 페이지별 [(글자 크기, x, y, 문자열, 스타일)] 목록으로 배치합니다."""
+    pages, page = [], []
+    top = PAGE_HEIGHT - MARGIN_TOP
+    max_width = PAGE_WIDTH - 2 * MARGIN_X
+    y = top - TITLE_SIZE
+    page.append((TITLE_SIZE, MARGIN_X, y, _printable(title, info), 'title'))
+    y -= 12
+    for heading, content in rows:
+        text = _printable(content, info).strip()
+        lines = _wrap(text, info, BODY_SIZE, max_width) if text else [EMPTY_TEXT]
+        # 항목 제목이 페이지 맨 아래에 홀로 남지 않도록 첫 줄이 들어갈 자리가 없으면 다음 페이지로 넘깁니다.
+        if y - (HEADING_SIZE + 18 + BODY_LEADING) < MARGIN_BOTTOM:
+            pages.append(page)
+            page, y = [], top
+        y -= HEADING_SIZE + 18
+        page.append((HEADING_SIZE, MARGIN_X, y, _printable(heading, info).strip(), 'heading'))
+        y -= 6
+        for line in lines:
+            if y - BODY_LEADING < MARGIN_BOTTOM:
+                pages.append(page)
+                page, y = [], top
+            y -= BODY_LEADING
+            page.append((BODY_SIZE, MARGIN_X, y, line, 'body' if text else 'empty'))
+    pages.append(page)
+    return pages
+
+
+# --- 3. PDF 쓰기 ---
+def _pdf_text(text):
+    """PDF 문자열을 UTF-16BE 16진수 형식으로 씁니다."""
+    return '<FEFF' + text.encode('utf-16-be').hex().upper() + '>'
+
+
+class _PdfWriter:
+    """객체를 모아 교차 참조 표(xref)가 있는 PDF 파일로 씁니다."""
+
+    def __init__(self):
+        self.objects = []
+
+    def reserve(self):
+        self.objects.append(None)
+        return len(self.objects)
+
+    def add(self, body):
+        self.objects.append(body if isinstance(body, bytes) else body.encode('latin-1'))
+        return len(self.objects)
+
+    def set(self, number, body):
+        self.objects[number - 1] = body if isinstance(body, bytes) else body.encode('latin-1')
+
+    def add_stream(self, data, extra=''):
+        compressed = zlib.compress(data, 6)
+        return self.add(f'<< /Length {len(compressed)} /Filter /FlateDecode {extra}>>\nstream\n'.encode('latin-1') + compressed + b'\nendstream')
+
+    def tobytes(self, root, info):
+        out = io.BytesIO()
+        out.write(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+        offsets = []
+        for number, body in enumerate(self.objects, start=1):
+            offsets.append(out.tell())
+            out.write(f'{number} 0 obj\n'.encode('latin-1') + body + b'\nendobj\n')
+        xref = out.tell()
+        out.write(f'xref\n0 {len(self.objects) + 1}\n0000000000 65535 f \n'.encode('latin-1'))
+        out.write(''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode('latin-1'))
+        out.write(f'trailer\n<< /Size {len(self.objects) + 1} /Root {root} 0 R /Info {info} 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode('latin-1'))
+        return out.getvalue()
+
+
+def _to_unicode_cmap(subset):
+    """복사/검색이 되도록 글리프 번호 → 유니코드 대응표(ToUnicode CMap)를 만듭니다."""
+    pairs = sorted((gid, cp) for cp, gid in subset.glyph_ids.items())
+    blocks = []
+    for i in range(0, len(pairs), 100):
+        chunk = pairs[i:i + 100]
+        entries = '\n'.join(f'<{gid:04X}> <{chr(cp).encode("utf-16-be").hex().upper()}>' for gid, cp in chunk)
+        blocks.append(f'{len(chunk)} beginbfchar\n{entries}\nendbfchar')
+    return (
+        '/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n'
+        '/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n'
+        '/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n'
+        '1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange\n'
+        + '\n'.join(blocks) +
+        '\nendcmap\nCMapName currentdict /CMap defineresource pop\nend\nend\n'
+    ).encode('latin-1')
+
+
+def _content_stream(items, subset, footer):
+    ops = []
+    for size, x, y, text, style in items + [footer]:
+        if not text:
+            continue
+        hex_text = ''.join(f'{subset.glyph_ids.get(ord(ch), 0):04X}' for ch in text)
+        if style in ('title', 'heading'):
+            # 굵은 글꼴이 없으므로 윤곽선을 함께 그려 굵게 보이게 합니다.
+            color, render = ('0.10 0.23 0.49 rg 0.10 0.23 0.49 RG' if style == 'heading' else '0 g 0 G'), f'2 Tr {size * 0.025:.3f} w'
+        else:
+            color, render = ('0.45 g' if style in ('empty', 'footer') else '0.1 g'), '0 Tr'
+        ops.append(f'BT {color} {render} /F1 {size} Tf {x:.2f} {y:.2f} Td <{hex_text}> Tj ET')
+        if style == 'heading':
+            ops.append(f'0.75 G 0.6 w {x:.2f} {y - 5:.2f} m {PAGE_WIDTH - MARGIN_X:.2f} {y - 5:.2f} l S')
+    return '\n'.join(ops).encode('latin-1')
+
+
+def build_plan_pdf(plan, title="GSPBL 수업 설계안", font_path=FONT_PATH):
+    """설계안 하나를 PDF 파일(bytes)로 만듭니다."""
+    info = load_font(font_path)
+    pages = _layout(title, plan_rows(plan), info)
+    footers = [f"{i} / {len(pages)}" for i in range(1, len(pages) + 1)]
+
+    used = {ord(ch) for page in pages for item in page for ch in item[3]} | {ord(ch) for text in footers for ch in text}
+    subset = font_subset(frozenset(used), font_path)
+    base_font = f'{subset.tag}+{FONT_NAME}'
+
+    pdf = _PdfWriter()
+    catalog, pages_obj = pdf.reserve(), pdf.reserve()
+    font_file = pdf.add_stream(subset.data, f'/Length1 {len(subset.data)} ')
+    descriptor = pdf.add(
+        f'<< /Type /FontDescriptor /FontName /{base_font} /Flags 4 /FontBBox [{" ".join(map(str, info.bbox))}] '
+        f'/ItalicAngle 0 /Ascent {info.ascent} /Descent {info.descent} /CapHeight {info.cap_height} /StemV 80 /FontFile2 {font_file} 0 R >>'
+    )
+    widths = ' '.join(f'{gid} [{width}]' for gid, width in sorted(subset.widths.items()))
+    cid_font = pdf.add(
+        f'<< /Type /Font /Subtype /CIDFontType2 /BaseFont /{base_font} '
+        f'/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> '
+        f'/FontDescriptor {descriptor} 0 R /CIDToGIDMap /Identity /DW 1000 /W [{widths}] >>'
+    )
+    to_unicode = pdf.add_stream(_to_unicode_cmap(subset))
+    font = pdf.add(
+        f'<< /Type /Font /Subtype /Type0 /BaseFont /{base_font} /Encoding /Identity-H '
+        f'/DescendantFonts [{cid_font} 0 R] /ToUnicode {to_unicode} 0 R >>'
+    )
+
+    page_refs = []
+    for items, footer_text in zip(pages, footers):
+        footer_x = (PAGE_WIDTH - info.width(footer_text, FOOTER_SIZE)) / 2
+        content = pdf.add_stream(_content_stream(items, subset, (FOOTER_SIZE, footer_x, MARGIN_BOTTOM / 2, footer_text, 'footer')))
+        page_refs.append(pdf.add(
+            f'<< /Type /Page /Parent {pages_obj} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+            f'/Resources << /Font << /F1 {font} 0 R >> >> /Contents {content} 0 R >>'
+        ))
+    pdf.set(pages_obj, f'<< /Type /Pages /Kids [{" ".join(f"{ref} 0 R" for ref in page_refs)}] /Count {len(page_refs)} >>')
+    pdf.set(catalog, f'<< /Type /Catalog /Pages {pages_obj} 0 R >>')
+    created = time.strftime('D:%Y%m%d%H%M%S')
+    info_obj = pdf.add(f'<< /Title {_pdf_text(title)} /Producer (GSPBL Navigator) /CreationDate ({created}) >>')
+    return pdf.tobytes(catalog, info_obj)
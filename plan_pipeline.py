@@ -0,0 +1,383 @@
+"""화면 없이 수업 설계안(STEP 1~4)을 한꺼번에 만드는 배치 생성기입니다.
+
+입력 CSV/JSONL의 한 행이 설계안 하나이며, 설계안마다 아래 단계를 차례로 실행합니다.
+    question → public_product → standards → sustained_inquiry → step3(평가·비평·성찰 동시) → feedback(선택)
+입력에 이미 값이 있는 단계(예: project_title)는 AI를 호출하지 않고 건너뜁니다.
+
+끝난 단계는 체크포인트 JSONL에 한 줄씩 기록하므로, 중간에 멈춘 실행을 같은 명령으로 다시 실행하면 남은 단계만 이어서 합니다.
+
+입력 열 (CSV 머리글 또는 JSONL 키, id 외에는 모두 선택):
+    id, keyword, grade_group, project_title, public_product,
+    standards(코드 또는 코드 앞부분, 예: "[4과03-01]; 6사02"), core_competencies, sel_competencies, activities
+    CSV에서 목록은 ';' 또는 '|'로 구분합니다.
+
+사용법:
+    python plan_pipeline.py plans.csv --backend fake --json plans.json --excel plans.xlsx
+    GEMINI_API_KEY=... python plan_pipeline.py plans.jsonl --workers 4 --rate 2
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from excel_export import write_bulk_workbook
+from llm_backends import create_backend, generate_concurrently
+from llm_scheduler import LLMScheduler
+from plan_sections import PLAN_KEYS
+from prompt_builder import (assessment_prompt, critique_prompt, feedback_prompt, public_product_prompt, question_prompt,
+                            reflection_prompt, sustained_inquiry_prompt)
+from recommender import build_recommender
+from standards_index import GRADE_GROUPS, open_index
+from standards_search import CODE_PATTERN, build_search_index
+
+DEFAULT_GRADE_GROUP = "3-4학년군"
+DEFAULT_ACTIVITIES = ("질문 만들기", "자료 및 문헌 조사", "해결 방안 탐색", "산출물 제작", "결과 발표 및 공유")
+RECOMMENDED_STANDARDS = 5
+LIST_FIELDS = ("standards", "core_competencies", "sel_competencies", "activities")
+_LIST_SEPARATOR = re.compile(r'\s*[;|\n]\s*')
+_BULLET = re.compile(r'^\s*(?:[-*•·]|\d+[.)])\s*')
+
+
+class PipelineError(RuntimeError):
+    """설계안 한 개의 한 단계를 완료하지 못했을 때 발생합니다. values에는 그 단계에서 일부 완료한 값이 들어갑니다."""
+
+    def __init__(self, message, values=None):
+        super().__init__(message)
+        self.values = values or {}
+
+
+# --- 1. 입력 읽기 ---
+def _split_list(value):
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v for v in _LIST_SEPARATOR.split(value or '') if v]
+
+
+def normalize_row(row, number):
+    """입력 행의 빈 값과 목록 열을 정리하고, id가 없으면 행 번호로 만듭니다."""
+    row = {key.strip(): value for key, value in row.items() if key and value not in (None, '')}
+    for key in LIST_FIELDS:
+        if key in row:
+            row[key] = _split_list(row[key])
+    row['id'] = str(row.get('id') or f"plan-{number:04d}")
+    row.setdefault('grade_group', DEFAULT_GRADE_GROUP)
+    if row['grade_group'] not in GRADE_GROUPS:
+        raise ValueError(f"{row['id']}: 알 수 없는 학년군입니다: '{row['grade_group']}'")
+    if not (row.get('keyword') or row.get('project_title')):
+        raise ValueError(f"{row['id']}: keyword 또는 project_title이 필요합니다.")
+    return row
+
+
+def read_rows(path):
+    """CSV 또는 JSONL 파일에서 입력 행을 읽어 정리된 dict 목록으로 반환합니다."""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if path.lower().endswith('.jsonl'):
+            raw = [json.loads(line) for line in f if line.strip()]
+        else:
+            raw = list(csv.DictReader(f))
+    rows = [normalize_row(row, number) for number, row in enumerate(raw, start=1)]
+    ids = [row['id'] for row in rows]
+    if len(set(ids)) != len(ids):
+        raise ValueError("입력에 같은 id가 두 번 이상 있습니다.")
+    return rows
+
+
+def row_hash(row):
+    """입력 행 내용의 해시입니다. 체크포인트가 같은 입력에서 나온 것인지 확인하는 데 씁니다."""
+    return hashlib.sha256(json.dumps(row, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+# --- 2. 단계 정의 ---
+def first_suggestion(text):
+    """AI가 한 줄씩 제안한 목록에서 첫 번째 제안을 글머리표 없이 꺼냅니다."""
+    for line in (text or '').splitlines():
+        line = _BULLET.sub('', line).strip().strip('*').strip()
+        if line:
+            return line
+    return ''
+
+
+class Resources:
+    """여러 설계안이 함께 쓰는 성취기준 검색 색인과 추천기입니다. 처음 필요할 때 한 번만 만듭니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._search = self._recommender = None
+
+    def _ensure(self):
+        with self._lock:
+            if self._search is None:
+                index = open_index()
+                self._search = build_search_index(index)
+                self._recommender = build_recommender(index)
+
+    def resolve_standards(self, entries):
+        """코드(또는 코드 앞부분)를 '코드 성취기준' 표시 문자열로 바꿉니다. 코드가 아닌 항목은 그대로 둡니다."""
+        self._ensure()
+        labels = []
+        for entry in entries:
+            if not CODE_PATTERN.match(entry):
+                labels.append(entry)
+                continue
+            docs = self._search.code_prefix(entry)
+            if len(docs) == 0:
+                raise PipelineError(f"성취기준 코드를 찾을 수 없습니다: '{entry}'")
+            labels.extend(self._search.labels[i] for i in docs)
+        return list(dict.fromkeys(labels))
+
+    def recommend(self, query, grade_group, top_k):
+        self._ensure()
+        return [label for label, _, _ in self._recommender.recommend(query, grade_group, top_k=top_k)]
+
+
+def _generate(backend, prompt):
+    try:
+        return backend.generate(prompt.text)
+    except Exception as e:
+        raise PipelineError(f"{prompt.name} 생성 실패: {e}") from e
+
+
+def stage_question(state, backend, resources):
+    if state.get('project_title'):
+        return {}
+    return {'project_title': first_suggestion(_generate(backend, question_prompt(state['keyword'])))}
+
+
+def stage_public_product(state, backend, resources):
+    if state.get('public_product'):
+        return {}
+    return {'public_product': first_suggestion(_generate(backend, public_product_prompt(state)))}
+
+
+def stage_standards(state, backend, resources):
+    if state.get('standards'):
+        return {'selected_standards': resources.resolve_standards(state['standards'])}
+    query = f"{state['project_title']}\n{state.get('public_product', '')}"
+    return {'selected_standards': resources.recommend(query, state['grade_group'], RECOMMENDED_STANDARDS)}
+
+
+def stage_sustained_inquiry(state, backend, resources):
+    if state.get('sustained_inquiry'):
+        return {}
+    return {'sustained_inquiry': _generate(backend, sustained_inquiry_prompt(state, state.get('activities') or DEFAULT_ACTIVITIES))}
+
+
+def stage_step3(state, backend, resources):
+    """평가·비평·성찰 제안은 서로 독립적이므로 동시에 요청합니다."""
+    builders = {'process_assessment': assessment_prompt, 'critique_revision': critique_prompt, 'reflection': reflection_prompt}
+    prompts = {key: build(state).text for key, build in builders.items() if not state.get(key)}
+    values, errors = {}, []
+    for key, text, error in generate_concurrently(backend, prompts, max_workers=len(builders)):
+        if error is None:
+            values[key] = text
+        else:
+            errors.append(f"{key} 생성 실패: {error}")
+    if errors:
+        raise PipelineError("; ".join(errors), values)
+    return values
+
+
+def stage_feedback(state, backend, resources):
+    if state.get('ai_feedback'):
+        return {}
+    return {'ai_feedback': _generate(backend, feedback_prompt(state))}
+
+
+STAGES = (
+    ("question", stage_question),
+    ("public_product", stage_public_product),
+    ("standards", stage_standards),
+    ("sustained_inquiry", stage_sustained_inquiry),
+    ("step3", stage_step3),
+    ("feedback", stage_feedback),
+)
+
+
+def initial_state(row):
+    """입력 행으로 세션 상태와 같은 키를 가진 설계안 상태를 만듭니다."""
+    state = {key: [] if key.startswith('selected_') else '' for key in PLAN_KEYS}
+    state.update(ai_feedback='', grade_group=row['grade_group'], keyword=row.get('keyword', ''),
+                 standards=row.get('standards', []), activities=row.get('activities', []),
+                 selected_core_competencies=row.get('core_competencies', []),
+                 selected_sel_competencies=row.get('sel_competencies', []))
+    for key in PLAN_KEYS + ('ai_feedback',):
+        if isinstance(row.get(key), str):
+            state[key] = row[key]
+    return state
+
+
+# --- 3. 체크포인트 ---
+CHECKPOINT_KEYS = frozenset({'id', 'row_hash', 'stage', 'values'})
+
+
+class Checkpoint:
+    """완료한 단계를 {"id", "row_hash", "stage", "values"} 한 줄씩 추가 기록하는 JSONL 파일입니다."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self):
+        """{설계안 id: (row_hash, {단계: 값})}을 반환합니다.
+
+        중간에 끊겨 깨진 마지막 줄이나 필요한 키(id, row_hash, stage, values)가 없는 기록은 무시합니다.
+        """
+        done = {}
+        if not self.path or not os.path.exists(self.path):
+            return done
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if not isinstance(entry, dict) or not CHECKPOINT_KEYS <= entry.keys() or not isinstance(entry['id'], str):
+                    continue
+                saved_hash, stages = done.setdefault(entry['id'], (entry['row_hash'], {}))
+                if saved_hash != entry['row_hash']:
+                    # 같은 id의 입력이 바뀌었으면 이전 기록을 버리고 새 기록만 씁니다.
+                    done[entry['id']] = (entry['row_hash'], {})
+                done[entry['id']][1][entry['stage']] = entry['values']
+        return done
+
+    def record(self, plan_id, digest, stage, values):
+        if not self.path:
+            return
+        line = json.dumps({"id": plan_id, "row_hash": digest, "stage": stage, "values": values}, ensure_ascii=False)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+# --- 4. 실행 ---
+def run_plan(row, backend, resources=None, checkpoint=None, completed=None, stages=STAGES):
+    """설계안 하나의 남은 단계를 차례로 실행하고 결과 dict를 반환합니다.
+
+    completed는 체크포인트에서 읽은 {단계: 값}이며, 이 단계들은 다시 실행하지 않습니다.
+    실패하면 결과의 status가 'failed'이고 error에 이유가 들어갑니다.
+    """
+    resources = resources or Resources()
+    digest = row_hash(row)
+    state = initial_state(row)
+    completed = completed or {}
+    resumed = 0
+    for name, stage in stages:
+        # 지난 실행에서 일부만 끝난 단계는 끝난 값을 먼저 채우고 나머지만 실행합니다.
+        state.update(completed.get(f"{name}:partial", {}))
+        if name in completed:
+            state.update(completed[name])
+            resumed += 1
+            continue
+        try:
+            values = stage(state, backend, resources)
+        except PipelineError as e:
+            if e.values and checkpoint is not None:
+                checkpoint.record(row['id'], digest, f"{name}:partial", e.values)
+            state.update(e.values)
+            return {"id": row['id'], "status": "failed", "error": str(e), "resumed_stages": resumed, "plan": plan_output(row, state)}
+        state.update(values)
+        if checkpoint is not None:
+            checkpoint.record(row['id'], digest, name, values)
+    return {"id": row['id'], "status": "done", "error": None, "resumed_stages": resumed, "plan": plan_output(row, state)}
+
+
+def plan_output(row, state):
+    """상태에서 내보낼 설계안 항목만 모읍니다. (엑셀 시트 이름에 쓰는 plan_name 포함)"""
+    plan = {key: state[key] for key in PLAN_KEYS}
+    plan.update(plan_name=row['id'], grade_group=state['grade_group'], ai_feedback=state.get('ai_feedback', ''))
+    return plan
+
+
+def run_batch(rows, backend, checkpoint_path=None, max_workers=4, stages=STAGES, on_result=None):
+    """여러 설계안을 최대 max_workers개씩 동시에 생성하고, 입력 순서대로 결과 목록을 반환합니다.
+
+    backend는 generate(prompt)와 model_name을 가진 객체(llm_backends의 백엔드, LLMScheduler 등)입니다.
+    on_result(결과)는 설계안 하나가 끝날 때마다 호출됩니다.
+    설계안 하나에서 예상하지 못한 예외가 나도 나머지는 계속 생성하고, 그 설계안만 실패로 기록합니다.
+    """
+    checkpoint = Checkpoint(checkpoint_path)
+    done = checkpoint.load()
+    resources = Resources()
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='gspbl-plan') as pool:
+        futures = {}
+        for row in rows:
+            saved_hash, completed = done.get(row['id'], (None, {}))
+            completed = completed if saved_hash == row_hash(row) else {}
+            futures[pool.submit(run_plan, row, backend, resources, checkpoint, completed, stages)] = row
+        for future in as_completed(futures):
+            row = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"id": row['id'], "status": "failed", "error": f"{type(e).__name__}: {e}", "resumed_stages": 0,
+                          "plan": plan_output(row, initial_state(row))}
+            results[row['id']] = result
+            if on_result is not None:
+                on_result(result)
+    return [results[row['id']] for row in rows]
+
+
+def write_outputs(results, json_path=None, excel_path=None):
+    """완료한 설계안을 JSON(목록)과 엑셀 통합 문서(설계안마다 시트 하나)로 저장합니다."""
+    plans = [result['plan'] for result in results if result['status'] == 'done']
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(plans, f, ensure_ascii=False, indent=2)
+    if excel_path:
+        write_bulk_workbook(iter(plans), excel_path)
+    return len(plans)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CSV/JSONL 입력으로 수업 설계안을 화면 없이 한꺼번에 생성합니다.")
+    parser.add_argument('input', help="입력 CSV 또는 JSONL 파일")
+    parser.add_argument('--backend', default=None, help="AI 백엔드 이름 (gemini 또는 fake, 기본값: GSPBL_LLM_BACKEND 또는 gemini)")
+    parser.add_argument('--workers', type=int, default=4, help="동시에 생성할 설계안 수")
+    parser.add_argument('--rate', type=float, default=None, help="초당 AI 요청 수 (기본값: GSPBL_AI_RATE 또는 1.0)")
+    parser.add_argument('--checkpoint', default=None, help="체크포인트 JSONL 경로 (기본값: <입력 파일>.checkpoint.jsonl)")
+    parser.add_argument('--no-feedback', action='store_true', help="종합 피드백 단계를 건너뜁니다")
+    parser.add_argument('--json', dest='json_path', default=None, help="생성한 설계안을 저장할 JSON 경로")
+    parser.add_argument('--excel', dest='excel_path', default=None, help="생성한 설계안을 저장할 엑셀 경로")
+    args = parser.parse_args(argv)
+
+    try:
+        rows = read_rows(args.input)
+    except (OSError, ValueError) as e:
+        parser.error(f"입력 파일을 읽을 수 없습니다: {e}")
+    api_key = os.environ.get('GEMINI_API_KEY')
+    backend = create_backend(args.backend, api_key=api_key)
+    if backend.requires_api_key and not api_key:
+        parser.error("Gemini 백엔드를 쓰려면 GEMINI_API_KEY 환경 변수가 필요합니다. (--backend fake로 시험할 수 있습니다)")
+    rate = args.rate if args.rate is not None else float(os.environ.get('GSPBL_AI_RATE', 1.0))
+    scheduler = LLMScheduler(backend, rate=rate, burst=max(1, int(rate)), max_in_flight=args.workers * 3,
+                             max_retries=int(os.environ.get('GSPBL_AI_MAX_RETRIES', 3)), acquire_timeout=600.0,
+                             request_timeout=float(os.environ.get('GSPBL_AI_TIMEOUT', 60.0)))
+    stages = tuple(stage for stage in STAGES if not (args.no_feedback and stage[0] == 'feedback'))
+    checkpoint_path = args.checkpoint or f"{args.input}.checkpoint.jsonl"
+
+    def report(result):
+        resumed = f" (이어서 실행, 완료된 단계 {result['resumed_stages']}개 건너뜀)" if result['resumed_stages'] else ""
+        if result['status'] == 'done':
+            print(f"✅ {result['id']}: {result['plan']['project_title'][:40]}{resumed}", flush=True)
+        else:
+            print(f"⚠️ {result['id']}: {result['error']}", file=sys.stderr, flush=True)
+
+    results = run_batch(rows, scheduler, checkpoint_path, args.workers, stages, on_result=report)
+    count = write_outputs(results, args.json_path, args.excel_path)
+    failed = len(results) - count
+    stats = scheduler.stats()
+    print(f"설계안 {count}/{len(results)}개 완료 (AI 호출 {stats['upstream_calls']}회, 재시도 {stats['retries']}회). 체크포인트: {checkpoint_path}")
+    if failed:
+        print(f"실패한 {failed}개는 같은 명령으로 다시 실행하면 남은 단계부터 이어서 생성합니다.", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
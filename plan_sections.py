@@ -0,0 +1,19 @@
+"""수업 설계안 항목 목록입니다.
+
+STEP 4 화면, AI 프롬프트, 엑셀 내보내기, 자동 저장, 일괄 생성이 모두 같은 순서와 세션 상태 키를 씁니다.
+"""
+
+# 설계안 항목 제목과 세션 상태 키
+PLAN_SECTIONS = (
+    ("🎯 탐구 질문", "project_title"),
+    ("📢 최종 결과물 공개", "public_product"),
+    ("📚 교과 성취기준", "selected_standards"),
+    ("💡 핵심역량", "selected_core_competencies"),
+    ("🌱 사회정서 역량", "selected_sel_competencies"),
+    ("🧭 지속적 탐구", "sustained_inquiry"),
+    ("📈 과정중심 평가", "process_assessment"),
+    ("🗣️ 학생의 의사 & 선택권", "student_voice_choice"),
+    ("🔄 비평과 개선", "critique_revision"),
+    ("🤔 성찰", "reflection"),
+)
+PLAN_KEYS = tuple(key for _, key in PLAN_SECTIONS)
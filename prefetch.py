@@ -0,0 +1,133 @@
+"""다음 단계에서 쓸 가능성이 높은 AI 제안을 미리 요청해 두는 추측 프리페치(speculative prefetch)입니다.
+
+교사가 다음 단계로 넘어갈 때 STEP 3 제안(평가·비평·성찰) 프롬프트를 백그라운드에서 미리 요청하고,
+결과는 세션마다 하나씩 두는 SessionPrefetcher에 보관했다가 버튼을 누르면 바로 꺼내 씁니다.
+- 실제 요청은 모든 세션이 함께 쓰는 PrefetchExecutor에서 실행하며, 작업 스레드 수와 대기 작업 수가 모두 제한됩니다.
+- 프롬프트에 들어간 입력(탐구 질문, 지속적 탐구 등)이 바뀌면 그 요청은 아직 시작하지 않았으면 취소하고, 결과는 버립니다.
+- 세션마다 미리 요청할 수 있는 횟수를 제한해 API 할당량을 아낍니다. 횟수는 실행기에 세션 id별로 세므로 세션 상태를 비워도('처음으로') 이어집니다.
+- 작업 스레드에서는 Streamlit API를 호출하지 않습니다.
+
+설정은 환경 변수로 바꿀 수 있습니다.
+    GSPBL_PREFETCH=1            # 프리페치 켜기 (기본: 꺼짐)
+    GSPBL_PREFETCH_MAX=6        # 세션마다 미리 요청할 수 있는 최대 횟수
+    GSPBL_PREFETCH_WORKERS=2    # 프리페치 작업 스레드 수 (프로세스 전체)
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_LIMIT = 6
+DEFAULT_WORKERS = 2
+PENDING_PER_WORKER = 4
+
+
+def prefetch_enabled():
+    """GSPBL_PREFETCH=1이면 True를 반환합니다."""
+    return os.environ.get('GSPBL_PREFETCH') == '1'
+
+
+class PrefetchExecutor:
+    """작업 스레드 수와 대기 중인 작업 수가 모두 제한된 실행기입니다.
+
+    가득 차면 새 작업을 받지 않고 None을 반환합니다. 추측 요청이므로 버려도 교사가 버튼을 누를 때 평소처럼 요청하면 됩니다.
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, max_pending=None):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gspbl-prefetch')
+        self._slots = threading.BoundedSemaphore(max_pending or max_workers * PENDING_PER_WORKER)
+        self._lock = threading.Lock()
+        self._submitted = {}  # 세션 id -> 미리 요청한 횟수
+
+    @classmethod
+    def from_env(cls):
+        return cls(max_workers=int(os.environ.get('GSPBL_PREFETCH_WORKERS', DEFAULT_WORKERS)))
+
+    def try_submit(self, fn, *args):
+        """자리가 있으면 fn(*args)를 실행하는 Future를, 없으면 None을 반환합니다."""
+        if not self._slots.acquire(blocking=False):
+            return None
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # 취소된 작업도 완료 콜백이 호출되므로 자리는 항상 돌려받습니다.
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def submitted(self, session_id):
+        """세션이 지금까지 미리 요청한 횟수를 반환합니다."""
+        with self._lock:
+            return self._submitted.get(session_id, 0)
+
+    def count_submission(self, session_id):
+        with self._lock:
+            self._submitted[session_id] = self._submitted.get(session_id, 0) + 1
+
+
+class SessionPrefetcher:
+    """한 세션이 미리 요청한 AI 제안을 응답 캐시 키별로 보관합니다.
+
+    요청마다 프롬프트에 들어간 입력 값(fingerprint)을 함께 보관하고, 그 값이 바뀐 요청만 버립니다.
+    꺼낼 때도 캐시 키(프롬프트 전체 + 모델 + 생성 파라미터)가 같아야 하므로, 다른 입력으로 만든 결과가 쓰이는 일은 없습니다.
+    요청 횟수는 executor에 session_id별로 세므로, 같은 세션에서 새로 만들어도 한도가 처음부터 다시 시작하지 않습니다.
+    """
+
+    def __init__(self, executor, session_id=None, limit=DEFAULT_LIMIT):
+        self.executor = executor
+        self.session_id = session_id
+        self.limit = limit
+        self._jobs = {}  # 캐시 키 -> (프롬프트 이름, 입력 값, Future)
+
+    @classmethod
+    def from_env(cls, executor, session_id=None):
+        return cls(executor, session_id, limit=int(os.environ.get('GSPBL_PREFETCH_MAX', DEFAULT_LIMIT)))
+
+    @property
+    def submitted(self):
+        return self.executor.submitted(self.session_id)
+
+    @property
+    def remaining(self):
+        return max(self.limit - self.submitted, 0)
+
+    def pending(self):
+        """아직 끝나지 않은 요청 수를 반환합니다."""
+        return sum(not future.done() for _, _, future in self._jobs.values())
+
+    def discard_stale(self, fingerprints):
+        """{프롬프트 이름: 현재 입력 값}과 입력 값이 달라진 요청을 취소하거나 버리고, 버린 프롬프트 이름 목록을 반환합니다."""
+        stale = [key for key, (name, fingerprint, _) in self._jobs.items() if fingerprints.get(name) != fingerprint]
+        return [self._discard(key) for key in stale]
+
+    def _discard(self, key):
+        name, _, future = self._jobs.pop(key)
+        future.cancel()
+        return name
+
+    def submit(self, generate, prompts):
+        """{캐시 키: (프롬프트 이름, 프롬프트 문자열, 입력 값)} 중 아직 요청하지 않은 것을 executor에 넣습니다.
+
+        세션 한도(limit)를 넘거나 executor가 가득 차면 나머지는 요청하지 않습니다. 요청한 프롬프트 이름 목록을 반환합니다.
+        """
+        started = []
+        for key, (name, prompt, fingerprint) in prompts.items():
+            if key in self._jobs:
+                continue
+            if self.submitted >= self.limit:
+                break
+            future = self.executor.try_submit(generate, prompt)
+            if future is None:
+                break
+            # 같은 이름의 이전 요청은 다른 입력으로 만든 것이므로 버립니다.
+            for old_key in [k for k, (old_name, _, _) in self._jobs.items() if old_name == name]:
+                self._discard(old_key)
+            self._jobs[key] = (name, fingerprint, future)
+            self.executor.count_submission(self.session_id)
+            started.append(name)
+        return started
+
+    def take(self, key):
+        """캐시 키에 해당하는 요청(Future)을 꺼내 반환합니다. 없으면 None을 반환합니다. 꺼낸 요청은 다시 쓰지 않습니다."""
+        job = self._jobs.pop(key, None)
+        return job[2] if job is not None else None
@@ -0,0 +1,286 @@
+"""AI 프롬프트를 만들고 요청마다 정한 토큰 예산 안으로 줄입니다.
+
+성취기준, 역량, 앞 단계의 AI 결과물이 많아지면 프롬프트가 길어져 응답 시간과 비용이 함께 늘어납니다.
+프롬프트를 고정 문장과 맥락 값(Text, Items, Standards)으로 나누어 조립하고, 예산을 넘으면 다음 순서로 줄입니다.
+    1. 목록의 중복 항목 제거 (항상 적용)
+    2. 성취기준을 '코드 + 앞부분'으로 요약한 뒤, 그래도 넘으면 코드만 남김
+    3. 앞 단계 내용(Text)을 긴 것부터 같은 길이로 자름
+
+예산은 GSPBL_PROMPT_BUDGET 환경 변수(양의 정수, 토큰 수)로 모든 프롬프트에 한꺼번에 바꿀 수 있습니다.
+줄이기 전후 크기는 'prompt_builder' 로거에 INFO로 기록하고(앱에서는 GSPBL_LOG_LEVEL로 출력 수준을 정합니다), 반환하는 Prompt에도 담습니다.
+"""
+import functools
+import logging
+import os
+import re
+from typing import NamedTuple
+
+from plan_sections import PLAN_SECTIONS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGET = 1000
+PROMPT_BUDGETS = {"sustained_inquiry": 1500, "feedback": 3000}
+# 매번 다른 아이디어를 요청하는 프롬프트입니다. 같은 응답을 돌려주면 의미가 없으므로 응답 캐시에 넣지 않습니다.
+VARIED_PROMPTS = frozenset({"public_product"})
+STANDARD_SUMMARY_CHARS = 20
+TRUNCATION_MARK = " …(이하 생략)"
+_STANDARD_LABEL = re.compile(r'^\s*(\[[^\]]+\])\s*(.*)$', re.S)
+
+
+def _char_tokens(ch):
+    # 한글·한자 등은 글자당 약 1토큰, 영문·숫자·기호·공백은 4글자당 약 1토큰으로 보수적으로 추정합니다.
+    return 1.0 if ord(ch) >= 0x1100 else 0.25
+
+
+def estimate_tokens(text):
+    """토크나이저 없이 문자 종류로 토큰 수를 추정합니다."""
+    return int(sum(_char_tokens(ch) for ch in text or '') + 0.999)
+
+
+def truncate_text(text, max_tokens):
+    """추정 토큰 수가 max_tokens를 넘지 않도록 뒷부분을 잘라 '…(이하 생략)'을 붙입니다."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max(max_tokens - estimate_tokens(TRUNCATION_MARK), 0)
+    used, end = 0.0, 0
+    for end, ch in enumerate(text):
+        used += _char_tokens(ch)
+        if used > limit:
+            break
+    cut = text[:end]
+    # 가능하면 줄바꿈이나 공백에서 끊습니다.
+    boundary = max(cut.rfind('\n'), cut.rfind(' '))
+    if boundary > len(cut) * 0.7:
+        cut = cut[:boundary]
+    return cut.rstrip() + TRUNCATION_MARK
+
+
+def dedupe(items):
+    """앞뒤 공백을 지운 뒤 순서를 유지하며 빈 항목과 중복 항목을 없앱니다."""
+    return list(dict.fromkeys(s for s in (str(item).strip() for item in items or []) if s))
+
+
+class Text:
+    """앞 단계에서 작성한 글처럼 필요하면 잘라낼 수 있는 맥락 값입니다. min_tokens보다 짧게는 자르지 않습니다."""
+
+    def __init__(self, value, min_tokens=80):
+        self.value = value or ''
+        self.min_tokens = min_tokens
+        self.limit = None
+
+    def render(self, compact=True):
+        return truncate_text(self.value, self.limit) if compact and self.limit is not None else self.value
+
+
+class Items:
+    """역량 목록처럼 중복을 없애 이어 붙이는 맥락 값입니다."""
+
+    def __init__(self, values, sep=", ", bullet=""):
+        self.values = list(values or [])
+        self.sep = sep
+        self.bullet = bullet
+
+    def render(self, compact=True):
+        values = dedupe(self.values) if compact else self.values
+        return self.sep.join(f"{self.bullet}{v}" for v in values)
+
+
+class Standards(Items):
+    """성취기준 목록입니다. level 0은 전체 문장, 1은 코드 + 앞부분, 2는 코드만 씁니다."""
+
+    def __init__(self, values, sep="\n", bullet="- "):
+        super().__init__(values, sep, bullet)
+        self.level = 0
+
+    @staticmethod
+    def _summary(label, level):
+        match = _STANDARD_LABEL.match(label)
+        if not match or level == 0:
+            return label
+        code, text = match.groups()
+        if level == 1 and text:
+            return f"{code} {text[:STANDARD_SUMMARY_CHARS]}…" if len(text) > STANDARD_SUMMARY_CHARS else f"{code} {text}"
+        return code
+
+    def render(self, compact=True):
+        if not compact:
+            return super().render(compact)
+        values = [self._summary(v, self.level) for v in dedupe(self.values)]
+        if self.level >= 2:
+            return ", ".join(dict.fromkeys(values))
+        return self.sep.join(f"{self.bullet}{v}" for v in values)
+
+
+class Prompt(NamedTuple):
+    """조립한 프롬프트와 줄이기 전후의 추정 토큰 수, 적용한 줄이기 단계입니다."""
+    name: str
+    text: str
+    tokens_before: int
+    tokens_after: int
+    budget: int
+    steps: tuple
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_budget(value):
+    """GSPBL_PROMPT_BUDGET 값을 한 번만 해석합니다. 양의 정수가 아니면 경고를 남기고 None을 반환합니다."""
+    try:
+        budget = int(value)
+    except ValueError:
+        budget = 0
+    if budget <= 0:
+        logger.warning("GSPBL_PROMPT_BUDGET=%r 값이 양의 정수가 아니어서 기본 예산을 씁니다.", value)
+        return None
+    return budget
+
+
+def budget_for(name):
+    """프롬프트 종류별 토큰 예산을 반환합니다. GSPBL_PROMPT_BUDGET이 올바른 값이면 그 값을 씁니다."""
+    override = os.environ.get('GSPBL_PROMPT_BUDGET', '').strip()
+    budget = _parse_budget(override) if override else None
+    return budget if budget is not None else PROMPT_BUDGETS.get(name, DEFAULT_BUDGET)
+
+
+def _render(parts, compact=True):
+    return "".join(part if isinstance(part, str) else part.render(compact) for part in parts)
+
+
+def build_prompt(name, parts, budget=None):
+    """고정 문장(str)과 맥락 값을 이어 붙인 프롬프트를 예산 안으로 줄여 Prompt로 반환합니다."""
+    budget = budget_for(name) if budget is None else budget
+    before = estimate_tokens(_render(parts, compact=False))
+    steps = []
+    text = _render(parts)
+    if estimate_tokens(text) < before:
+        steps.append("중복 제거")
+
+    standards = [p for p in parts if isinstance(p, Standards) and p.values]
+    for level, step in ((1, "성취기준 요약"), (2, "성취기준 코드만")):
+        if estimate_tokens(text) <= budget or not standards:
+            break
+        for field in standards:
+            field.level = level
+        text = _render(parts)
+        steps.append(step)
+
+    texts = [p for p in parts if isinstance(p, Text) and estimate_tokens(p.value) > p.min_tokens]
+    if estimate_tokens(text) > budget and texts:
+        # 모든 Text에 같은 상한을 두고, 예산에 맞는 가장 큰 상한을 이분 탐색으로 찾습니다. (긴 항목부터 잘림)
+        def fits(cap):
+            for field in texts:
+                field.limit = max(field.min_tokens, cap)
+            return estimate_tokens(_render(parts)) <= budget
+        lo, hi = 0, max(estimate_tokens(p.value) for p in texts)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if fits(mid):
+                lo = mid
+            else:
+                hi = mid - 1
+        fits(lo)
+        text = _render(parts)
+        steps.append("이전 내용 자르기")
+
+    after = estimate_tokens(text)
+    if after > budget:
+        logger.warning("prompt %s: 최대한 줄여도 예산을 넘습니다 (%d > %d 토큰)", name, after, budget)
+    logger.info("prompt %s: %d → %d 토큰 (예산 %d, %s)", name, before, after, budget, ", ".join(steps) or "줄이지 않음")
+    return Prompt(name, text, before, after, budget, tuple(steps))
+
+
+# --- 단계별 프롬프트 ---
+# state는 Streamlit 세션 상태 또는 같은 키를 가진 dict입니다.
+
+def question_prompt(keyword):
+    """STEP 1: 키워드로 탐구 질문을 제안받는 프롬프트입니다."""
+    return build_prompt("question", [
+        "초등학생 대상 GSPBL 프로젝트를 위한 '탐구 질문'을 생성해줘. 핵심 키워드는 '", Text(keyword), "'야. "
+        "학생들이 흥미를 느끼고 깊이 탐구하고 싶게 만드는, 정답이 없는 질문 5개를 제안해줘. 번호 없이 한 줄씩만.",
+    ])
+
+
+def question_analysis_prompt(state):
+    """STEP 1: 탐구 질문의 유형을 분석하는 프롬프트입니다."""
+    return build_prompt("question_analysis", [
+        "다음은 초등학생 대상 프로젝트 수업의 탐구 질문이야. 이 질문이 어떤 유형(예: 문제 해결형, 원인 탐구형, 창작 표현형, 찬반 논쟁형 등)에 해당하는지 "
+        "분석하고, 왜 그렇게 생각하는지 간략하게 설명해줘.\n\n질문: \"", Text(state.get('project_title')), "\"",
+    ])
+
+
+def public_product_prompt(state):
+    """STEP 1: 최종 결과물 공개 아이디어를 제안받는 프롬프트입니다."""
+    grade_group = state.get('grade_group', '')
+    return build_prompt("public_product", [
+        f"'{grade_group}' 학생들을 위한 GSPBL 프로젝트의 '최종 결과물 공개' 아이디어를 5가지 제안해줘. 이 프로젝트의 탐구 질문은 '",
+        Text(state.get('project_title')),
+        f"'이야. 학생들이 프로젝트 결과를 교실 밖 실제 세상과 공유할 수 있는, **'{grade_group}' 수준에 맞는 창의적이고 다양한 방법**을 제안해줘. "
+        "번호 없이 한 줄씩만, 매번 다른 아이디어를 보여줘.",
+    ])
+
+
+def sustained_inquiry_prompt(state, tags):
+    """STEP 3: 선택한 활동으로 '지속적 탐구' 과정을 설계받는 프롬프트입니다."""
+    return build_prompt("sustained_inquiry", [
+        "당신은 초등 교육과정 설계 전문가입니다. GSPBL 모델에 기반하여 '지속적 탐구' 과정을 구체적으로 설계해주세요.\n\n"
+        "--- 프로젝트 기본 정보 ---\n"
+        "**탐구 질문:** ", Text(state.get('project_title')), "\n"
+        "**최종 결과물:** ", Text(state.get('public_product')), "\n"
+        "**연계 성취기준:**\n", Standards(state.get('selected_standards')), "\n"
+        "**함양할 핵심역량:** ", Items(state.get('selected_core_competencies')), "\n"
+        "**함양할 사회정서역량:** ", Items(state.get('selected_sel_competencies')), "\n"
+        "**포함할 주요 활동:** ", Items(tags), "\n\n"
+        "--- 요구 사항 ---\n"
+        "1. **매우 중요:** 당신이 설계하는 모든 탐구 과정은 최종적으로 위에 명시된 **'최종 결과물'을 완성하고 공개하는 방향으로 논리적으로 이어져야 합니다.**\n"
+        "2. 제시된 **성취기준과 학생 활동 목록의 복잡성**을 보고, 이 프로젝트가 초등학생 발달 단계 중 어느 수준(예: 저학년/중학년/고학년)에 적합한지 **스스로 판단**하여 그 수준에 맞는 구체적인 과정안을 작성해주세요.\n"
+        "3. **답변에 학년(예: 3-4학년)을 직접적으로 언급하지 마세요.** 대신, '학생들은 ~을 할 수 있습니다' 와 같이 활동 중심으로 서술해주세요.\n"
+        "4. 각 단계별로 예상되는 차시와 함께, 학생들이 사용할 만한 구체적인 디지털 도구를 추천해주세요.\n"
+        "5. 전체적인 흐름이 논리적으로 연결되도록 설계해주세요.",
+    ])
+
+
+def assessment_prompt(state):
+    """STEP 3: '과정중심 평가' 제안 프롬프트입니다."""
+    return build_prompt("process_assessment", [
+        "초등학생 대상 GSPBL 프로젝트를 위한 '과정중심 평가' 방법을 5가지 제안해줘.\n"
+        "프로젝트 주제: '", Text(state.get('project_title')), "'\n"
+        "주요 탐구 과정:\n", Text(state.get('sustained_inquiry'), min_tokens=200), "\n\n"
+        "위 내용에 가장 적합한 평가 방법을 구체적인 예시와 함께 제안해줘. 번호 없이 한 줄씩만.",
+    ])
+
+
+def critique_prompt(state):
+    """STEP 3: '비평과 개선' 제안 프롬프트입니다."""
+    return build_prompt("critique_revision", [
+        "초등학생 대상 GSPBL 프로젝트를 위한 '비평과 개선(Critique & Revision)' 활동 아이디어를 5가지 제안해줘. 이 프로젝트의 주제는 '",
+        Text(state.get('project_title')), "'이고, 최종 결과물은 '", Text(state.get('public_product')), "'이야. "
+        "학생들이 서로 의미 있는 피드백을 주고받고, 자신의 결과물을 발전시킬 수 있는 구체적이고 창의적인 방법을 제안해줘. 번호 없이 한 줄씩만.",
+    ])
+
+
+def reflection_prompt(state):
+    """STEP 3: '성찰' 제안 프롬프트입니다."""
+    return build_prompt("reflection", [
+        "초등학생 대상 GSPBL 프로젝트를 위한 '성찰(Reflection)' 활동 아이디어를 5가지 제안해줘. 이 프로젝트의 주제는 '",
+        Text(state.get('project_title')), "'이야. "
+        "학생들이 프로젝트 과정 전반에 걸쳐 자신의 학습, 성장, 느낀 점을 의미 있게 돌아볼 수 있는 구체적이고 창의적인 방법을 제안해줘. 번호 없이 한 줄씩만.",
+    ])
+
+
+def feedback_prompt(state):
+    """STEP 4: 설계안 전체에 대한 종합 피드백 프롬프트입니다."""
+    parts = [
+        "당신은 GSPBL(Gold Standard Project Based Learning) 전문가입니다.\n다음은 한 초등학교 선생님이 작성한 프로젝트 수업 설계안입니다.\n"
+        "GSPBL의 7가지 필수 요소와 과정중심 평가, 핵심역량, 사회정서 역량 함양 계획이 잘 반영되었는지 분석해주세요.\n"
+        "각 요소별로 강점과 함께, 더 발전시키면 좋을 보완점을 구체적인 예시를 들어 친절하게 컨설팅해주세요.\n\n--- 설계안 내용 ---\n",
+    ]
+    for title, key in PLAN_SECTIONS:
+        content = state.get(key, "")
+        if key == "selected_standards":
+            field = Standards(content, bullet="• ")
+        elif isinstance(content, (list, tuple)):
+            field = Items(content, sep="\n", bullet="• ")
+        else:
+            field = Text(content, min_tokens=150)
+        parts += [f"### {title}\n", field, "\n\n"]
+    return build_prompt("feedback", parts)
@@ -0,0 +1,114 @@
+"""탐구 질문과 최종 결과물 문장으로 관련 성취기준을 추천합니다.
+
+성취기준 문장(과 영역 설명)을 글자 n-gram TF-IDF 벡터로 만들어 두고, 질의 벡터와의 코사인 유사도로 순위를 매깁니다.
+AI 호출 없이 NumPy 연산만으로 수 밀리초 안에 계산됩니다.
+"""
+import math
+import re
+import unicodedata
+from collections import Counter
+
+import numpy as np
+
+NGRAM_SIZES = (2, 3)
+DESCRIPTION_WEIGHT = 0.5  # 영역 설명은 여러 성취기준이 함께 쓰므로 성취기준 문장보다 낮은 비중을 둡니다.
+_NON_WORD = re.compile(r'[^0-9a-z가-힣ㄱ-ㅎㅏ-ㅣ]+')
+
+
+def char_ngrams(text):
+    """어절 양 끝에 공백을 붙여 글자 2-gram, 3-gram을 셉니다."""
+    text = _NON_WORD.sub(' ', unicodedata.normalize('NFC', text or '').lower())
+    counts = Counter()
+    for word in text.split():
+        padded = f" {word} "
+        for n in NGRAM_SIZES:
+            counts.update(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return counts
+
+
+class StandardsRecommender:
+    """전체 학년군 성취기준의 TF-IDF 행렬(열 우선 압축 형식)을 들고 있는 추천기입니다."""
+
+    def __init__(self, records_by_group):
+        self.labels, self.subjects, self.groups = [], [], {}
+        doc_terms = []
+        for grade_group, records in records_by_group.items():
+            start, seen = len(self.labels), set()
+            for item in records:
+                if not (item.get('교과') and item.get('성취기준_코드') and item.get('성취기준')):
+                    continue
+                label = f"{item['성취기준_코드']} {item['성취기준']}"
+                if label in seen:  # 원본 자료에 같은 성취기준이 두 번 들어 있는 경우가 있습니다.
+                    continue
+                seen.add(label)
+                self.labels.append(label)
+                self.subjects.append(item['교과'])
+                weights = Counter({gram: float(count) for gram, count in char_ngrams(item['성취기준']).items()})
+                for gram, count in char_ngrams(item.get('성취기준_설명', '')).items():
+                    weights[gram] += DESCRIPTION_WEIGHT * count
+                doc_terms.append(weights)
+            self.groups[grade_group] = (start, len(self.labels))
+
+        self.vocabulary = {}
+        terms, docs, values = [], [], []
+        for doc, weights in enumerate(doc_terms):
+            for gram, weight in weights.items():
+                terms.append(self.vocabulary.setdefault(gram, len(self.vocabulary)))
+                docs.append(doc)
+                values.append(1 + math.log(weight) if weight >= 1 else weight)
+        terms = np.asarray(terms, dtype=np.int64)
+        docs = np.asarray(docs, dtype=np.int32)
+        values = np.asarray(values, dtype=np.float32)
+
+        n_docs = len(self.labels)
+        df = np.bincount(terms, minlength=len(self.vocabulary))
+        self.idf = (np.log((1 + n_docs) / (1 + df)) + 1).astype(np.float32)
+        values *= self.idf[terms]
+        norms = np.sqrt(np.bincount(docs, weights=values * values, minlength=n_docs)).astype(np.float32)
+        values /= norms[docs]
+
+        # 단어(열)별로 모아 두면 질의에 나온 n-gram의 문서 목록만 빠르게 꺼낼 수 있습니다.
+        order = np.argsort(terms, kind='stable')
+        self._docs = docs[order]
+        self._values = values[order]
+        self._term_ptr = np.concatenate(([0], np.cumsum(df))).astype(np.int64)
+        self._subjects = np.asarray(self.subjects, dtype=object)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def scores(self, query):
+        """모든 성취기준에 대한 질의와의 코사인 유사도 배열을 반환합니다."""
+        n_docs = len(self.labels)
+        counts = [(self.vocabulary[gram], count) for gram, count in char_ngrams(query).items() if gram in self.vocabulary]
+        if not counts:
+            return np.zeros(n_docs, dtype=np.float32)
+        term_ids = np.fromiter((t for t, _ in counts), dtype=np.int64, count=len(counts))
+        weights = np.fromiter((1 + math.log(c) for _, c in counts), dtype=np.float32, count=len(counts)) * self.idf[term_ids]
+        weights /= np.linalg.norm(weights)
+        starts, ends = self._term_ptr[term_ids], self._term_ptr[term_ids + 1]
+        lengths = ends - starts
+        positions = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths) + np.arange(lengths.sum())
+        contributions = self._values[positions] * np.repeat(weights, lengths)
+        return np.bincount(self._docs[positions], weights=contributions, minlength=n_docs).astype(np.float32)
+
+    def recommend(self, query, grade_group, top_k=10, subjects=None, min_score=0.02):
+        """학년군 안에서 질의와 가장 비슷한 성취기준을 (표시 문자열, 교과, 유사도) 목록으로 반환합니다.
+
+        subjects를 주면 해당 교과의 성취기준만 추천합니다.
+        """
+        start, end = self.groups[grade_group]
+        scores = self.scores(query)[start:end]
+        if subjects is not None:
+            scores = np.where(np.isin(self._subjects[start:end], list(subjects)), scores, 0)
+        k = min(top_k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self.labels[start + i], self.subjects[start + i], float(scores[i])) for i in top if scores[i] >= min_score]
+
+
+def build_recommender(index):
+    """성취기준 인덱스(standards_index.StandardsIndex)의 모든 학년군으로 추천기를 만듭니다."""
+    return StandardsRecommender({grade_group: index.records(grade_group) for grade_group in index.grade_groups})
@@ -0,0 +1,363 @@
+"""성취기준 데이터를 하나의 압축 인덱스 파일로 미리 빌드하고 mmap으로 읽어옵니다.
+
+사용법 (배포 전 오프라인 빌드):
+    python standards_index.py            # data/standards_index.bin 생성
+    python standards_index.py --check    # 인덱스가 최신인지 확인만 합니다
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+
+# --- 1. 상수 정의 ---
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+INDEX_FILENAME = 'standards_index.bin'
+GRADE_GROUPS = ("1-2학년군", "3-4학년군", "5-6학년군")
+
+# 인덱스에 저장하는 필드 순서 (앞의 4개는 필수, 뒤의 2개는 있는 경우에만 값이 채워집니다)
+FIELDS = ("학년군", "교과", "성취기준_코드", "성취기준", "영역", "성취기준_설명")
+OPTIONAL_FIELDS = frozenset({"영역", "성취기준_설명"})
+
+MAGIC = b'GSIX'
+FORMAT_VERSION = 1
+# magic, version, 필드 수, 원본 해시(sha256), 학년군 수, 레코드 수
+_HEADER = struct.Struct('<4sHH32sII')
+# 학년군 이름 (offset, length), 레코드 시작/끝 번호
+_GROUP = struct.Struct('<IIII')
+# 레코드의 각 필드는 문자열 영역 안의 (offset, length) 쌍으로 저장됩니다.
+_SPAN = struct.Struct('<II')
+
+
+# --- 2. 원본 데이터 파싱 ---
+def parse_5_6_standards_text(text_content):
+    """5-6학년군 텍스트 형식의 성취기준을 JSON 형식으로 파싱합니다."""
+    parsed_data = []
+    subject_map = { '국': '국어', '사': '사회', '도': '도덕', '수': '수학', '과': '과학', '실': '실과', '체': '체육', '음': '음악', '미': '미술', '영': '영어' }
+    pattern = re.compile(r'\[(6([가-힣]{1,2})\d{2}-\d{2})\]\s(.+)')
+    lines = text_content.split('\n')
+    for line in lines:
+        match = pattern.match(line.strip())
+        if match:
+            full_code, subject_abbr, standard_text = match.groups()
+            subject_full = subject_map.get(subject_abbr)
+            if subject_full:
+                parsed_data.append({ "학년군": "5~6", "교과": subject_full, "성취기준_코드": f"[{full_code}]", "성취기준": standard_text.strip() })
+    return parsed_data
+
+
+def source_path(grade_group, data_dir=DATA_DIR):
+    """학년군에 해당하는 원본 JSON 파일 경로를 반환합니다."""
+    return os.path.join(data_dir, f"{grade_group}_성취기준.json")
+
+
+def read_source_records(grade_group, data_dir=DATA_DIR):
+    """원본 JSON 파일을 읽어 성취기준 레코드 목록을 반환합니다."""
+    with open(source_path(grade_group, data_dir), 'r', encoding='utf-8-sig') as f:
+        data = json.load(f)
+    # 5-6학년군 텍스트 파일 특별 처리
+    if isinstance(data, dict) and 'content' in data:
+        return parse_5_6_standards_text(data['content'])
+    if isinstance(data, list):
+        return data
+    raise ValueError(f"'{source_path(grade_group, data_dir)}' 파일의 형식이 올바르지 않습니다.")
+
+
+_ATTRIBUTES = dict(zip(FIELDS, ('grade_group', 'subject', 'code', 'text', 'area', 'description')))
+_MISSING = object()
+
+
+def _as_text(value):
+    return value if isinstance(value, str) else ("" if value is None else str(value))
+
+
+class Standard:
+    """성취기준 하나를 담는 불변 레코드입니다.
+
+    모든 세션이 복사본 대신 같은 레코드를 함께 쓰도록 dict 대신 사용합니다. 반복되는 학년군·교과·영역 문자열은 intern합니다.
+    기존 코드와 호환되도록 item['교과'], item.get('영역', '')처럼 원본 JSON의 필드 이름으로도 읽을 수 있습니다.
+    """
+
+    __slots__ = ('grade_group', 'subject', 'code', 'text', 'area', '_description')
+
+    def __init__(self, grade_group, subject, code, text, area="", description=""):
+        for name, value in zip(Standard.__slots__, (grade_group, subject, code, text, area, description)):
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_dict(cls, item):
+        """원본 JSON의 dict 레코드를 Standard로 바꿉니다."""
+        grade_group, subject, code, text, area, description = (_as_text(item.get(field)) for field in FIELDS)
+        return cls(sys.intern(grade_group), sys.intern(subject), code, text, sys.intern(area), description)
+
+    @property
+    def description(self):
+        return self._description
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"성취기준 레코드는 바꿀 수 없습니다. ('{name}')")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"성취기준 레코드는 바꿀 수 없습니다. ('{name}')")
+
+    def __reduce__(self):
+        return Standard, (self.grade_group, self.subject, self.code, self.text, self.area, self.description)
+
+    def get(self, field, default=None):
+        """원본 필드 이름으로 값을 읽습니다. 값이 없는 선택 필드(영역, 성취기준_설명)는 default를 반환합니다."""
+        attribute = _ATTRIBUTES.get(field)
+        if attribute is None:
+            return default
+        value = getattr(self, attribute)
+        return value if value or field not in OPTIONAL_FIELDS else default
+
+    def __getitem__(self, field):
+        value = self.get(field, _MISSING)
+        if value is _MISSING:
+            raise KeyError(field)
+        return value
+
+    def __contains__(self, field):
+        return self.get(field, _MISSING) is not _MISSING
+
+    def as_dict(self):
+        """원본 JSON과 같은 dict 형태로 반환합니다."""
+        return {field: self[field] for field in FIELDS if field in self}
+
+    def __repr__(self):
+        return f"Standard({self.grade_group!r}, {self.subject!r}, {self.code!r}, {self.text!r})"
+
+
+def compact_records(items):
+    """원본 JSON의 dict 레코드 목록을 여러 세션이 공유할 수 있는 불변 Standard 튜플로 바꿉니다."""
+    return tuple(Standard.from_dict(item) for item in items)
+
+
+def source_digest(data_dir=DATA_DIR):
+    """모든 원본 파일 내용과 인덱스 형식 버전으로 sha256 해시를 계산합니다."""
+    h = hashlib.sha256(f"{FORMAT_VERSION}:{','.join(FIELDS)}".encode('utf-8'))
+    for grade_group in GRADE_GROUPS:
+        with open(source_path(grade_group, data_dir), 'rb') as f:
+            content = f.read()
+        h.update(grade_group.encode('utf-8'))
+        h.update(struct.pack('<Q', len(content)))
+        h.update(content)
+    return h.digest()
+
+
+# --- 3. 인덱스 빌드 ---
+def build_index(data_dir=DATA_DIR, index_path=None):
+    """모든 학년군의 성취기준을 하나의 인덱스 파일로 빌드하고 경로를 반환합니다."""
+    index_path = index_path or default_index_path(data_dir)
+    digest = source_digest(data_dir)
+
+    blob = bytearray()
+    offsets = {}
+
+    def intern(text):
+        # 교과, 학년군, 영역처럼 반복되는 문자열은 한 번만 저장합니다.
+        text = text if isinstance(text, str) else ("" if text is None else str(text))
+        if text not in offsets:
+            encoded = text.encode('utf-8')
+            offsets[text] = (len(blob), len(encoded))
+            blob.extend(encoded)
+        return offsets[text]
+
+    groups, records = [], []
+    for grade_group in GRADE_GROUPS:
+        start = len(records)
+        for item in read_source_records(grade_group, data_dir):
+            records.append([intern(item.get(field, "")) for field in FIELDS])
+        groups.append((intern(grade_group), start, len(records)))
+
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, len(FIELDS), digest, len(groups), len(records))]
+    parts.extend(_GROUP.pack(name[0], name[1], start, end) for name, start, end in groups)
+    parts.extend(_SPAN.pack(*span) for record in records for span in record)
+    parts.append(bytes(blob))
+
+    # 다른 프로세스가 읽는 중에도 안전하도록 임시 파일에 쓴 뒤 교체합니다.
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(b''.join(parts))
+    os.replace(tmp_path, index_path)
+    return index_path
+
+
+def subject_standards(records):
+    """레코드를 교과별 (표시 문자열 튜플, 표시 문자열 집합)으로 묶습니다."""
+    grouped = {}
+    for item in records:
+        if item.get('교과') and item.get('성취기준_코드') and item.get('성취기준'):
+            grouped.setdefault(item['교과'], []).append(f"{item['성취기준_코드']} {item['성취기준']}")
+    return {subject: (tuple(options), frozenset(options)) for subject, options in grouped.items()}
+
+
+def merge_selection(selected, current_options, picked):
+    """다른 과목의 선택은 유지하고 현재 과목의 선택만 picked로 바꾼 정렬된 목록을 반환합니다.
+
+    current_options는 현재 과목 성취기준의 집합이며, 바뀐 것이 없으면 selected를 그대로 돌려줍니다.
+    """
+    merged = dict.fromkeys(s for s in selected if s not in current_options)
+    merged.update(dict.fromkeys(picked))
+    if len(merged) == len(selected) and merged.keys() == set(selected):
+        return selected
+    return sorted(merged)
+
+
+def default_index_path(data_dir=DATA_DIR):
+    """인덱스 파일 경로를 반환합니다. GSPBL_INDEX_PATH 환경 변수로 바꿀 수 있습니다."""
+    return os.environ.get('GSPBL_INDEX_PATH') or os.path.join(data_dir, INDEX_FILENAME)
+
+
+# --- 4. 인덱스 읽기 ---
+class IndexedStandard(Standard):
+    """인덱스에서 읽은 성취기준 레코드입니다. STEP 2에서 보여주지 않는 긴 성취기준_설명은 메모리에 두지 않고 읽을 때마다 인덱스에서 가져옵니다."""
+
+    __slots__ = ('_index', '_position')
+
+    def __init__(self, index, position, grade_group, subject, code, text, area):
+        super().__init__(grade_group, subject, code, text, area)
+        object.__setattr__(self, '_index', index)
+        object.__setattr__(self, '_position', position)
+
+    @property
+    def description(self):
+        return self._index.field(self._position, "성취기준_설명")
+
+
+class StandardsIndex:
+    """mmap으로 연 읽기 전용 성취기준 인덱스입니다."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, n_fields, digest, n_groups, n_records = _HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC or version != FORMAT_VERSION or n_fields != len(FIELDS):
+                raise ValueError(f"'{path}' 파일은 지원하지 않는 인덱스 형식입니다.")
+            self.digest = digest
+            self._records_offset = _HEADER.size + n_groups * _GROUP.size
+            self._blob_offset = self._records_offset + n_records * n_fields * _SPAN.size
+            self._groups = {}
+            self._by_subject = {}
+            self._records = {}
+            self._strings = {}
+            self._lock = threading.Lock()
+            for i in range(n_groups):
+                name_off, name_len, start, end = _GROUP.unpack_from(self._mm, _HEADER.size + i * _GROUP.size)
+                self._groups[self._text(name_off, name_len)] = (start, end)
+        except (struct.error, ValueError):
+            self._mm.close()
+            raise
+
+    def _text(self, offset, length):
+        start = self._blob_offset + offset
+        return self._mm[start:start + length].decode('utf-8')
+
+    def _span(self, i, j):
+        return _SPAN.unpack_from(self._mm, self._records_offset + (i * len(FIELDS) + j) * _SPAN.size)
+
+    def _shared_text(self, offset, length):
+        # 빌드할 때 같은 문자열은 같은 위치에 한 번만 저장했으므로, 위치가 같으면 같은 문자열 객체를 돌려줍니다.
+        text = self._strings.get(offset)
+        if text is None:
+            text = self._strings[offset] = sys.intern(self._text(offset, length))
+        return text
+
+    def field(self, i, field):
+        """i번째 레코드의 필드 하나를 읽습니다."""
+        return self._text(*self._span(i, FIELDS.index(field)))
+
+    @property
+    def grade_groups(self):
+        return tuple(self._groups)
+
+    def __len__(self):
+        return sum(end - start for start, end in self._groups.values())
+
+    def record(self, i):
+        """i번째 레코드를 원본 JSON과 같은 dict 형태로 반환합니다."""
+        item = {}
+        for j, field in enumerate(FIELDS):
+            offset, length = self._span(i, j)
+            if length or field not in OPTIONAL_FIELDS:
+                item[field] = self._text(offset, length)
+        return item
+
+    def _standard(self, i):
+        grade_group, subject, code, text, area, _ = (self._span(i, j) for j in range(len(FIELDS)))
+        return IndexedStandard(self, i, self._shared_text(*grade_group), self._shared_text(*subject),
+                               self._text(*code), self._text(*text), self._shared_text(*area))
+
+    def records(self, grade_group):
+        """학년군의 성취기준을 불변 Standard 튜플로 반환합니다. 프로세스당 한 번만 만들고 모든 세션이 같은 튜플을 씁니다."""
+        records = self._records.get(grade_group)
+        if records is None:
+            with self._lock:
+                records = self._records.get(grade_group)
+                if records is None:
+                    start, end = self._groups[grade_group]
+                    records = self._records[grade_group] = tuple(self._standard(i) for i in range(start, end))
+        return records
+
+    def subject_standards(self, grade_group):
+        """학년군의 교과별 성취기준 목록을 처음 요청할 때 한 번만 만들어 재사용합니다."""
+        by_subject = self._by_subject.get(grade_group)
+        if by_subject is None:
+            by_subject = self._by_subject[grade_group] = subject_standards(self.records(grade_group))
+        return by_subject
+
+    def close(self):
+        self._mm.close()
+
+
+def open_index(data_dir=DATA_DIR, index_path=None, rebuild=True):
+    """원본 해시가 일치하는 인덱스를 엽니다. 없거나 오래된 경우 rebuild=True이면 다시 빌드합니다."""
+    index_path = index_path or default_index_path(data_dir)
+    digest = source_digest(data_dir)
+    if os.path.exists(index_path):
+        try:
+            index = StandardsIndex(index_path)
+        except (OSError, ValueError, struct.error):
+            index = None
+        if index is not None:
+            if index.digest == digest:
+                return index
+            index.close()
+    if not rebuild:
+        raise ValueError(f"'{index_path}' 인덱스가 없거나 원본 데이터와 일치하지 않습니다.")
+    return StandardsIndex(build_index(data_dir, index_path))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="성취기준 인덱스를 빌드합니다.")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="원본 JSON이 있는 폴더")
+    parser.add_argument('--output', default=None, help="인덱스 파일 경로 (기본값: data/standards_index.bin)")
+    parser.add_argument('--check', action='store_true', help="빌드하지 않고 인덱스가 최신인지 확인만 합니다")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        try:
+            index = open_index(args.data_dir, args.output, rebuild=False)
+        except (OSError, ValueError) as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(f"'{index.path}' 인덱스가 최신입니다. ({len(index)}개 성취기준)")
+        index.close()
+        return 0
+
+    path = build_index(args.data_dir, args.output)
+    index = StandardsIndex(path)
+    counts = ", ".join(f"{g} {len(index.records(g))}개" for g in index.grade_groups)
+    print(f"'{path}' 인덱스를 생성했습니다. ({counts}, {os.path.getsize(path):,} bytes)")
+    index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
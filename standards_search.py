@@ -0,0 +1,155 @@
+"""모든 학년군의 성취기준을 한 번에 찾는 역색인(inverted index) 검색입니다.
+
+- 본문 검색: 한글에 맞게 어절을 글자 2개씩(bigram) 잘라 색인하고 BM25로 순위를 매깁니다.
+- 코드 검색: '[4과03', '6사', '2슬02-03'처럼 성취기준 코드의 앞부분만 입력해도 찾습니다.
+- 둘을 섞은 '6사 기후' 같은 질의는 코드로 범위를 좁힌 뒤 본문 점수로 정렬합니다.
+"""
+import bisect
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+import numpy as np
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+CODE_PATTERN = re.compile(r'^\[?(\d[가-힣]*\d*(?:-\d*)?)\]?$')
+_NON_WORD = re.compile(r'[^0-9a-z가-힣ㄱ-ㅎㅏ-ㅣ]+')
+
+
+def normalize_code(code):
+    """'[4과03-01]' → '4과03-01' 처럼 대괄호와 공백을 지웁니다."""
+    return re.sub(r'[\[\]\s]', '', code or '')
+
+
+def tokenize(text):
+    """어절마다 글자 2개씩 잘라(bigram) 토큰 목록을 만듭니다. 한 글자 어절은 그대로 씁니다."""
+    tokens = []
+    for word in _NON_WORD.sub(' ', unicodedata.normalize('NFC', text or '').lower()).split():
+        if len(word) == 1:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+class StandardsSearchIndex:
+    """성취기준 본문 bigram 역색인과 정렬된 코드 목록으로 이루어진 검색 색인입니다."""
+
+    def __init__(self, records_by_group):
+        self.labels, self.grade_groups, self.subjects, codes = [], [], [], []
+        doc_tokens, seen = [], set()
+        for grade_group, records in records_by_group.items():
+            for item in records:
+                if not (item.get('교과') and item.get('성취기준_코드') and item.get('성취기준')):
+                    continue
+                label = f"{item['성취기준_코드']} {item['성취기준']}"
+                if label in seen:  # 원본 자료에 같은 성취기준이 두 번 들어 있는 경우가 있습니다.
+                    continue
+                seen.add(label)
+                self.labels.append(label)
+                self.grade_groups.append(grade_group)
+                self.subjects.append(item['교과'])
+                codes.append(normalize_code(item['성취기준_코드']).lower())
+                doc_tokens.append(Counter(tokenize(f"{item['성취기준']} {item['교과']} {item.get('영역', '')}")))
+
+        # 본문 색인: 토큰마다 (문서 번호 배열, 미리 계산한 BM25 가중치 배열)을 저장합니다.
+        n_docs = len(doc_tokens)
+        lengths = np.array([sum(c.values()) for c in doc_tokens], dtype=np.float32)
+        avg_length = float(lengths.mean()) if n_docs else 1.0
+        postings = defaultdict(list)
+        for doc, counts in enumerate(doc_tokens):
+            for token, tf in counts.items():
+                postings[token].append((doc, tf))
+        self._postings = {}
+        for token, entries in postings.items():
+            docs = np.fromiter((d for d, _ in entries), dtype=np.int32, count=len(entries))
+            tfs = np.fromiter((tf for _, tf in entries), dtype=np.float32, count=len(entries))
+            idf = math.log(1 + (n_docs - len(entries) + 0.5) / (len(entries) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[docs] / avg_length)
+            self._postings[token] = (docs, (idf * tfs * (BM25_K1 + 1) / (tfs + norm)).astype(np.float32))
+        self._tokens = sorted(self._postings)
+
+        # 코드 색인: 정렬된 코드 목록에서 이진 탐색으로 접두어 범위를 찾습니다.
+        order = sorted(range(n_docs), key=lambda i: codes[i])
+        self._codes = [codes[i] for i in order]
+        self._code_docs = np.array(order, dtype=np.int32)
+        self._grade_groups = np.array(self.grade_groups, dtype=object)
+        self._subjects = np.array(self.subjects, dtype=object)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def code_prefix(self, prefix):
+        """코드가 prefix로 시작하는 문서 번호 배열을 코드 순서대로 반환합니다."""
+        prefix = normalize_code(prefix).lower()
+        lo = bisect.bisect_left(self._codes, prefix)
+        hi = bisect.bisect_left(self._codes, prefix + '\U0010ffff')
+        return self._code_docs[lo:hi]
+
+    def _token_postings(self, token):
+        if token in self._postings:
+            return [self._postings[token]]
+        if len(token) == 1:
+            # 한 글자 질의는 그 글자로 시작하는 bigram들을 모두 찾습니다.
+            lo = bisect.bisect_left(self._tokens, token)
+            hi = bisect.bisect_left(self._tokens, token + '\U0010ffff')
+            return [self._postings[t] for t in self._tokens[lo:hi]]
+        return []
+
+    def search(self, query, top_k=20, grade_group=None, subject=None, min_coverage=0.5):
+        """질의와 맞는 성취기준을 점수 순으로 (표시 문자열, 학년군, 교과, 점수) 목록으로 반환합니다.
+
+        본문 검색어는 글자 2개 토큰 중 min_coverage 비율 이상이 들어 있는 성취기준만 결과에 넣습니다.
+        """
+        n_docs = len(self.labels)
+        allowed, code_terms, text_terms = None, [], []
+        for term in (query or '').split():
+            matches = self.code_prefix(term) if CODE_PATTERN.match(term) else ()
+            if len(matches) == 0:
+                # '6학년'처럼 코드 모양이지만 맞는 코드가 없으면 본문 검색어로 씁니다.
+                text_terms.append(term)
+                continue
+            if allowed is None:
+                allowed = np.zeros(n_docs, dtype=bool)
+            allowed[matches] = True
+            code_terms.append(term)
+        if grade_group is not None or subject is not None:
+            mask = np.ones(n_docs, dtype=bool)
+            if grade_group is not None:
+                mask &= self._grade_groups == grade_group
+            if subject is not None:
+                mask &= self._subjects == subject
+            allowed = mask if allowed is None else allowed & mask
+
+        tokens = list(dict.fromkeys(tokenize(' '.join(text_terms))))
+        if tokens:
+            lists = [self._token_postings(token) for token in tokens]
+            flat = [p for postings in lists for p in postings]
+            if not flat:
+                return []
+            docs = np.concatenate([d for d, _ in flat])
+            scores = np.bincount(docs, weights=np.concatenate([w for _, w in flat]), minlength=n_docs)
+            # 질의 토큰의 일정 비율 이상을 포함한 문서만 남겨, 흔한 bigram 하나만 겹치는 결과를 걸러냅니다.
+            matched = np.bincount(np.concatenate([np.unique(np.concatenate([d for d, _ in postings])) for postings in lists if postings]), minlength=n_docs)
+            scores = np.where(matched >= math.ceil(min_coverage * len(tokens)), scores, 0)
+            if allowed is not None:
+                scores = np.where(allowed, scores, 0)
+            candidates = np.flatnonzero(scores > 0)
+            if len(candidates) > top_k:
+                candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+            # 점수가 같으면 코드 순서를 따르도록 안정 정렬합니다.
+            candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        elif code_terms:
+            # 코드만 입력한 경우 코드 순서대로 보여줍니다.
+            candidates = self._code_docs[allowed[self._code_docs]][:top_k]
+            scores = np.zeros(n_docs)
+        else:
+            return []
+        return [(self.labels[i], self.grade_groups[i], self.subjects[i], float(scores[i])) for i in candidates]
+
+
+def build_search_index(index):
+    """성취기준 인덱스(standards_index.StandardsIndex)의 모든 학년군으로 검색 색인을 만듭니다."""
+    return StandardsSearchIndex({grade_group: index.records(grade_group) for grade_group in index.grade_groups})
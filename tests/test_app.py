@@ -0,0 +1,108 @@
+import logging
+import os
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from conftest import ROOT
+from metrics import REGISTRY
+
+AI_REQUESTS = REGISTRY.counter("gspbl_ai_requests", "AI 요청 수 (결과별)", ("helper", "outcome"))
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """가짜 모델과 임시 캐시·초안 저장소로 시작 페이지까지 실행한 AppTest입니다."""
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setenv('GSPBL_LLM_BACKEND', 'fake')
+    monkeypatch.setenv('GSPBL_FAKE_LATENCY', '0')
+    monkeypatch.setenv('GSPBL_CACHE_PATH', str(tmp_path / 'cache.sqlite3'))
+    monkeypatch.setenv('GSPBL_DRAFTS_PATH', str(tmp_path / 'drafts.sqlite3'))
+    monkeypatch.setenv('GSPBL_INDEX_PATH', str(tmp_path / 'standards_index.bin'))
+    st.cache_resource.clear()
+    at = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=60)
+    at.run()
+    assert not at.exception
+    yield at
+    st.cache_resource.clear()
+
+
+def click(at, key):
+    next(button for button in at.button if button.key == key).click().run()
+    assert not at.exception, at.exception
+
+
+def test_public_product_ideas_are_not_cached(app):
+    app.session_state.page = 1
+    app.session_state.project_title = "우리 동네 소음을 줄이려면?"
+    app.run()
+    before = AI_REQUESTS.value(helper="public_product", outcome="ok")
+    click(app, "product_ai")
+    click(app, "product_ai")
+    assert AI_REQUESTS.value(helper="public_product", outcome="ok") - before == 2
+    assert AI_REQUESTS.value(helper="public_product", outcome="cache") == 0
+
+
+def test_step3_suggestions_are_cached(app):
+    app.session_state.page = 3
+    app.session_state.project_title = "우리 동네 소음을 줄이려면?"
+    app.run()
+    before = AI_REQUESTS.value(helper="reflection", outcome="cache")
+    click(app, "reflection_ai")
+    first = app.session_state.reflection
+    click(app, "reflection_ai")
+    assert app.session_state.reflection == first
+    assert AI_REQUESTS.value(helper="reflection", outcome="cache") - before == 1
+
+
+def test_app_runs_without_writable_storage(app, monkeypatch, tmp_path):
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    monkeypatch.setenv('GSPBL_CACHE_PATH', str(blocker / 'cache.sqlite3'))
+    monkeypatch.setenv('GSPBL_DRAFTS_PATH', str(blocker / 'drafts.sqlite3'))
+    st.cache_resource.clear()
+    app.session_state.page = 3
+    app.session_state.project_title = "우리 동네 소음을 줄이려면?"
+    app.run()
+    assert not app.exception
+    click(app, "critique_ai")
+    assert app.session_state.critique_revision.startswith("[가짜 응답")
+    assert "draft_id" not in app.session_state
+    captions = [caption.value for caption in app.sidebar.caption]
+    assert any("자동 저장을 사용하지 않습니다" in c for c in captions)
+    assert any("AI 응답 캐시: 저장 위치에 쓸 수 없어" in c for c in captions)
+
+
+def test_step3_all_fills_each_section(app):
+    app.session_state.page = 3
+    app.session_state.project_title = "우리 동네 소음을 줄이려면?"
+    app.session_state.sustained_inquiry = "1차시 질문 만들기"
+    app.run()
+    click(app, "step3_all_ai")
+    values = [text_area.value for text_area in app.text_area]
+    for key in ("process_assessment", "critique_revision", "reflection"):
+        assert app.session_state[key].startswith("[가짜 응답")
+        assert app.session_state[key] in values
+    assert len(app.success) == 3
+
+
+def test_step3_all_uses_prefetched_suggestions(app, monkeypatch):
+    monkeypatch.setenv('GSPBL_PREFETCH', '1')
+    app.session_state.page = 2
+    app.session_state.project_title = "학교 텃밭을 어떻게 가꿀까?"
+    app.run()
+    before = AI_REQUESTS.value(helper="reflection", outcome="prefetch")
+    next(button for button in app.button if button.label == "➡️ 다음 단계").click().run()
+    assert app.session_state.page == 3
+    click(app, "step3_all_ai")
+    assert AI_REQUESTS.value(helper="reflection", outcome="prefetch") - before == 1
+    assert app.session_state.reflection.startswith("[가짜 응답")
+    assert app.session_state.critique_revision.startswith("[가짜 응답")
+
+
+def test_app_shows_prompt_size_logs(app):
+    for name in ("prompt_builder", "gspbl.metrics"):
+        logger = logging.getLogger(name)
+        assert logger.isEnabledFor(logging.INFO)
+        assert any(handler.get_name() == "gspbl" for handler in logger.handlers)
@@ -0,0 +1,66 @@
+from draft_store import DraftStore, autosave, changed_fields, draft_title, is_draft_id, new_draft_id
+
+
+def test_new_draft_id_is_valid():
+    draft_id = new_draft_id()
+    assert is_draft_id(draft_id)
+    assert not is_draft_id("../etc") and not is_draft_id("")
+
+
+def test_draft_title_uses_first_line():
+    assert draft_title("\n  첫 줄 질문  \n둘째 줄") == "첫 줄 질문"
+    assert len(draft_title("가" * 100)) == 60
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    store = DraftStore(str(tmp_path / 'd.sqlite3'))
+    draft_id = new_draft_id()
+    fields = {"project_title": "우리 동네 소음", "selected_standards": ["[4과07-03] 소리"], "page": 2}
+    assert sorted(store.save(draft_id, fields)) == sorted(fields)
+    assert store.load(draft_id) == fields
+    assert store.list_drafts()[0]["title"] == "우리 동네 소음"
+    assert store.load(new_draft_id()) is None
+    assert store.load("bad id") is None
+
+
+def test_save_respects_max_bytes(tmp_path):
+    store = DraftStore(str(tmp_path / 'd.sqlite3'))
+    draft_id = new_draft_id()
+    fields = {"a": "x" * 100, "b": "y" * 100, "c": "z"}
+    assert store.save(draft_id, fields, max_bytes=120) == ["a", "c"]
+    # 한도보다 큰 항목 하나는 단독으로 저장합니다.
+    assert store.save(draft_id, {"big": "w" * 500}, max_bytes=120) == ["big"]
+
+
+def test_autosave_writes_only_changed_fields(tmp_path):
+    store = DraftStore(str(tmp_path / 'd.sqlite3'))
+    draft_id, snapshot = new_draft_id(), {}
+    state = {"project_title": "질문", "selected_standards": ["a"], "page": 1}
+    saved, pending = autosave(store, draft_id, state, snapshot)
+    assert sorted(saved) == ["page", "project_title", "selected_standards"] and pending == 0
+    assert autosave(store, draft_id, state, snapshot) == ([], 0)
+    state["selected_standards"].append("b")
+    assert changed_fields(state, snapshot) == {"selected_standards": ["a", "b"]}
+    assert autosave(store, draft_id, state, snapshot)[0] == ["selected_standards"]
+    assert store.load(draft_id)["selected_standards"] == ["a", "b"]
+
+
+def test_delete(tmp_path):
+    store = DraftStore(str(tmp_path / 'd.sqlite3'))
+    draft_id = new_draft_id()
+    store.save(draft_id, {"project_title": "질문"})
+    store.delete(draft_id)
+    assert store.load(draft_id) is None
+
+
+def test_unwritable_location_disables_store(tmp_path, caplog):
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    store = DraftStore(str(blocker / 'd.sqlite3'))
+    assert not store.enabled
+    assert "자동 저장 없이" in caplog.text
+    draft_id = new_draft_id()
+    assert store.save(draft_id, {"project_title": "질문"}) is None
+    assert store.load(draft_id) is None and store.list_drafts() == []
+    store.delete(draft_id)
+    assert autosave(store, draft_id, {"project_title": "질문"}, {}) == (None, 1)
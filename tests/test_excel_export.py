@@ -0,0 +1,88 @@
+import io
+import json
+
+import pytest
+from openpyxl import load_workbook
+
+from excel_export import (HEADER, PLAN_SECTIONS, SHEET_NAME, build_plan_workbook, cached_plan_workbook, iter_plans, plan_from_state,
+                          plan_hash, plan_rows, write_bulk_workbook)
+
+PLAN = {"project_title": "우리 동네 소음을 줄이려면?", "selected_standards": ["[4과07-03] 소리", "[4국01-01] 듣기"], "reflection": "출구 티켓"}
+
+
+def test_plan_rows_follow_sections():
+    rows = plan_rows(PLAN)
+    assert [title for title, _ in rows] == [title for title, _ in PLAN_SECTIONS]
+    assert dict(rows)["📚 교과 성취기준"] == "• [4과07-03] 소리\n• [4국01-01] 듣기"
+    assert dict(rows)["🔄 비평과 개선"] == ""
+
+
+def test_plan_from_state_copies_lists():
+    state = {"selected_standards": ["a"], "project_title": "질문", "page": 3}
+    plan = plan_from_state(state)
+    assert "page" not in plan and plan["selected_standards"] == ["a"]
+    state["selected_standards"].append("b")
+    assert plan["selected_standards"] == ["a"]
+
+
+def test_build_plan_workbook():
+    sheet = load_workbook(io.BytesIO(build_plan_workbook(PLAN)))[SHEET_NAME]
+    values = list(sheet.iter_rows(values_only=True))
+    assert values[0] == HEADER
+    assert values[1] == ("🎯 탐구 질문", PLAN["project_title"])
+    assert len(values) == len(PLAN_SECTIONS) + 1
+
+
+def test_cached_plan_workbook_reuses_same_content():
+    first = cached_plan_workbook(dict(PLAN))
+    assert cached_plan_workbook(dict(PLAN)) is first
+    assert plan_hash(PLAN) != plan_hash(dict(PLAN, reflection="다름"))
+
+
+def test_write_bulk_workbook_unique_sheet_titles(tmp_path):
+    plans = [dict(PLAN, plan_name="같은 이름: [1]"), dict(PLAN, plan_name="같은 이름: [1]"), {}]
+    path = tmp_path / 'bulk.xlsx'
+    assert write_bulk_workbook(iter(plans), str(path)) == 3
+    titles = load_workbook(path).sheetnames
+    assert titles == ["001_같은 이름   1", "002_같은 이름   1", "003_설계안"]
+
+
+def test_iter_plans_reads_json_and_jsonl(tmp_path):
+    (tmp_path / 'one.json').write_text(json.dumps(PLAN, ensure_ascii=False), encoding='utf-8')
+    (tmp_path / 'many.jsonl').write_text("\n".join(json.dumps(p, ensure_ascii=False) for p in (PLAN, PLAN)) + "\n\n", encoding='utf-8')
+    upload = ('list.json', io.BytesIO(json.dumps([PLAN], ensure_ascii=False).encode('utf-8')))
+    plans = list(iter_plans([str(tmp_path / 'one.json'), str(tmp_path / 'many.jsonl'), upload]))
+    assert plans == [PLAN] * 4
+
+
+def test_iter_plans_rejects_invalid_json(tmp_path):
+    (tmp_path / 'bad.json').write_text("{", encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(iter_plans([str(tmp_path / 'bad.json')]))
+
+
+def test_iter_plans_coerces_field_values(tmp_path):
+    upload = ('numbers.json', io.BytesIO(json.dumps({"project_title": 2024, "plan_name": None, "reflection": [1, "둘"]}).encode('utf-8')))
+    plans = list(iter_plans([upload]))
+    assert plans == [{"project_title": "2024", "plan_name": "", "reflection": ["1", "둘"]}]
+    output = io.BytesIO()
+    assert write_bulk_workbook(iter(plans), output) == 1
+    assert load_workbook(output).sheetnames == ["001_2024"]
+
+
+def test_iter_plans_strips_illegal_characters():
+    upload = ('control.json', io.BytesIO(json.dumps({"project_title": "a\u0001b", "reflection": ["c\u0002"]}).encode('utf-8')))
+    plans = list(iter_plans([upload]))
+    assert plans == [{"project_title": "ab", "reflection": ["c"]}]
+    output = io.BytesIO()
+    assert write_bulk_workbook(iter(plans), output) == 1
+
+
+@pytest.mark.parametrize('name, content', [
+    ('list.json', '["abc"]'),
+    ('number.json', '2024'),
+    ('lines.jsonl', '{"project_title": "질문"}\n[1, 2]\n'),
+])
+def test_iter_plans_rejects_non_object_plans(name, content):
+    with pytest.raises(ValueError, match="JSON 객체"):
+        list(iter_plans([(name, io.BytesIO(content.encode('utf-8')))]))
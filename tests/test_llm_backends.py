@@ -0,0 +1,58 @@
+import pytest
+
+from llm_backends import FakeBackend, FakeBackendError, GeminiBackend, create_backend, generate_concurrently
+
+
+def test_fake_backend_is_deterministic():
+    backend = FakeBackend()
+    assert backend.generate("탐구 질문") == backend.generate("탐구 질문")
+    assert backend.generate("탐구 질문") != backend.generate("다른 질문")
+    assert backend.calls == 4
+
+
+def test_fake_backend_stream_matches_generate():
+    backend = FakeBackend(chunk_size=5)
+    pieces = list(backend.stream("성찰 활동"))
+    assert len(pieces) > 1
+    assert "".join(pieces) == backend.generate("성찰 활동")
+
+
+def test_fake_backend_failure_is_retryable_quota_error():
+    backend = FakeBackend(failure_rate=1.0)
+    with pytest.raises(FakeBackendError) as info:
+        backend.generate("x")
+    assert info.value.code == 429
+
+
+def test_create_backend_from_env(monkeypatch):
+    monkeypatch.setenv('GSPBL_LLM_BACKEND', 'fake')
+    monkeypatch.setenv('GSPBL_FAKE_LATENCY', '0')
+    backend = create_backend()
+    assert isinstance(backend, FakeBackend)
+    assert backend.latency == 0
+    assert not backend.requires_api_key
+
+
+def test_create_backend_gemini_does_not_import_sdk():
+    backend = create_backend('gemini', api_key='key')
+    assert isinstance(backend, GeminiBackend)
+    assert backend.requires_api_key and backend._model is None
+
+
+def test_create_backend_rejects_unknown_name():
+    with pytest.raises(ValueError):
+        create_backend('nope')
+
+
+def test_generate_concurrently_reports_each_result():
+    class HalfFailing(FakeBackend):
+        def generate(self, prompt):
+            if prompt == "bad":
+                raise FakeBackendError("실패")
+            return super().generate(prompt)
+
+    backend = HalfFailing()
+    results = {name: (text, error) for name, text, error in generate_concurrently(backend, {"a": "good", "b": "bad"})}
+    assert results["a"] == (backend.reply("good"), None)
+    assert results["b"][0] is None and isinstance(results["b"][1], FakeBackendError)
+    assert list(generate_concurrently(backend, {})) == []
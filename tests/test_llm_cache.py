@@ -0,0 +1,76 @@
+import time
+
+from llm_cache import ResponseCache, make_key, normalize_prompt
+
+
+def test_make_key_normalizes_whitespace_and_unicode():
+    decomposed = "\u1100\u1161 질문"  # 조합형 'ㄱ' + 'ㅏ'
+    assert normalize_prompt(f"  {decomposed}\n\n  ") == "가 질문"
+    assert make_key("가  질문", "m") == make_key(decomposed, "m")
+    assert make_key("가 질문", "m") != make_key("가 질문", "other")
+    assert make_key("가 질문", "m", {"temperature": 1}) != make_key("가 질문", "m")
+
+
+def test_get_set_and_stats(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'c.sqlite3'))
+    assert cache.get("k") is None
+    cache.set("k", "응답", "m")
+    assert cache.get("k") == "응답"
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "entries": 1}
+
+
+def test_contains_does_not_touch_stats(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'c.sqlite3'))
+    cache.set("k", "응답")
+    assert cache.contains("k") and not cache.contains("missing")
+    assert cache.stats()["hits"] == 0 and cache.stats()["misses"] == 0
+
+
+def test_expired_entries_are_ignored(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'c.sqlite3'), ttl=0.05)
+    cache.set("k", "응답")
+    time.sleep(0.1)
+    assert cache.get("k") is None and not cache.contains("k")
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'c.sqlite3'), max_entries=2)
+    cache.set("a", "1")
+    time.sleep(0.01)
+    cache.set("b", "2")
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_clear(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'c.sqlite3'))
+    cache.set("k", "응답")
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+
+
+def test_clear_failure_disables_cache(tmp_path, caplog):
+    cache = ResponseCache(str(tmp_path / 'c.sqlite3'))
+    cache.set("k", "응답")
+    cache.path = str(tmp_path / 'missing' / 'c.sqlite3')
+    cache.clear()
+    assert not cache.enabled
+    assert "캐시 없이" in caplog.text
+    assert cache.get("k") is None
+
+
+def test_unwritable_location_disables_cache(tmp_path, caplog):
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    cache = ResponseCache(str(blocker / 'c.sqlite3'))
+    assert not cache.enabled
+    assert "캐시 없이" in caplog.text
+    cache.set("k", "응답")
+    assert cache.get("k") is None and not cache.contains("k")
+    assert cache.stats()["entries"] == 0
+    cache.clear()
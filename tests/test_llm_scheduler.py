@@ -0,0 +1,226 @@
+import threading
+import time
+
+import pytest
+
+from llm_backends import FakeBackend, FakeBackendError
+from llm_scheduler import (CircuitBreaker, CircuitOpenError, LLMScheduler, SchedulerBusyError, SchedulerTimeoutError,
+                           TokenBucket, is_retryable)
+
+
+class ScriptedBackend(FakeBackend):
+    """호출마다 정해 둔 예외를 차례로 발생시키고, 목록이 끝나면 정상 응답을 돌려줍니다."""
+
+    def __init__(self, errors=(), **kwargs):
+        super().__init__(**kwargs)
+        self.errors = list(errors)
+
+    def _start_call(self):
+        with self._lock:
+            self.calls += 1
+            error = self.errors.pop(0) if self.errors else None
+        if error is not None:
+            raise error
+
+
+class HangingBackend(FakeBackend):
+    """release가 설정될 때까지 응답하지 않는 백엔드입니다."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.release = threading.Event()
+
+    def _start_call(self):
+        super()._start_call()
+        self.release.wait()
+
+
+def make_scheduler(backend, **kwargs):
+    options = dict(rate=1000, burst=1000, base_delay=0, max_delay=0, acquire_timeout=1.0)
+    options.update(kwargs)
+    return LLMScheduler(backend, **options)
+
+
+def test_is_retryable():
+    assert is_retryable(FakeBackendError("429"))
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(ValueError("bad request"))
+
+
+def test_generate_retries_transient_errors():
+    backend = ScriptedBackend([FakeBackendError("1"), FakeBackendError("2")])
+    scheduler = make_scheduler(backend, max_retries=3)
+    assert scheduler.generate("p") == backend.reply("p")
+    stats = scheduler.stats()
+    assert stats["upstream_calls"] == 3 and stats["retries"] == 2 and stats["failures"] == 0
+
+
+def test_generate_does_not_retry_request_errors():
+    backend = ScriptedBackend([ValueError("bad")])
+    scheduler = make_scheduler(backend, max_retries=3)
+    with pytest.raises(ValueError):
+        scheduler.generate("p")
+    assert backend.calls == 1
+
+
+def test_generate_coalesces_identical_prompts():
+    backend = FakeBackend(latency=0.2)
+    scheduler = make_scheduler(backend)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(scheduler.generate("같은 프롬프트"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert backend.calls == 1
+    assert len(set(results)) == 1 and len(results) == 4
+    assert scheduler.stats()["coalesced"] == 3
+
+
+def test_stream_yields_backend_chunks():
+    backend = FakeBackend(chunk_size=4)
+    scheduler = make_scheduler(backend)
+    assert "".join(scheduler.stream("p")) == backend.reply("p")
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_breaker_opens_after_repeated_transient_failures():
+    backend = ScriptedBackend([FakeBackendError(str(i)) for i in range(3)])
+    scheduler = make_scheduler(backend, max_retries=0, failure_threshold=3, reset_timeout=60)
+    for _ in range(3):
+        with pytest.raises(FakeBackendError):
+            scheduler.generate(f"p{backend.calls}")
+    with pytest.raises(CircuitOpenError):
+        scheduler.generate("next")
+    assert scheduler.circuit_state == 'open'
+
+
+def test_breaker_half_open_trial_closes_on_success():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    time.sleep(0.06)
+    breaker.check()
+    # 시험 요청이 진행 중이면 다른 요청은 기다리지 않고 거절합니다.
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    breaker.check()
+
+
+def test_busy_scheduler_rejects_when_no_slot():
+    backend = FakeBackend(latency=0.3)
+    scheduler = make_scheduler(backend, max_in_flight=1, acquire_timeout=0.05)
+    thread = threading.Thread(target=scheduler.generate, args=("slow",))
+    thread.start()
+    time.sleep(0.05)
+    with pytest.raises(SchedulerBusyError):
+        scheduler.generate("other")
+    thread.join()
+    assert scheduler.stats()["rejected"] == 1
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=10, capacity=1)
+    assert bucket.acquire(0)
+    assert not bucket.acquire(0)
+    assert bucket.acquire(0.2)
+
+
+def test_request_errors_do_not_open_breaker():
+    backend = ScriptedBackend([ValueError("safety") for _ in range(5)])
+    scheduler = make_scheduler(backend, failure_threshold=2, reset_timeout=60)
+    for i in range(5):
+        with pytest.raises(ValueError):
+            scheduler.generate(f"p{i}")
+    assert scheduler.circuit_state == 'closed'
+    assert scheduler.generate("ok") == backend.reply("ok")
+
+
+def test_stream_request_error_does_not_open_breaker():
+    class StreamRejecting(FakeBackend):
+        def stream(self, prompt):
+            raise ValueError("400 InvalidArgument")
+            yield
+
+    scheduler = make_scheduler(StreamRejecting(), failure_threshold=1, reset_timeout=60)
+    with pytest.raises(ValueError):
+        list(scheduler.stream("p"))
+    assert scheduler.circuit_state == 'closed'
+
+
+def trip_breaker(scheduler, backend):
+    backend.errors.append(FakeBackendError("429"))
+    with pytest.raises(FakeBackendError):
+        scheduler.generate("trip")
+    time.sleep(0.06)
+    assert scheduler.circuit_state == 'half-open'
+
+
+def test_abandoned_stream_during_trial_does_not_block_forever():
+    backend = ScriptedBackend(chunk_size=2)
+    scheduler = make_scheduler(backend, max_retries=0, failure_threshold=1, reset_timeout=0.05)
+    trip_breaker(scheduler, backend)
+    stream = scheduler.stream("trial")
+    next(stream)
+    stream.close()
+    assert scheduler.generate("after") == backend.reply("after")
+    assert scheduler.circuit_state == 'closed'
+
+
+def test_request_error_during_trial_allows_next_trial():
+    backend = ScriptedBackend()
+    scheduler = make_scheduler(backend, max_retries=0, failure_threshold=1, reset_timeout=0.05)
+    trip_breaker(scheduler, backend)
+    backend.errors.append(ValueError("safety"))
+    with pytest.raises(ValueError):
+        scheduler.generate("blocked by filter")
+    assert scheduler.generate("after") == backend.reply("after")
+
+
+def test_hanging_backend_times_out_leader_and_follower():
+    backend = HangingBackend()
+    scheduler = make_scheduler(backend, request_timeout=0.2, acquire_timeout=0.1)
+    errors = []
+
+    def call():
+        try:
+            scheduler.generate("같은 프롬프트")
+        except CircuitOpenError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=2)
+    backend.release.set()
+    assert time.monotonic() - start < 1.5
+    assert len(errors) == 3 and all(isinstance(e, SchedulerTimeoutError) for e in errors)
+    assert backend.calls == 1
+
+
+def test_hanging_stream_times_out():
+    backend = HangingBackend()
+    scheduler = make_scheduler(backend, request_timeout=0.2)
+    start = time.monotonic()
+    with pytest.raises(SchedulerTimeoutError):
+        list(scheduler.stream("p"))
+    backend.release.set()
+    assert time.monotonic() - start < 1.0
+    assert scheduler.stats()["failures"] == 1
+
+
+def test_timeouts_open_breaker():
+    backend = HangingBackend()
+    scheduler = make_scheduler(backend, request_timeout=0.05, failure_threshold=2)
+    for prompt in ("a", "b"):
+        with pytest.raises(SchedulerTimeoutError):
+            scheduler.generate(prompt)
+    backend.release.set()
+    with pytest.raises(CircuitOpenError):
+        scheduler.generate("c")
+    assert backend.calls == 2
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from metrics import Registry, SlowRerunProfiler, timed
+
+
+def test_counter_and_histogram_snapshot():
+    registry = Registry()
+    requests = registry.counter("requests", "요청 수", ("outcome",))
+    latency = registry.histogram("latency", "지연", ("page",), buckets=(0.1, 1.0))
+    requests.inc(outcome="ok")
+    requests.inc(2, outcome="ok")
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, page="start")
+    assert requests.value(outcome="ok") == 3
+    snapshot = registry.snapshot()
+    assert snapshot["requests"]["series"] == [{"labels": {"outcome": "ok"}, "value": 3}]
+    series = snapshot["latency"]["series"][0]
+    assert series["count"] == 3 and series["p50"] == 0.5
+    assert json.loads(registry.to_json())["metrics"]["latency"]["type"] == "histogram"
+
+
+def test_prometheus_format():
+    registry = Registry()
+    registry.counter("requests", "요청 수", ("helper",)).inc(helper='a"b')
+    registry.histogram("latency", "지연", buckets=(1.0,)).observe(0.5)
+    text = registry.to_prometheus()
+    assert 'requests_total{helper="a\\"b"} 1' in text
+    assert 'latency_bucket{le="1.0"} 1' in text and 'latency_bucket{le="+Inf"} 1' in text
+    assert "# TYPE latency histogram" in text
+
+
+def test_labels_must_match_definition():
+    registry = Registry()
+    counter = registry.counter("requests", "요청 수", ("outcome",))
+    with pytest.raises(ValueError):
+        counter.inc(helper="x")
+    assert registry.counter("requests", "요청 수", ("outcome",)) is counter
+    with pytest.raises(ValueError):
+        registry.histogram("requests", "요청 수", ("outcome",))
+
+
+def test_timed_records_even_on_error():
+    histogram = Registry().histogram("duration", "시간", ("function",))
+
+    @timed(histogram, function="work")
+    def work(fail):
+        if fail:
+            raise RuntimeError
+        return "done"
+
+    assert work(False) == "done"
+    with pytest.raises(RuntimeError):
+        work(True)
+    assert histogram._snapshot()[0]["count"] == 2
+
+
+def test_slow_rerun_profiler_keeps_recent_profiles(tmp_path):
+    profiler = SlowRerunProfiler(threshold=0, directory=str(tmp_path), keep=2)
+    for label in ("a", "b", "c"):
+        with profiler.profile(label):
+            sum(range(1000))
+    assert len(list(tmp_path.glob('*.prof'))) == 2
@@ -0,0 +1,28 @@
+import re
+import zlib
+
+from pdf_export import EMPTY_TEXT, SYMBOL_MARK, build_plan_pdf, font_subset
+
+PLAN = {"project_title": "우리 동네 소음을 줄이려면?", "selected_standards": ["[4과07-03] 소리"], "sustained_inquiry": "탐구 과정\n" * 400}
+
+
+def test_build_plan_pdf_is_valid_pdf():
+    data = build_plan_pdf(PLAN)
+    assert data.startswith(b'%PDF-') and data.rstrip().endswith(b'%%EOF')
+    count = int(re.search(rb'/Type /Pages /Kids \[[^\]]*\] /Count (\d+)', data).group(1))
+    assert count > 1
+    assert b'/FontFile2' in data and b'/ToUnicode' in data
+
+
+def test_font_subset_covers_text():
+    codepoints = frozenset(map(ord, "가나다" + EMPTY_TEXT))
+    subset = font_subset(codepoints)
+    assert set(subset.glyph_ids) >= {ord("가"), ord("나"), ord("다")}
+    assert re.fullmatch(r'[A-Z]{6}', subset.tag)
+
+
+def test_heading_emoji_become_symbol_mark():
+    data = build_plan_pdf({"project_title": "질문"})
+    streams = [zlib.decompress(m) for m in re.findall(rb'stream\r?\n(.*?)\r?\nendstream', data, re.S)]
+    cmap = next(stream for stream in streams if b'beginbfchar' in stream)
+    assert f'<{ord(SYMBOL_MARK):04X}>'.encode() in cmap
@@ -0,0 +1,129 @@
+import json
+
+import pytest
+
+from llm_backends import FakeBackend
+from plan_pipeline import (STAGES, Checkpoint, PipelineError, first_suggestion, main, normalize_row, read_rows, run_batch, run_plan,
+                           write_outputs)
+
+ROWS = [
+    {"id": "p1", "keyword": "소음", "grade_group": "3-4학년군"},
+    {"id": "p2", "project_title": "학교 텃밭을 어떻게 가꿀까?", "public_product": "텃밭 장터", "standards": ["4과03"],
+     "grade_group": "3-4학년군"},
+]
+
+
+@pytest.fixture(autouse=True)
+def temporary_index(tmp_path, monkeypatch):
+    monkeypatch.setenv('GSPBL_INDEX_PATH', str(tmp_path / 'standards_index.bin'))
+
+
+class FailingStage3Backend(FakeBackend):
+    def generate(self, prompt):
+        if "성찰(Reflection)" in prompt:
+            raise RuntimeError("성찰 실패")
+        return super().generate(prompt)
+
+
+def test_first_suggestion_strips_bullets():
+    assert first_suggestion("\n- **첫 제안**\n2. 둘째") == "첫 제안"
+    assert first_suggestion("1) 하나") == "하나"
+
+
+def test_normalize_row_validates_input():
+    row = normalize_row({"keyword": "소음", "standards": "4과03; 4과07 | 4국01", "extra": ""}, 3)
+    assert row["id"] == "plan-0003" and row["standards"] == ["4과03", "4과07", "4국01"] and "extra" not in row
+    with pytest.raises(ValueError):
+        normalize_row({"keyword": "소음", "grade_group": "7-8학년군"}, 1)
+    with pytest.raises(ValueError):
+        normalize_row({"id": "x"}, 1)
+
+
+def test_read_rows_rejects_duplicate_ids(tmp_path):
+    path = tmp_path / 'plans.csv'
+    path.write_text("id,keyword\na,소음\na,텃밭\n", encoding='utf-8')
+    with pytest.raises(ValueError):
+        read_rows(str(path))
+
+
+def test_run_batch_generates_all_stages(tmp_path):
+    backend = FakeBackend()
+    results = run_batch(ROWS, backend, str(tmp_path / 'ck.jsonl'), max_workers=2)
+    assert [r["id"] for r in results] == ["p1", "p2"]
+    assert all(r["status"] == "done" for r in results)
+    plan = results[1]["plan"]
+    assert plan["project_title"] == "학교 텃밭을 어떻게 가꿀까?"
+    assert plan["selected_standards"] and all(s.startswith("[4과03") for s in plan["selected_standards"])
+    assert plan["reflection"] and plan["ai_feedback"]
+    assert results[0]["plan"]["project_title"].startswith("[가짜 응답")
+
+
+def test_run_batch_resumes_from_checkpoint(tmp_path):
+    checkpoint = str(tmp_path / 'ck.jsonl')
+    first = run_batch(ROWS[:1], FailingStage3Backend(), checkpoint)[0]
+    assert first["status"] == "failed" and "성찰 실패" in first["error"]
+    assert first["plan"]["process_assessment"]  # 일부 완료한 값은 남깁니다.
+
+    backend = FakeBackend()
+    second = run_batch(ROWS[:1], backend, checkpoint)[0]
+    assert second["status"] == "done" and second["resumed_stages"] == 4
+    # 남은 성찰과 종합 피드백만 새로 요청합니다.
+    assert backend.calls == 2
+
+
+def test_checkpoint_ignores_changed_rows_and_broken_lines(tmp_path):
+    path = tmp_path / 'ck.jsonl'
+    checkpoint = Checkpoint(str(path))
+    checkpoint.record("p1", "old", "question", {"project_title": "이전"})
+    checkpoint.record("p1", "new", "question", {"project_title": "새"})
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"id": "p2", "row_hash": "x", "stage": "question"}\n[1, 2]\n"문자열"\n{"id": ["p3"], "row_hash": "x", "stage": "q", "values": {}}\n')
+        f.write('{"id": "p1", "row_')
+    assert checkpoint.load() == {"p1": ("new", {"question": {"project_title": "새"}})}
+
+
+def test_run_plan_reports_stage_error():
+    def broken(state, backend, resources):
+        raise PipelineError("단계 실패", {"project_title": "일부"})
+
+    result = run_plan(normalize_row(dict(ROWS[0]), 1), FakeBackend(), stages=(("question", broken),) + STAGES[1:])
+    assert result["status"] == "failed" and result["plan"]["project_title"] == "일부"
+
+
+def test_write_outputs_and_main(tmp_path, capsys):
+    rows = tmp_path / 'plans.jsonl'
+    rows.write_text("\n".join(json.dumps(row, ensure_ascii=False) for row in ROWS), encoding='utf-8')
+    json_path, excel_path = tmp_path / 'plans.json', tmp_path / 'plans.xlsx'
+    assert main([str(rows), '--backend', 'fake', '--no-feedback', '--json', str(json_path), '--excel', str(excel_path)]) == 0
+    plans = json.loads(json_path.read_text(encoding='utf-8'))
+    assert [p["plan_name"] for p in plans] == ["p1", "p2"] and not plans[0]["ai_feedback"]
+    assert excel_path.exists()
+    assert "설계안 2/2개 완료" in capsys.readouterr().out
+    assert write_outputs([{"status": "failed", "plan": {}}]) == 0
+
+
+def test_run_batch_records_unexpected_errors(tmp_path, monkeypatch):
+    import plan_pipeline
+
+    def run_plan(row, *args):
+        if row['id'] == 'p1':
+            raise KeyError('grade_group')
+        return real_run_plan(row, *args)
+
+    real_run_plan = plan_pipeline.run_plan
+    monkeypatch.setattr(plan_pipeline, 'run_plan', run_plan)
+    rows = [normalize_row(dict(row), n) for n, row in enumerate(ROWS, 1)]
+    results = run_batch(rows, FakeBackend(), str(tmp_path / 'ck.jsonl'), max_workers=2, stages=STAGES[:1])
+    assert [r["status"] for r in results] == ["failed", "done"]
+    assert results[0]["error"] == "KeyError: 'grade_group'" and results[0]["plan"]["plan_name"] == "p1"
+    assert write_outputs(results) == 1
+
+
+def test_main_reports_unreadable_input(tmp_path, capsys):
+    path = tmp_path / 'plans.csv'
+    path.write_text("id,keyword\na,소음\na,텃밭\n", encoding='utf-8')
+    for argv in ([str(path)], [str(tmp_path / 'missing.csv')]):
+        with pytest.raises(SystemExit) as excinfo:
+            main(argv + ['--backend', 'fake'])
+        assert excinfo.value.code == 2
+        assert "입력 파일을 읽을 수 없습니다" in capsys.readouterr().err
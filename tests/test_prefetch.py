@@ -0,0 +1,79 @@
+import threading
+
+from prefetch import PrefetchExecutor, SessionPrefetcher, prefetch_enabled
+
+
+def prompts(*names, fingerprint="v1"):
+    return {f"key-{name}-{fingerprint}": (name, f"prompt {name}", fingerprint) for name in names}
+
+
+def test_prefetch_enabled(monkeypatch):
+    monkeypatch.delenv('GSPBL_PREFETCH', raising=False)
+    assert not prefetch_enabled()
+    monkeypatch.setenv('GSPBL_PREFETCH', '1')
+    assert prefetch_enabled()
+
+
+def test_submit_and_take():
+    executor = PrefetchExecutor(max_workers=2)
+    prefetcher = SessionPrefetcher(executor, limit=5)
+    assert prefetcher.submit(str.upper, prompts("a", "b")) == ["a", "b"]
+    # 이미 요청한 프롬프트는 다시 보내지 않습니다.
+    assert prefetcher.submit(str.upper, prompts("a")) == []
+    assert prefetcher.take("key-a-v1").result() == "PROMPT A"
+    assert prefetcher.take("key-a-v1") is None
+    assert prefetcher.remaining == 3
+
+
+def test_session_limit_caps_submissions():
+    executor = PrefetchExecutor(max_workers=1)
+    prefetcher = SessionPrefetcher(executor, limit=2)
+    assert prefetcher.submit(str.upper, prompts("a", "b", "c")) == ["a", "b"]
+    assert prefetcher.submit(str.upper, prompts("c")) == []
+    assert prefetcher.remaining == 0
+
+
+def test_executor_rejects_work_when_queue_is_full():
+    release = threading.Event()
+    executor = PrefetchExecutor(max_workers=1, max_pending=2)
+    first, second = executor.try_submit(release.wait), executor.try_submit(release.wait)
+    assert first is not None and second is not None
+    assert executor.try_submit(release.wait) is None
+    release.set()
+    first.result(timeout=1), second.result(timeout=1)
+    assert executor.try_submit(str.upper, "x").result(timeout=1) == "X"
+
+
+def test_discard_stale_only_drops_changed_inputs():
+    release = threading.Event()
+    executor = PrefetchExecutor(max_workers=1)
+    prefetcher = SessionPrefetcher(executor)
+    prefetcher.submit(lambda p: release.wait() and p, prompts("a", "b"))
+    assert prefetcher.discard_stale({"a": "v1", "b": "v2"}) == ["b"]
+    assert prefetcher.take("key-b-v1") is None
+    release.set()
+    assert prefetcher.take("key-a-v1").result(timeout=1) == "prompt a"
+
+
+def test_resubmitting_a_name_replaces_the_old_job():
+    release = threading.Event()
+    executor = PrefetchExecutor(max_workers=1)
+    prefetcher = SessionPrefetcher(executor)
+    prefetcher.submit(lambda p: release.wait() and p, prompts("a", "b"))
+    assert prefetcher.submit(str.upper, prompts("b", fingerprint="v2")) == ["b"]
+    assert prefetcher.take("key-b-v1") is None
+    release.set()
+    assert prefetcher.take("key-b-v2").result(timeout=1) == "PROMPT B"
+    assert prefetcher.take("key-a-v1").result(timeout=1) == "prompt a"
+    assert prefetcher.pending() == 0
+
+
+def test_session_limit_survives_a_new_prefetcher():
+    executor = PrefetchExecutor(max_workers=1)
+    prefetcher = SessionPrefetcher(executor, "session-1", limit=2)
+    assert prefetcher.submit(str.upper, prompts("a")) == ["a"]
+    # '처음으로'를 눌러 세션 상태가 비워져도 같은 세션의 횟수는 이어집니다.
+    prefetcher = SessionPrefetcher(executor, "session-1", limit=2)
+    assert prefetcher.remaining == 1
+    assert prefetcher.submit(str.upper, prompts("b", "c")) == ["b"]
+    assert SessionPrefetcher(executor, "session-2", limit=2).remaining == 2
@@ -0,0 +1,79 @@
+import pytest
+
+from prompt_builder import (DEFAULT_BUDGET, TRUNCATION_MARK, Items, Standards, Text, build_prompt, critique_prompt, dedupe, estimate_tokens,
+                            feedback_prompt, question_prompt, truncate_text)
+
+
+@pytest.fixture(autouse=True)
+def no_budget_override(monkeypatch):
+    monkeypatch.delenv('GSPBL_PROMPT_BUDGET', raising=False)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("가나다") == 3
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+
+def test_truncate_text_respects_budget():
+    text = "가나다라마 " * 100
+    cut = truncate_text(text, 50)
+    assert cut.endswith(TRUNCATION_MARK)
+    assert estimate_tokens(cut) <= 50
+    assert truncate_text("짧은 글", 50) == "짧은 글"
+
+
+def test_dedupe_keeps_order():
+    assert dedupe([" 협력 ", "소통", "협력", "", None]) == ["협력", "소통", "None"]
+
+
+def test_build_prompt_within_budget_is_unchanged():
+    prompt = build_prompt("question", ["키워드: ", Text("소음")], budget=100)
+    assert prompt.text == "키워드: 소음"
+    assert prompt.tokens_before == prompt.tokens_after and prompt.steps == ()
+
+
+def test_build_prompt_summarizes_standards_then_codes():
+    standards = [f"[4과0{i}-01] " + "성취기준 문장이 아주 깁니다 " * 4 + "끝" for i in range(1, 8)]
+    summarized = build_prompt("x", ["성취기준:\n", Standards(standards)], budget=300)
+    assert summarized.steps == ("성취기준 요약",)
+    assert summarized.tokens_after <= 300 < summarized.tokens_before
+    codes_only = build_prompt("x", ["성취기준:\n", Standards(standards)], budget=100)
+    assert codes_only.steps == ("성취기준 요약", "성취기준 코드만")
+    assert codes_only.text == "성취기준:\n" + ", ".join(s.split()[0] for s in standards)
+
+
+def test_build_prompt_truncates_longest_text_first():
+    short, long = Text("짧은 내용 " * 20), Text("아주 긴 내용 " * 300)
+    prompt = build_prompt("x", [short, "\n", long], budget=300)
+    assert prompt.steps == ("이전 내용 자르기",)
+    assert prompt.tokens_after <= 300
+    assert ("짧은 내용 " * 20) in prompt.text and TRUNCATION_MARK in prompt.text
+
+
+def test_build_prompt_removes_duplicate_items():
+    prompt = build_prompt("x", ["역량: ", Items(["협력", "협력", "소통"])], budget=100)
+    assert prompt.text == "역량: 협력, 소통"
+    assert prompt.steps == ("중복 제거",)
+
+
+def test_budget_env_override(monkeypatch):
+    monkeypatch.setenv('GSPBL_PROMPT_BUDGET', '42')
+    assert question_prompt("소음").budget == 42
+
+
+@pytest.mark.parametrize('value', ['abc', '0', '-5', '1.5'])
+def test_invalid_budget_env_falls_back_to_default(monkeypatch, value):
+    monkeypatch.setenv('GSPBL_PROMPT_BUDGET', value)
+    assert question_prompt("소음").budget == DEFAULT_BUDGET
+
+
+def test_step_prompts_use_state():
+    state = {"project_title": "우리 동네 소음", "public_product": "발표회", "selected_standards": ["[4과07-03] 소리"]}
+    critique = critique_prompt(state)
+    assert critique.name == "critique_revision"
+    assert "우리 동네 소음" in critique.text and "발표회" in critique.text
+    feedback = feedback_prompt(state)
+    assert "### 🎯 탐구 질문\n우리 동네 소음" in feedback.text
+    assert "• [4과07-03] 소리" in feedback.text
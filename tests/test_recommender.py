@@ -0,0 +1,32 @@
+import pytest
+
+from recommender import StandardsRecommender, build_recommender, char_ngrams
+from standards_index import open_index
+
+
+@pytest.fixture(scope='module')
+def index(tmp_path_factory):
+    index = open_index(index_path=str(tmp_path_factory.mktemp('index') / 'standards_index.bin'))
+    yield index
+    index.close()
+
+
+def test_recommender_ranks_related_standards(index):
+    recommender = build_recommender(index)
+    results = recommender.recommend("우리 동네 소음을 줄이려면?", "3-4학년군", top_k=3)
+    assert results and "소음" in results[0][0]
+    assert [score for _, _, score in results] == sorted((score for _, _, score in results), reverse=True)
+    assert recommender.recommend("소음", "3-4학년군", subjects={"국어"}, top_k=3)[0][1] == "국어"
+
+
+def test_recommender_skips_duplicate_standards():
+    record = {"교과": "과학", "성취기준_코드": "[4과07-03]", "성취기준": "소리의 세기와 높낮이를 비교할 수 있다."}
+    other = {"교과": "국어", "성취기준_코드": "[4국01-01]", "성취기준": "대화의 즐거움을 알고 대화를 나눈다."}
+    recommender = StandardsRecommender({"3-4학년군": [record, dict(record), other]})
+    assert len(recommender.labels) == 2
+    labels = [label for label, _, _ in recommender.recommend("소리의 세기", "3-4학년군", top_k=5)]
+    assert len(labels) == len(set(labels))
+
+
+def test_char_ngrams():
+    assert set(char_ngrams("소음")) >= {"소음"}
@@ -0,0 +1,75 @@
+import pickle
+
+import pytest
+
+from standards_index import (GRADE_GROUPS, Standard, compact_records, merge_selection, open_index, parse_5_6_standards_text,
+                             read_source_records, subject_standards)
+
+
+@pytest.fixture(scope='module')
+def index(tmp_path_factory):
+    index = open_index(index_path=str(tmp_path_factory.mktemp('index') / 'standards_index.bin'))
+    yield index
+    index.close()
+
+
+def test_index_matches_source_records(index):
+    assert index.grade_groups == GRADE_GROUPS
+    for grade_group in GRADE_GROUPS:
+        source = read_source_records(grade_group)
+        records = index.records(grade_group)
+        assert len(records) == len(source)
+        for record, item in zip(records, source):
+            assert record['성취기준_코드'] == item['성취기준_코드']
+            assert record['성취기준'] == item['성취기준']
+            assert record.description == (item.get('성취기준_설명') or '')
+
+
+def test_records_are_shared_between_calls(index):
+    assert index.records("3-4학년군") is index.records("3-4학년군")
+    assert index.subject_standards("3-4학년군") is index.subject_standards("3-4학년군")
+
+
+def test_stale_index_is_rebuilt(tmp_path):
+    path = tmp_path / 'standards_index.bin'
+    open_index(index_path=str(path)).close()
+    path.write_bytes(b'GSIX' + b'\0' * 64)
+    with pytest.raises(ValueError):
+        open_index(index_path=str(path), rebuild=False)
+    index = open_index(index_path=str(path))
+    assert len(index) > 0
+    index.close()
+
+
+def test_standard_is_immutable_and_picklable():
+    item = {"학년군": "3~4", "교과": "과학", "성취기준_코드": "[4과01-01]", "성취기준": "물체를 관찰한다."}
+    record = Standard.from_dict(item)
+    with pytest.raises(AttributeError):
+        record.text = "바꿈"
+    assert record.get('영역', '') == '' and '영역' not in record
+    assert record.as_dict() == item
+    assert pickle.loads(pickle.dumps(record)).as_dict() == item
+    assert compact_records([item])[0].code == "[4과01-01]"
+
+
+def test_subject_standards_groups_by_subject():
+    records = compact_records([
+        {"교과": "과학", "성취기준_코드": "[4과01-01]", "성취기준": "가"},
+        {"교과": "국어", "성취기준_코드": "[4국01-01]", "성취기준": "나"},
+        {"교과": "과학", "성취기준_코드": "[4과01-02]", "성취기준": "다"},
+    ])
+    grouped = subject_standards(records)
+    assert grouped["과학"][0] == ("[4과01-01] 가", "[4과01-02] 다")
+    assert grouped["국어"][1] == frozenset({"[4국01-01] 나"})
+
+
+def test_merge_selection_keeps_other_subjects():
+    selected = ["[4과01-01] 가", "[4국01-01] 나"]
+    science = frozenset({"[4과01-01] 가", "[4과01-02] 다"})
+    assert merge_selection(selected, science, ["[4과01-02] 다"]) == ["[4과01-02] 다", "[4국01-01] 나"]
+    assert merge_selection(selected, science, ["[4과01-01] 가"]) is selected
+
+
+def test_parse_5_6_standards_text():
+    parsed = parse_5_6_standards_text("[6과01-01] 물질을 관찰한다.\n잡음\n[6사02-03] 지도를 읽는다.")
+    assert [(p["교과"], p["성취기준_코드"]) for p in parsed] == [("과학", "[6과01-01]"), ("사회", "[6사02-03]")]
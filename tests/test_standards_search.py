@@ -0,0 +1,25 @@
+import pytest
+
+from standards_index import open_index
+from standards_search import build_search_index, normalize_code
+
+
+@pytest.fixture(scope='module')
+def index(tmp_path_factory):
+    index = open_index(index_path=str(tmp_path_factory.mktemp('index') / 'standards_index.bin'))
+    yield index
+    index.close()
+
+
+def test_code_prefix_search(index):
+    search = build_search_index(index)
+    labels = [search.labels[i] for i in search.code_prefix("4과07")]
+    assert labels and all(label.startswith("[4과07") for label in labels)
+    assert normalize_code("[4과07-03]") == normalize_code("4과07-03")
+
+
+def test_text_search_finds_matching_standard(index):
+    search = build_search_index(index)
+    results = search.search("소음", grade_group="3-4학년군")
+    assert results and "소음" in results[0][0]
+    assert all(grade_group == "3-4학년군" for _, grade_group, _, _ in results)